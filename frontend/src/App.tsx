@@ -174,7 +174,7 @@ const BatchUploadModal = ({ onClose }: { onClose: () => void }) => {
 
             if (res.ok) {
                 const data = await res.json();
-                setStatus(`Success! Processed ${data.processed} photos.`);
+                setStatus(`Success! Archive queued for processing (job ${data.job_id}).`);
                 setTimeout(onClose, 2000);
             } else {
                 setStatus("Upload failed.");
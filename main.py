@@ -1,9 +1,17 @@
 import uvicorn
 import os
 
+from mvp.core.config import settings
+
 if __name__ == "__main__":
     # Ensure raw_1000 exists or create data folder if missing
     os.makedirs("data", exist_ok=True)
     
     print("Starting Search Appearance API...")
-    uvicorn.run("mvp.api.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "mvp.api.main:app",
+        host=settings.api.host,
+        port=settings.api.port,
+        workers=settings.api.workers,  # Also selects the progress bus (API_PROGRESS_BUS=auto)
+        reload=settings.api.reload and settings.api.workers <= 1,  # uvicorn cannot reload with several workers
+    )
@@ -0,0 +1,198 @@
+"""
+Background annotation of un-profiled StoredPhoto rows.
+
+One `annotate_photo` job per photo is queued in the durable job queue. Workers
+lease jobs, run them through ProviderRegistry with bounded concurrency, and fill
+in the profile, CLIP embedding and phash. Restarting the server resumes from the
+remaining queued/expired jobs.
+"""
+import asyncio
+import json
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import String, cast, or_
+from sqlmodel import Session, select
+
+from mvp.annotator.prompts import SYSTEM_PROMPT
+from mvp.core.config import settings
+from mvp.core.hasher import ImageHasher
+from mvp.core.log import get_logger
+from mvp.core.state import state
+from mvp.schema.embedding import to_bytes
+from mvp.schema.models import PhotoProfile
+from mvp.storage.job_queue import JobQueue, job_queue
+from mvp.storage.attribute_store import sync_photo_attributes
+from mvp.storage.models import Job, StoredPhoto
+
+logger = get_logger(__name__)
+
+ANNOTATE_KIND = "annotate_photo"
+PROFILE_FIELDS = {"basic", "face", "hair", "extra", "vibe"}
+
+
+def _unprofiled_filter():
+    # JSON column is stored as text in SQLite; empty profiles are "{}" or "null"
+    return or_(StoredPhoto.profile.is_(None), cast(StoredPhoto.profile, String).in_(["{}", "null"]))
+
+
+def enqueue_collection_annotation(collection_id: UUID, priority: int = 0, queue: JobQueue = job_queue) -> int:
+    """Queue an annotate_photo job for every un-profiled photo without an active job. Returns jobs added."""
+    with Session(queue.engine) as session:
+        active = session.exec(
+            select(Job.payload)
+            .where(Job.kind == ANNOTATE_KIND, Job.collection_id == collection_id)
+            .where(Job.status.in_(["queued", "running"]))
+        ).all()
+        active_ids: Set[str] = {p.get("photo_id") for p in active if p}
+
+        photo_ids = session.exec(
+            select(StoredPhoto.id)
+            .where(StoredPhoto.collection_id == collection_id)
+            .where(_unprofiled_filter())
+        ).all()
+
+    payloads = [{"photo_id": str(pid)} for pid in photo_ids if str(pid) not in active_ids]
+    queue.enqueue_many(
+        ANNOTATE_KIND, payloads,
+        collection_id=collection_id,
+        priority=priority,
+        max_attempts=settings.jobs.max_attempts,
+    )
+    return len(payloads)
+
+
+def annotation_progress(collection_id: UUID, queue: JobQueue = job_queue, window_seconds: int = 60) -> Dict[str, Any]:
+    counts = queue.counts(ANNOTATE_KIND, collection_id)
+    recent = queue.completed_since(ANNOTATE_KIND, datetime.utcnow() - timedelta(seconds=window_seconds), collection_id)
+    throughput = recent / window_seconds
+    remaining = counts["queued"] + counts["running"]
+    total = sum(counts.values())
+
+    return {
+        "collection_id": str(collection_id),
+        **counts,
+        "total": total,
+        "progress": counts["done"] / total if total else 1.0,
+        "throughput_per_min": throughput * 60,
+        "eta_seconds": remaining / throughput if throughput > 0 else None,
+    }
+
+
+class AnnotationWorker:
+    """Leases annotate_photo jobs and processes up to `concurrency` of them at once."""
+
+    def __init__(
+        self,
+        queue: JobQueue = job_queue,
+        registry=None,
+        concurrency: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        shutdown_timeout: Optional[float] = None,
+    ):
+        if registry is None:
+            from mvp.providers.registry import registry
+        self.queue = queue
+        self.registry = registry
+        self.concurrency = concurrency or settings.jobs.annotation_concurrency
+        self.lease_seconds = lease_seconds or settings.jobs.lease_seconds
+        self.poll_interval = poll_interval or settings.jobs.poll_interval
+        self.shutdown_timeout = shutdown_timeout if shutdown_timeout is not None else settings.jobs.shutdown_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        tasks: Set[asyncio.Task] = set()
+        while not self._stopping.is_set():
+            free = self.concurrency - len(tasks)
+            jobs = []
+            if free > 0:
+                try:
+                    jobs = await asyncio.to_thread(self.queue.claim, ANNOTATE_KIND, self.owner, free, self.lease_seconds)
+                except Exception as e:
+                    logger.warning("annotation worker failed to claim jobs", extra={"error": str(e)})
+            for job in jobs:
+                tasks.add(asyncio.create_task(self.process(job)))
+
+            if not tasks:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, tasks = await asyncio.wait(tasks, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+
+        # In-flight jobs get shutdown_timeout to finish; leases of the rest expire and are picked up after restart
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def run_until_empty(self):
+        """Process jobs until none are runnable (used by scripts and tests)."""
+        while True:
+            jobs = await asyncio.to_thread(self.queue.claim, ANNOTATE_KIND, self.owner, self.concurrency, self.lease_seconds)
+            if not jobs:
+                return
+            await asyncio.gather(*(self.process(job) for job in jobs))
+
+    async def process(self, job: Job):
+        try:
+            photo_id = UUID(job.payload["photo_id"])
+            photo = await asyncio.to_thread(self._load_photo, photo_id)
+            if photo is None or photo.profile:
+                # Deleted or annotated elsewhere in the meantime
+                await asyncio.to_thread(self.queue.complete, job)
+                return
+
+            response = await self.registry.analyze_image(photo.image_path, SYSTEM_PROMPT)
+            profile = response.profile
+            if profile is None:
+                cleaned = response.raw_text.replace("```json", "").replace("```", "").strip()
+                profile = PhotoProfile(**json.loads(cleaned))
+
+            embedding = None
+            if state.embedder:
+                vector = await asyncio.to_thread(state.embedder.encode_image, photo.image_path)
+                embedding = to_bytes(vector, settings.embedding.storage_dtype)
+
+            phash = photo.phash
+            if not phash:
+                hash_value = await asyncio.to_thread(ImageHasher.compute_hash, photo.image_path)
+                phash = ImageHasher.hash_to_hex(hash_value) if hash_value is not None else None
+
+            profile_dict = profile.model_dump(mode="json", include=PROFILE_FIELDS)
+            await asyncio.to_thread(self._save_photo, photo_id, profile_dict, embedding, phash)
+            await asyncio.to_thread(self.queue.complete, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("annotation job failed", extra={"job_id": str(job.id), "attempt": job.attempts, "max_attempts": job.max_attempts, "error": str(e)})
+            await asyncio.to_thread(self.queue.fail, job, str(e))
+
+    def _load_photo(self, photo_id: UUID) -> Optional[StoredPhoto]:
+        with Session(self.queue.engine) as session:
+            return session.get(StoredPhoto, photo_id)
+
+    def _save_photo(self, photo_id: UUID, profile: Dict[str, Any], embedding: Optional[bytes], phash: Optional[str]):
+        with Session(self.queue.engine) as session:
+            photo = session.get(StoredPhoto, photo_id)
+            if photo is None:
+                return
+            photo.profile = profile
+            if embedding is not None:
+                photo.embedding = embedding
+                photo.embedding_dtype = settings.embedding.storage_dtype
+            photo.phash = phash
+            session.add(photo)
+            sync_photo_attributes(session, photo)
+            session.commit()
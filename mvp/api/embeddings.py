@@ -0,0 +1,45 @@
+"""
+Per-request embedding encoding for JSON responses (see mvp/schema/embedding.py).
+
+`?embeddings=base64` or `X-Embeddings: base64` returns each profile's vector as
+{"dtype", "base64"}; `list` returns floats; the default ("none") leaves them out.
+"""
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+
+from mvp.schema.embedding import embedding_format, parse_format
+
+HEADER = b"x-embeddings"
+QUERY = "embeddings"
+
+
+class EmbeddingFormatMiddleware:
+    """Pure ASGI, so the format (a contextvar) is visible where the endpoint serializes its response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _requested(scope):
+        for key, value in scope["headers"]:
+            if key == HEADER:
+                return value.decode("latin-1")
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(QUERY)
+        return values[0] if values else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        if requested is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            fmt = parse_format(requested)
+        except ValueError as e:
+            await JSONResponse({"detail": str(e)}, status_code=400)(scope, receive, send)
+            return
+        with embedding_format(fmt):
+            await self.app(scope, receive, send)
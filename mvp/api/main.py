@@ -8,23 +8,40 @@ logging.getLogger("transformers").setLevel(logging.ERROR)
 logging.getLogger("accelerate").setLevel(logging.ERROR)
 
 import json
+from uuid import UUID
 import asyncio
+import hashlib
 from typing import List, Optional
 from pathlib import Path
 from contextlib import asynccontextmanager
 
+import numpy as np
+
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 
+from mvp.schema.embedding import to_bytes
 from mvp.schema.models import PhotoProfile
 from mvp.annotator.client import VLMClient
 from mvp.annotator.prompts import SYSTEM_PROMPT
-from mvp.search.aggregator import ProfileAggregator
+from mvp.search.aggregator import ProfileAggregator, AggregationState
 from mvp.search.ranker import Ranker
+from mvp.search.vectorized import ProfileMatrix, SoftTarget, top_k
+from mvp.search.result_cache import result_cache
+from mvp.search.sharded import ShardedRanker
+from mvp.search.vector_index import VectorIndex, hybrid_rank, profile_embeddings, query_vector
+from mvp.search.streaming import stream_scores
+from mvp.core.config import settings
+from mvp.core.log import configure_logging, get_logger, shutdown_logging
+from mvp.core.metrics import metrics, stage
+from mvp.core.loop_monitor import loop_monitor
+from mvp.core.profiling import ProfilingMiddleware
+from mvp.api.embeddings import EmbeddingFormatMiddleware
 from mvp.core.embedder import ImageEmbedder
 from mvp.core.face_recognition import FaceVerifier
 
@@ -36,7 +53,11 @@ from mvp.core.state import state
 DATA_DIR = Path("data")
 METADATA_FILE = DATA_DIR / "wiki_1000_metadata.json"
 BLACKLIST_FILE = DATA_DIR / "blacklist_embeddings.json"
+SNAPSHOT_FILE = DATA_DIR / "wiki_1000_profiles.snap"
 IMAGES_DIR = DATA_DIR / "raw_1000"
+MEMORY_COLLECTION = "memory"  # Result-cache namespace for the in-memory profile database
+
+logger = get_logger(__name__)
 
 async def init_models():
     """Background initialization of heavy models."""
@@ -102,6 +123,7 @@ async def init_models():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    configure_logging()
     print("\n" + "="*50, flush=True)
     print("   SEARCH APPEARANCE API STARTING (UPDATED)", flush=True)
     print("="*50 + "\n", flush=True)
@@ -114,6 +136,7 @@ async def lifespan(app: FastAPI):
     from sqlmodel import Session, select
     from mvp.storage.database import engine, get_session
     from mvp.storage.models import PhotoCollection, StoredPhoto, SearchSession
+    from mvp.storage.bulk_import import bulk_import_photos, count_photos, profile_dict
     from uuid import UUID
     
     print("Loading database...")
@@ -130,100 +153,113 @@ async def lifespan(app: FastAPI):
     else:
         print("No blacklist file found.")
     
-    if METADATA_FILE.exists():
+    raw_data = None
+    snapshot_fresh = SNAPSHOT_FILE.exists() and (
+        not METADATA_FILE.exists() or SNAPSHOT_FILE.stat().st_mtime >= METADATA_FILE.stat().st_mtime
+    )
+    if snapshot_fresh:
+        # 1. Map the binary snapshot (for Image Search); profiles decode on first access
+        try:
+            from mvp.storage.snapshot import ProfileSnapshot
+            state.db_profiles = ProfileSnapshot(SNAPSHOT_FILE)
+            print(f"Mapped {len(state.db_profiles)} profiles from snapshot {SNAPSHOT_FILE}.")
+        except Exception as e:
+            print(f"Failed to open snapshot {SNAPSHOT_FILE}: {e}")
+            snapshot_fresh = False
+
+    if not snapshot_fresh and METADATA_FILE.exists():
         with open(METADATA_FILE, 'r', encoding='utf-8') as f:
             raw_data = json.load(f)
             
-            # 1. Load into Memory (for Image Search)
-            for item in raw_data:
-                try:
-                    p = PhotoProfile(**item)
-                    valid_profiles.append(p)
-                except Exception as e:
-                    print(f"Skipping profile {item.get('id', '?')}: {e}")
-            
-            state.db_profiles = valid_profiles
-            print(f"Loaded {len(state.db_profiles)} profiles into memory.")
+        # 1. Load into Memory (for Image Search)
+        for item in raw_data:
+            try:
+                p = PhotoProfile(**item)
+                valid_profiles.append(p)
+            except Exception as e:
+                print(f"Skipping profile {item.get('id', '?')}: {e}")
+        
+        state.db_profiles = valid_profiles
+        print(f"Loaded {len(state.db_profiles)} profiles into memory.")
+        print("Tip: run `python -m mvp.storage.snapshot build` for faster startup.")
+
+    if METADATA_FILE.exists():
+        # 2. Sync to SQL DB (for Text Search)
+        with engine.connect() as conn:
+            photo_count = count_photos(conn)
+        if photo_count == 0:
+            print("SQL Database is empty. Seeding from metadata...")
+            if raw_data is None:
+                with open(METADATA_FILE, 'r', encoding='utf-8') as f:
+                    raw_data = json.load(f)
             
-            # 2. Sync to SQL DB (for Text Search)
             with Session(engine) as session:
-                photo_count = session.exec(select(StoredPhoto)).all()
-                if len(photo_count) == 0:
-                    print("SQL Database is empty. Seeding from metadata...")
-                    
-                    # Create Collection
-                    col = PhotoCollection(
-                        user_id=UUID("00000000-0000-0000-0000-000000000000"),
-                        name="Wiki 1000",
-                        description="Auto-imported from metadata",
-                        photo_count=0
-                    )
-                    session.add(col)
-                    session.commit()
-                    session.refresh(col)
-                    
-                    count = 0
-                    for item in raw_data:
-                        # Construct StoredPhoto
-                        # fix path sep
-                        img_path = item.get("image_path", "").replace("\\", "/")
-                        
-                        # Only add if file exists? Or just trust metadata? 
-                        # User wants fallback "simply take from folder".
-                        # Let's trust metadata path but ensure filename is correct relative to our /images mount?
-                        # Actually text search route reads p.image_path.
-                        # Frontend expects /images/filename.
-                        # If we store absolute path, frontend gets absolute path which it can't load.
-                        # We should probably normalize existing profiles too if we can.
-                        # But for SQL, let's store absolute path as that's what backend uses to open file.
-                        
-                        # Fix UUID/ID
-                        try:
-                            # PhotoProfile might have 'id' as string, StoredPhoto uses uuid?
-                             # StoredPhoto model: id is UUID.
-                            p_id = item.get("id")
-                            if not p_id: continue
-                            
-                            # Prepare profile dict (excluding id/image_path)
-                            profile_dict = {
-                                "basic": item.get("basic"),
-                                "face": item.get("face"),
-                                "hair": item.get("hair"),
-                                "extra": item.get("extra"),
-                                "vibe": item.get("vibe")
-                            }
-                            
-                            photo = StoredPhoto(
-                                id=UUID(p_id),
-                                collection_id=col.id,
-                                image_path=img_path,
-                                profile=profile_dict
-                            )
-                            session.add(photo)
-                            count += 1
-                        except Exception as e:
-                            print(f"Failed to seed photo {item.get('id')}: {e}")
-                            
-                    col.photo_count = count
-                    session.add(col)
-                    session.commit()
-                    print(f"Seeded {count} photos into SQL Database.")
-                else:
-                    print(f"SQL Database has {len(photo_count)} photos. Skipping seed.")
+                # Create Collection
+                col = PhotoCollection(
+                    user_id=UUID("00000000-0000-0000-0000-000000000000"),
+                    name="Wiki 1000",
+                    description="Auto-imported from metadata",
+                    photo_count=0
+                )
+                session.add(col)
+                session.commit()
+                collection_id = col.id
+            
+            storage_dtype = settings.embedding.storage_dtype
+
+            def seed_rows():
+                for item in raw_data:
+                    if not item.get("id"):
+                        continue
+                    # Keep metadata ids (StoredPhoto.id is a UUID); fix path sep
+                    try:
+                        yield {
+                            "id": UUID(item["id"]),
+                            "image_path": item.get("image_path", "").replace("\\", "/"),
+                            "profile": profile_dict(item),
+                            "embedding": to_bytes(item.get("embedding"), storage_dtype),
+                            "embedding_dtype": storage_dtype if item.get("embedding") is not None else None,
+                        }
+                    except Exception as e:
+                        print(f"Failed to seed photo {item.get('id')}: {e}")
+            
+            stats = bulk_import_photos(engine, collection_id, seed_rows(), key="id", update_existing=False)
+            print(f"Seeded {stats.inserted} photos into SQL Database.")
+        else:
+            print(f"SQL Database has {photo_count} photos. Skipping seed.")
 
     else:
         print("WARNING: Metadata file not found. Database is empty.")
 
     # Init VLM Client
     try:
-        state.vlm_client = VLMClient()
-        print("VLM Client initialized.")
+        if settings.mock_vlm.enabled:
+            from mvp.providers.mock_provider import MockVLMClient
+            state.vlm_client = MockVLMClient()
+        else:
+            state.vlm_client = VLMClient()
+        print(f"VLM Client initialized ({state.vlm_client.model}).")
     except Exception as e:
         print(f"WARNING: VLM Client failed to init: {e}")
 
     # Start Heavy Init in Background
     asyncio.create_task(init_models())
 
+    # Resume/process queued annotation jobs
+    annotation_worker = annotation_task = None
+    if settings.get_enabled_providers():
+        from mvp.annotator.annotation_worker import AnnotationWorker
+        annotation_worker = AnnotationWorker()
+        annotation_task = asyncio.create_task(annotation_worker.run())
+        print("Annotation worker started.")
+
+    # Progress bus, so searches can reach sockets held by other workers
+    from mvp.api.websocket import manager
+    from mvp.api.progress_bus import make_bus
+    await manager.start(make_bus())
+
+    if settings.observability.loop_monitor:
+        loop_monitor.start()
 
     # API is accessible, but heavy models are loading
     print("✓ API started. Heavy models initializing in background...")
@@ -231,15 +267,35 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     state.ready = False
+    await loop_monitor.stop()
+    await manager.close()
+    if annotation_worker:
+        # Let in-flight jobs commit before the engines and pools below go away
+        annotation_worker.stop()
+        try:
+            await asyncio.wait_for(annotation_task, timeout=annotation_worker.shutdown_timeout + 5)
+        except asyncio.TimeoutError:
+            logger.warning("annotation worker did not stop in time")
+    from mvp.storage.archive_ingest import shutdown_process_pool
+    shutdown_process_pool()
+    if state.sharded_ranker:
+        state.sharded_ranker.close()
+    from mvp.search.kernel import shutdown_thread_pool
+    shutdown_thread_pool()
+    from mvp.storage.database import async_engine
+    await async_engine.dispose()
+    shutdown_logging()
 
 
 app = FastAPI(lifespan=lifespan)
-from mvp.api.routes.search import router as search_router
+from mvp.api.routes.search import router as search_router, result_preview, send_final_results
 from mvp.api.websocket import router as ws_router
 
 from mvp.api.routes.history import router as history_router
 from mvp.api.routes.batch import router as batch_router
 from mvp.api.routes.validate import router as validate_router
+from mvp.api.routes.weights import router as weights_router, resolve_request_weights
+from mvp.api.routes.profiles import router as profiles_router
 
 app.include_router(collections_router, prefix="/api")
 app.include_router(search_router, prefix="/api")
@@ -247,6 +303,15 @@ app.include_router(ws_router)
 app.include_router(history_router, prefix="/api")
 app.include_router(batch_router, prefix="/api")
 app.include_router(validate_router, prefix="/api")
+app.include_router(weights_router, prefix="/api")
+
+# Embeddings stay out of JSON responses unless a request asks (?embeddings=base64|list)
+app.add_middleware(EmbeddingFormatMiddleware)
+
+# Per-request profiling and its admin endpoints; not installed at all unless enabled
+if settings.observability.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiles_router, prefix="/api")
 
 # CORS
 app.add_middleware(
@@ -271,9 +336,11 @@ if DATA_DIR.exists():
 import time
 from datetime import datetime
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends
-from mvp.storage.database import get_session
+from mvp.storage.database import get_async_session
 from mvp.storage.models import SearchSession, PhotoCollection
+from mvp.storage.async_store import save_search_session
 from mvp.api.routes.collections import get_current_user_id
 from mvp.api.schemas import SearchResponse, SearchResult
 
@@ -287,6 +354,16 @@ def health():
         "db_size": len(state.db_profiles)
     }
 
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint: stage timings, cache and provider counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/blocking")
+def get_blocking_calls():
+    """Event-loop lag and recent blocking callbacks with their stacks (OBS_LOOP_MONITOR=true)."""
+    return loop_monitor.snapshot()
+
 async def analyze_upload(file: UploadFile, session_embeddings: List, session_face_embeddings: List = []) -> PhotoProfile:
     """
     Process a single upload: save, embed, check duplicates (CLIP + Face), analyze (VLM).
@@ -295,82 +372,96 @@ async def analyze_upload(file: UploadFile, session_embeddings: List, session_fac
     safe_filename = "".join([c for c in file.filename if c.isalnum() or c in "._-"])
     temp_path = DATA_DIR / f"temp_{safe_filename}"
     
-    with open(temp_path, "wb") as f:
+    with stage("decode"):
         content = await file.read()
-        f.write(content)
-        print(f"DEBUG: START PROCESSING {file.filename} (Size: {len(content)} bytes)", flush=True)
+        with open(temp_path, "wb") as f:
+            f.write(content)
+    logger.debug("processing upload", extra={"upload": file.filename, "bytes": len(content)})
         
     try:
         # 1. Calculate Embedding & Check Duplicates (Fast/Cheap)
-        embedding: Optional[List[float]] = None
+        embedding: Optional[np.ndarray] = None
         if state.embedder:
-            embedding = state.embedder.encode_image(str(temp_path))
+            with stage("clip_embed"):
+                embedding = state.embedder.encode_image(str(temp_path))
             
-            if embedding:
-                # Check Blacklist
-                if state.blacklist_embeddings:
-                     for bl_emb in state.blacklist_embeddings:
-                         sim = state.embedder.cosine_similarity(embedding, bl_emb)
-                         if sim > 0.85: # Strong strict check for blocked people
-                             print(f"Blocked person detected: {file.filename} (similarity: {sim:.4f})")
-                             raise HTTPException(status_code=400, detail="This photo contains a restricted individual and cannot be used.")
-
-                # Check Session Duplicates
-                print(f"DEBUG: Checking {file.filename} against {len(session_embeddings)} existing session items.", flush=True)
-                for existing_id, existing_emb in session_embeddings:
-                    sim = state.embedder.cosine_similarity(embedding, existing_emb)
-
-                    if sim > 0.85: # Strengthened from 0.9 to 0.85 for stricter duplicate/same-person check
-                        print(f"Duplicate/Same person detected: {file.filename} is similar to {existing_id} (similarity: {sim:.4f})")
-                        raise HTTPException(status_code=400, detail=f"Duplicate or same person detected (similarity: {sim:.2f}). Please upload unique photos of different people/angles.")
+            if embedding is not None:
+                # Rejections are raised after the timed block: they are results, not dedup failures
+                rejection: Optional[str] = None
+                with stage("dedup"):
+                    # Check Blacklist
+                    for bl_emb in state.blacklist_embeddings or []:
+                        sim = state.embedder.cosine_similarity(embedding, bl_emb)
+                        if sim > 0.85: # Strong strict check for blocked people
+                            logger.info("blocked person detected", extra={"upload": file.filename, "similarity": round(sim, 4)})
+                            rejection = "This photo contains a restricted individual and cannot be used."
+                            break
+
+                    # Check Session Duplicates
+                    if rejection is None:
+                        logger.debug("checking session duplicates", extra={"upload": file.filename, "session_items": len(session_embeddings)})
+                        for existing_id, existing_emb in session_embeddings:
+                            sim = state.embedder.cosine_similarity(embedding, existing_emb)
+
+                            if sim > 0.85: # Strengthened from 0.9 to 0.85 for stricter duplicate/same-person check
+                                logger.info("duplicate upload", extra={"upload": file.filename, "duplicate_of": existing_id, "similarity": round(sim, 4)})
+                                rejection = f"Duplicate or same person detected (similarity: {sim:.2f}). Please upload unique photos of different people/angles."
+                                break
+                if rejection is not None:
+                    raise HTTPException(status_code=400, detail=rejection)
 
         # 1b. Check Face Identity (Strict same-person check)
         face_embedding: Optional[List[float]] = None
         if state.face_verifier and not state.face_verifier.disabled:
-             print(f"DEBUG: Checking face identity for {file.filename}...", flush=True)
-             face_embedding = state.face_verifier.get_face_embedding(str(temp_path))
+             with stage("face_embed"):
+                 face_embedding = state.face_verifier.get_face_embedding(str(temp_path))
              
              if face_embedding is not None:
-                 print(f"DEBUG: Face detected in {file.filename}. Checking against {len(session_face_embeddings)} faces.", flush=True)
-                 for existing_id, existing_face_emb in session_face_embeddings:
-                     is_match, dist = state.face_verifier.is_match(face_embedding, existing_face_emb, threshold=0.6)
-
-                     
-                     if is_match:
-                          print(f"Duplicate Face detected: {file.filename} matches {existing_id} (dist: {dist:.4f})")
-                          raise HTTPException(status_code=400, detail=f"Same person detected (Face Match). Please upload photos of different people.")
+                 logger.debug("face detected", extra={"upload": file.filename, "session_faces": len(session_face_embeddings)})
+                 same_person = False
+                 with stage("dedup"):
+                     for existing_id, existing_face_emb in session_face_embeddings:
+                         is_match, dist = state.face_verifier.is_match(face_embedding, existing_face_emb, threshold=0.6)
+                         if is_match:
+                              logger.info("duplicate face", extra={"upload": file.filename, "duplicate_of": existing_id, "distance": round(float(dist), 4)})
+                              same_person = True
+                              break
+                 if same_person:
+                     raise HTTPException(status_code=400, detail=f"Same person detected (Face Match). Please upload photos of different people.")
              else:
-                 print(f"DEBUG: No face detected in {file.filename} (or detection failed).", flush=True)
+                 logger.debug("no face detected", extra={"upload": file.filename})
 
         # 2. VLM Analysis (Slow/Expensive)
-        print(f"Analyzing {file.filename}...", flush=True)
-        json_str = state.vlm_client.analyze_image(str(temp_path), SYSTEM_PROMPT)
-        
-        # Clean
-        json_str = json_str.replace("```json", "").replace("```", "").strip()
-        data = json.loads(json_str)
-        
-        # Add ID/Path
-        data["id"] = f"upload_{safe_filename}"
+        logger.info("analyzing upload", extra={"upload": file.filename})
+        with stage("vlm"):
+            json_str = state.vlm_client.analyze_image(str(temp_path), SYSTEM_PROMPT)
         
-        filename = temp_path.name
-        data["image_path"] = f"/temp_images/{filename}"
-        data["embedding"] = embedding
+        with stage("profile_validate"):
+            # Clean
+            json_str = json_str.replace("```json", "").replace("```", "").strip()
+            data = json.loads(json_str)
+            
+            # Add ID/Path
+            data["id"] = f"upload_{safe_filename}"
+            
+            filename = temp_path.name
+            data["image_path"] = f"/temp_images/{filename}"
+            data["embedding"] = embedding
+            profile = PhotoProfile(**data)
         
         # Add to session (for this run)
-        if embedding:
-            session_embeddings.append((data["id"], embedding))
+        if embedding is not None:
+            session_embeddings.append((data["id"], profile.embedding))
         
         if face_embedding is not None:
              session_face_embeddings.append((data["id"], face_embedding))
         
-        print(f"DEBUG: Analyzed {file.filename} -> image_path set to: {data['image_path']}", flush=True)
-        
-        return PhotoProfile(**data)
+        logger.debug("upload analyzed", extra={"upload": file.filename, "image_path": data["image_path"]})
+        return profile
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Analysis failed for {file.filename}: {e}", flush=True)
+        logger.warning("upload analysis failed", extra={"upload": file.filename, "error": str(e)})
         # In a real app we might return an error or a dummy profile
         raise HTTPException(status_code=500, detail=f"VLM Analysis Failed: {e}")
     finally:
@@ -382,9 +473,24 @@ async def search(
     positives: List[UploadFile] = File(...),
     negatives: List[UploadFile] = File(default=[]),
     session_id: Optional[str] = Form(None),
-    db_session: Session = Depends(get_session)
+    importance_weights: Optional[str] = Form(None),  # JSON object, e.g. {"hair.color": 4.0}
+    weight_profile_id: Optional[UUID] = Form(None),
+    mode: Optional[str] = Form(None),  # "attributes" or "hybrid"; default SEARCH_SEARCH_MODE
+    db_session: AsyncSession = Depends(get_async_session)
 ):
     from mvp.api.websocket import manager
+
+    mode = mode or settings.search.search_mode
+    if mode not in ("attributes", "hybrid"):
+        raise HTTPException(status_code=400, detail=f"Unknown search mode: {mode}")
+
+    try:
+        overrides = json.loads(importance_weights) if importance_weights else {}
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="importance_weights must be a JSON object")
+    if not isinstance(overrides, dict):
+        raise HTTPException(status_code=400, detail="importance_weights must be a JSON object")
+    weights = await resolve_request_weights(db_session, overrides, weight_profile_id, session_id)
     
     # Load VLM Client
     if not state.vlm_client:
@@ -408,16 +514,38 @@ async def search(
     total_files = len(positives) + len(negatives)
     processed_count = 0
 
+    if not state.aggregator:
+         state.aggregator = ProfileAggregator()
+    # Refinement: examples already analyzed in this session are reused, only new uploads hit the VLM
+    refine = state.aggregator.session_state(session_id) if session_id else AggregationState()
+    request_keys = set()
+
+    async def analyze_cached(f: UploadFile, role: str) -> PhotoProfile:
+        content = await f.read()
+        await f.seek(0)
+        key = (role, hashlib.sha1(content).hexdigest())
+        if key in refine and key not in request_keys:
+            p = refine.profiles[key]
+            if p.embedding is not None:
+                local_session_embeddings.append((p.id, p.embedding))
+        else:
+            p = await analyze_upload(f, local_session_embeddings, local_face_embeddings)
+            if role == "pos":
+                refine.add_positive(p, key)
+            else:
+                refine.add_negative(p, key)
+        request_keys.add(key)
+        return p
+
     analyzed_pos = []
     for f in positives:
         try:
-             # Rewind file if needed? UploadFile is workable.
-             p = await analyze_upload(f, local_session_embeddings, local_face_embeddings)
+             p = await analyze_cached(f, "pos")
              analyzed_pos.append(p)
         except HTTPException: # Explicitly catch and re-raise validation errors
              raise
         except Exception as e:
-             print(f"Error analyzing {f.filename}: {e}")
+             logger.warning("upload skipped", extra={"upload": f.filename, "error": str(e)})
         
         processed_count += 1
         if session_id:
@@ -427,12 +555,12 @@ async def search(
     for f in negatives:
         if f.size > 0: # Check if empty file passed
              try:
-                 p = await analyze_upload(f, local_session_embeddings, local_face_embeddings)
+                 p = await analyze_cached(f, "neg")
                  analyzed_neg.append(p)
              except HTTPException: # Explicitly catch and re-raise validation errors
                  raise
              except Exception as e:
-                 print(f"Error analyzing {f.filename}: {e}")
+                 logger.warning("upload skipped", extra={"upload": f.filename, "error": str(e)})
              
              processed_count += 1
              if session_id:
@@ -442,33 +570,74 @@ async def search(
         await manager.send_update(session_id, {"stage": "analyzing", "progress": 1.0, "status": "completed"})
         await manager.send_update(session_id, {"stage": "ranking", "progress": 0.0, "message": "Ranking profiles..."})
 
-    # 2. Build Target
-    if not state.aggregator:
-         state.aggregator = ProfileAggregator()
-    target = state.aggregator.build_target_profile(analyzed_pos, analyzed_neg)
-    
-    # 3. Score Database
-    scored_results = []
-    # No need to aggregated negatives again as target is already adjusted
+    # 2. Build Target (examples dropped since the last request leave the tallies)
+    for key in [k for k in refine.items if k not in request_keys]:
+        refine.remove(key)
+    target = refine.target_profile()
     
+    # 3. Score Database: soft target (vote distributions, positives and negatives) in one vectorized pass
     if not state.ranker:
          # Fallback
          state.ranker = Ranker()
     
-    candidate_count = len(state.db_profiles)
-    for i, candidate in enumerate(state.db_profiles):
-        score = state.ranker.score_candidate(target, candidate)
-        scored_results.append((candidate, score))
-        
-        if session_id and i % 50 == 0 and candidate_count > 0:
-             await manager.send_update(session_id, {"stage": "ranking", "progress": (i / candidate_count)})
+    if state.db_matrix is None or state.db_matrix.profiles is not state.db_profiles:
+        state.db_matrix = ProfileMatrix.from_profiles(state.db_profiles)
+        result_cache.bump(MEMORY_COLLECTION)
+        if settings.search.shard_count > 1 and len(state.db_matrix) >= settings.search.shard_min_candidates:
+            if state.sharded_ranker is None:
+                state.sharded_ranker = ShardedRanker()
+            state.sharded_ranker.load(state.db_matrix)
+        state.vector_index = None
+    # This request ranks against one matrix even if an upload swaps the database while it awaits
+    matrix, index = state.db_matrix, state.vector_index
+    soft_target = SoftTarget.from_state(refine)
+
+    # Hybrid: CLIP prefilter on the mean example embedding, then attribute re-rank
+    query = None
+    if mode == "hybrid":
+        query = query_vector([p.embedding for p in analyzed_pos if p.embedding is not None],
+                             [p.embedding for p in analyzed_neg if p.embedding is not None])
+        if query is not None and index is None:
+            embeddings = profile_embeddings(matrix.profiles)
+            if embeddings is not None:
+                index = await asyncio.to_thread(VectorIndex, embeddings)
+                if state.db_matrix is matrix:  # Not rebuilt meanwhile: the index is still current
+                    state.vector_index = index
+        if query is None or index is None or query.shape[0] != index.dim:
+            logger.info("hybrid search unavailable (no example or database embeddings), ranking by attributes")
+            query = None
+
+    extra = {"mode": "hybrid", "query": hashlib.sha1(query.tobytes()).hexdigest()} if query is not None else {}
+    cache_key = result_cache.key(soft_target, MEMORY_COLLECTION, weights=weights, **extra)
+    ranking = result_cache.get(cache_key)
+    if ranking is None:
+        with stage("rank"):
+            if query is not None:
+                ranking = await asyncio.to_thread(
+                    hybrid_rank, state.ranker, soft_target, matrix, index, query, weights, result_cache.top_n
+                )
+            elif state.sharded_ranker is not None and state.sharded_ranker.matrix is matrix:
+                # Very large databases: each worker scores its shard, only the local top-k come back
+                ranking = await state.sharded_ranker.score_top_k_async(soft_target, weights, result_cache.top_n)
+            elif manager.is_connected(session_id):
+                # Stream the running top-5 while the database is scored
+                async def preview(snapshot, progress: float):
+                    await manager.send_update(session_id, {
+                        "stage": "partial_results", "progress": progress, "final": False,
+                        "results": [result_preview(matrix.profiles[i].id, matrix.profiles[i].image_path, score) for i, score in snapshot],
+                    })
+                scores = await stream_scores(soft_target.compile(weights), matrix, 5, preview)
+                ranking = [(i, float(scores[i])) for i in top_k(scores, result_cache.top_n)]
+            else:
+                scores = await asyncio.to_thread(state.ranker.score_collection, soft_target, matrix, weights)
+                ranking = [(i, float(scores[i])) for i in top_k(scores, result_cache.top_n)]
+        result_cache.put(cache_key, MEMORY_COLLECTION, ranking)
         
     if session_id:
         await manager.send_update(session_id, {"stage": "ranking", "progress": 1.0, "status": "completed"})
 
     # 4. Sort and Cull
-    scored_results.sort(key=lambda x: x[1], reverse=True)
-    top_5 = scored_results[:5]
+    top_5 = [(matrix.profiles[i], score) for i, score in ranking[:5]]
     
     # Format results
     # We need to ensure the profile image_path is converted to a serve-able URL
@@ -482,9 +651,6 @@ async def search(
         raw_path = str(p_copy.image_path)
         filename = raw_path.replace("\\", "/").split("/")[-1]
         
-        # Debugging
-        print(f"DEBUG: Processing path '{raw_path}' -> filename '{filename}'", flush=True)
-        
         # Set to URL
         p_copy.image_path = f"/images/{filename}"
         formatted_results.append(SearchResult(profile=p_copy, score=score))
@@ -492,39 +658,34 @@ async def search(
     execution_time = time.time() - start_time
     
     if session_id:
+        await send_final_results(session_id, formatted_results)
         await manager.send_update(session_id, {"stage": "completed", "progress": 1.0, "results_count": len(formatted_results)})
 
     # NEW: Save History
     try:
-        user_id = UUID(get_current_user_id())
+        with stage("history_write"):
+            user_id = UUID(get_current_user_id())
         
-        # Determine collection (default to first one)
-        col = db_session.exec(select(PhotoCollection).where(PhotoCollection.user_id == user_id)).first()
+            # Determine collection (default to first one)
+            col = (await db_session.exec(select(PhotoCollection).where(PhotoCollection.user_id == user_id))).first()
         
-        if col and session_id:
-             # Ensure session ID is valid UUID
-             try:
-                 sess_uuid = UUID(session_id)
-                 
-                 # Check if exists (should not, but safe check)
-                 existing = db_session.get(SearchSession, sess_uuid)
-                 if not existing:
-                     new_session = SearchSession(
-                         id=sess_uuid,
+            if col and session_id:
+                 # Ensure session ID is valid UUID
+                 try:
+                     # Skipped if the session id already exists (should not, but safe check)
+                     await save_search_session(
+                         db_session,
+                         session_id=UUID(session_id),
                          user_id=user_id,
                          collection_id=col.id,
                          positives=[p.filename for p in positives],
                          negatives=[n.filename for n in negatives],
-                         started_at=datetime.utcnow(), # Approximate start
-                         completed_at=datetime.utcnow(),
                          results=[{"id": str(r.profile.id), "score": r.score} for r in formatted_results]
                      )
-                     db_session.add(new_session)
-                     db_session.commit()
-             except ValueError:
-                 print(f"Invalid session ID format: {session_id}")
+                 except ValueError:
+                     logger.warning("invalid session id", extra={"session_id": session_id})
     except Exception as e:
-        print(f"Failed to save history: {e}")
+        logger.error("failed to save history", extra={"error": str(e)})
 
     return SearchResponse(
         results=formatted_results,
@@ -536,4 +697,10 @@ async def search(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("mvp.api.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "mvp.api.main:app",
+        host=settings.api.host,
+        port=settings.api.port,
+        workers=settings.api.workers,  # Also selects the progress bus (API_PROGRESS_BUS=auto)
+        reload=settings.api.reload and settings.api.workers <= 1,  # uvicorn cannot reload with several workers
+    )
@@ -0,0 +1,230 @@
+"""
+Progress bus: carries search progress from the worker running a search to the
+workers holding that session's WebSockets.
+
+- LocalBus: one process, updates go straight to the local sockets.
+- UnixSocketBus: several uvicorn workers on one host. The first worker to bind
+  the Unix socket becomes the broker, the others connect to it. Each worker
+  tells the broker which sessions it holds sockets for; the broker forwards an
+  update only to those workers and keeps everyone's view of the watched sessions
+  current (so is_connected works across workers). If the broker's worker exits,
+  the others race to take its place. Updates are best effort: one published
+  while a worker is reconnecting only reaches local sockets.
+
+Messages are newline-delimited JSON:
+  {"op": "sub" | "unsub", "session_id": ...}      worker -> broker
+  {"op": "pub", "session_id": ..., "data": {...}}  both ways
+  {"op": "sessions", "sessions": [...]}            broker -> workers
+"""
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from mvp.core.config import settings
+
+Deliver = Callable[[str, dict], Awaitable[None]]
+
+RECONNECT_DELAY = 0.2
+LINE_LIMIT = 1 << 22  # Final results can be tens of KB
+
+
+class ProgressBus:
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None  # Hands an update to this worker's sockets
+        self.local_sessions: Set[str] = set()
+        self.remote_sessions: Set[str] = set()
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def publish(self, session_id: str, data: dict):
+        await self.deliver(session_id, data)
+
+    def subscribe(self, session_id: str):
+        self.local_sessions.add(session_id)
+
+    def unsubscribe(self, session_id: str):
+        self.local_sessions.discard(session_id)
+
+    async def close(self):
+        pass
+
+
+class LocalBus(ProgressBus):
+    """Single process: nothing to carry."""
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, default=str).encode() + b"\n"
+
+
+class UnixSocketBus(ProgressBus):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.is_broker = False
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._lock_fd: Optional[int] = None
+        self._writer: Optional[asyncio.StreamWriter] = None  # Connection to the broker
+        self._peers: Dict[asyncio.StreamWriter, Set[str]] = {}  # Broker: sessions per worker
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+        await self._connected.wait()
+
+    async def publish(self, session_id: str, data: dict):
+        if session_id in self.local_sessions:
+            await self.deliver(session_id, data)
+        message = {"op": "pub", "session_id": session_id, "data": data}
+        if self.is_broker:
+            self._route(message, origin=None)
+        elif self._writer is not None and session_id in self.remote_sessions:
+            self._send(self._writer, message)
+
+    def subscribe(self, session_id: str):
+        super().subscribe(session_id)
+        self._announce("sub", session_id)
+
+    def unsubscribe(self, session_id: str):
+        super().unsubscribe(session_id)
+        self._announce("unsub", session_id)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        if self._writer:
+            self._writer.close()
+        for writer in list(self._peers):
+            writer.close()
+        if self._server:
+            self._server.close()
+            self.is_broker = False
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    # --- Worker side ---
+
+    def _announce(self, op: str, session_id: str):
+        if self.is_broker:
+            self._broadcast_sessions()
+        elif self._writer is not None:
+            self._send(self._writer, {"op": op, "session_id": session_id})
+
+    async def _run(self):
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if await self._become_broker():
+                    return
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            for session_id in self.local_sessions:
+                self._send(self._writer, {"op": "sub", "session_id": session_id})
+            self._connected.set()
+            try:
+                while line := await reader.readline():
+                    await self._on_message(json.loads(line))
+            except (ConnectionError, ValueError) as e:
+                print(f"Progress bus connection lost: {e}")
+            self._writer.close()
+            self._writer = None
+            self.remote_sessions = set()
+
+    async def _on_message(self, message: dict):
+        if message["op"] == "pub":
+            await self.deliver(message["session_id"], message["data"])
+        elif message["op"] == "sessions":
+            self.remote_sessions = set(message["sessions"])
+
+    @staticmethod
+    def _send(writer: asyncio.StreamWriter, message: dict):
+        # No drain(): peers are local workers that read continuously, and a
+        # publisher must never wait on another process
+        if not writer.is_closing():
+            writer.write(_encode(message))
+
+    # --- Broker side ---
+
+    async def _become_broker(self) -> bool:
+        # The broker holds an exclusive lock for as long as its process lives, so
+        # only one worker can replace a socket file left behind by a dead broker
+        import fcntl  # POSIX only; imported here so the module (and LocalBus) still loads on Windows
+
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False  # Another worker is (becoming) the broker
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._lock_fd = fd
+        self._server = await asyncio.start_unix_server(self._serve_peer, path=self.path, limit=LINE_LIMIT)
+        self.is_broker = True
+        print(f"Progress bus broker listening on {self.path}")
+        self._broadcast_sessions()
+        self._connected.set()
+        return True
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers[writer] = set()
+        self._send(writer, {"op": "sessions", "sessions": sorted(self._watched())})
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                if message["op"] == "sub":
+                    self._peers[writer].add(message["session_id"])
+                    self._broadcast_sessions()
+                elif message["op"] == "unsub":
+                    self._peers[writer].discard(message["session_id"])
+                    self._broadcast_sessions()
+                elif message["op"] == "pub":
+                    if message["session_id"] in self.local_sessions:
+                        await self.deliver(message["session_id"], message["data"])
+                    self._route(message, origin=writer)
+        except (ConnectionError, ValueError) as e:
+            print(f"Progress bus peer lost: {e}")
+        finally:
+            self._peers.pop(writer, None)
+            writer.close()
+            self._broadcast_sessions()
+
+    def _watched(self) -> Set[str]:
+        return set(self.local_sessions).union(*self._peers.values())
+
+    def _route(self, message: dict, origin: Optional[asyncio.StreamWriter]):
+        for writer, sessions in self._peers.items():
+            if writer is not origin and message["session_id"] in sessions:
+                self._send(writer, message)
+
+    def _broadcast_sessions(self):
+        self.remote_sessions = set().union(*self._peers.values())
+        message = {"op": "sessions", "sessions": sorted(self._watched())}
+        for writer in self._peers:
+            self._send(writer, message)
+
+
+def make_bus(kind: Optional[str] = None) -> ProgressBus:
+    """
+    Bus from API_PROGRESS_BUS: "local", "unix", or "auto" (unix when API_WORKERS > 1,
+    except on Windows). Workers started by an external `uvicorn --workers N` cannot be
+    detected: set API_WORKERS=N or API_PROGRESS_BUS=unix for them.
+    """
+    cfg = settings.api
+    kind = kind or cfg.progress_bus
+    if kind == "auto":
+        kind = "unix" if cfg.workers > 1 and os.name != "nt" else "local"
+    if kind == "local":
+        return LocalBus()
+    if kind == "unix":
+        return UnixSocketBus(cfg.progress_bus_path)
+    raise ValueError(f"Unknown progress bus: {kind}")
@@ -1,18 +1,20 @@
-import zipfile
+import asyncio
 import shutil
-import os
 import csv
 import io
 import json
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, Depends, HTTPException, Response
+from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, Depends, HTTPException, Response
 from sqlmodel import Session, select
 from mvp.storage.database import get_session
 from mvp.storage.models import StoredPhoto, PhotoCollection
-
-from mvp.core.hasher import ImageHasher
+from mvp.schema.embedding import current_format, encode_json, to_array
+from mvp.storage.archive_ingest import IngestJob, ingest_jobs, run_archive_ingest
+from mvp.storage.job_queue import job_queue
+from mvp.annotator.annotation_worker import ANNOTATE_KIND, enqueue_collection_annotation, annotation_progress
+from mvp.api.websocket import manager
 
 router = APIRouter(prefix="/collections", tags=["batch"])
 
@@ -21,94 +23,64 @@ async def upload_archive(
     collection_id: UUID, 
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...), 
+    session_id: Optional[str] = Form(None),
     session: Session = Depends(get_session)
 ):
     if not file.filename.endswith(".zip"):
         raise HTTPException(status_code=400, detail="Only .zip files are supported")
-        
-    # Save zip temporarily
-    temp_zip = Path(f"data/temp_{file.filename}")
-    with open(temp_zip, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-        
-    # Extract to a temp folder
-    extract_dir = Path(f"data/extract_{file.filename}")
-    extract_dir.mkdir(exist_ok=True, parents=True)
     
-    try:
-        with zipfile.ZipFile(temp_zip, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-            
-        # Find images
-        image_extensions = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
-        image_files = []
-        for root, dirs, files in os.walk(extract_dir):
-            for f in files:
-                if Path(f).suffix.lower() in image_extensions:
-                    image_files.append(Path(root) / f)
+    if not session.get(PhotoCollection, collection_id):
+        raise HTTPException(status_code=404, detail="Collection not found")
         
-        count = 0
-        dest_dir = Path(f"data/uploads/{collection_id}")
-        dest_dir.mkdir(parents=True, exist_ok=True)
-        
-        for img_path in image_files:
-            # Compute Hash for deduplication
-            phash = ImageHasher.compute_phash(str(img_path))
-            
-            if phash:
-                existing = session.exec(select(StoredPhoto).where(StoredPhoto.collection_id == collection_id).where(StoredPhoto.phash == phash)).first()
-                if existing:
-                    print(f"Skipping duplicate: {img_path.name}")
-                    continue
+    job = IngestJob(collection_id=collection_id, filename=file.filename)
+    
+    # Spool zip to disk off the event loop; members are streamed from it by the job
+    temp_zip = Path(f"data/temp_{job.id}.zip")
+    def _spool():
+        with open(temp_zip, "wb") as f:
+            shutil.copyfileobj(file.file, f, length=1024 * 1024)
+    await asyncio.to_thread(_spool)
+    
+    ingest_jobs[job.id] = job
+    background_tasks.add_task(run_archive_ingest, job, temp_zip, manager.send_update, session_id or job.id)
+    
+    return {"job_id": job.id, "status": job.status, "message": "Archive queued for ingestion."}
 
-            # Move to persistent storage
-            # Ensure unique filename
-            dest_path = dest_dir / img_path.name
-            if dest_path.exists():
-                stem = dest_path.stem
-                suffix = dest_path.suffix
-                dest_path = dest_dir / f"{stem}_{count}{suffix}"
+@router.get("/{collection_id}/upload_jobs/{job_id}", response_model=IngestJob)
+def get_upload_job(collection_id: UUID, job_id: str):
+    job = ingest_jobs.get(job_id)
+    if not job or job.collection_id != collection_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-            shutil.move(str(img_path), str(dest_path))
-            
-            # Create DB entry
-            photo = StoredPhoto(
-                collection_id=collection_id,
-                image_path=str(dest_path),
-                profile={}, # Empty profile, needs analysis later
-                phash=phash
-            )
-            session.add(photo)
-            count += 1
+@router.post("/{collection_id}/annotate")
+async def annotate_collection(collection_id: UUID, priority: int = 0, session: Session = Depends(get_session)):
+    """Queue VLM annotation for every photo in the collection that has no profile yet."""
+    if not session.get(PhotoCollection, collection_id):
+        raise HTTPException(status_code=404, detail="Collection not found")
+    queued = await asyncio.to_thread(enqueue_collection_annotation, collection_id, priority)
+    return {"queued": queued, **annotation_progress(collection_id)}
 
-            
-        # Update collection count
-        collection = session.get(PhotoCollection, collection_id)
-        if collection:
-            collection.photo_count += count
-            session.add(collection)
-            
-        session.commit()
-        
-        return {"processed": count, "message": "Photos uploaded. Analysis required."}
-        
-    except zipfile.BadZipFile:
-        raise HTTPException(status_code=400, detail="Invalid zip file")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
-    finally:
-        # Cleanup
-        if temp_zip.exists():
-            os.remove(temp_zip)
-        if extract_dir.exists():
-            shutil.rmtree(extract_dir)
+@router.post("/{collection_id}/annotate/retry")
+async def retry_annotation(collection_id: UUID):
+    requeued = await asyncio.to_thread(job_queue.retry_failed, ANNOTATE_KIND, collection_id)
+    return {"requeued": requeued}
+
+@router.get("/{collection_id}/annotation")
+async def get_annotation_progress(collection_id: UUID):
+    return await asyncio.to_thread(annotation_progress, collection_id)
 
 @router.get("/{collection_id}/export/json")
 def export_json(collection_id: UUID, session: Session = Depends(get_session)):
     stmt = select(StoredPhoto).where(StoredPhoto.collection_id == collection_id)
     photos = session.exec(stmt).all()
     
-    data = [p.dict() for p in photos]
+    # Raw embedding bytes are not JSON; they follow the request's ?embeddings= format
+    data = []
+    for p in photos:
+        row = p.model_dump(exclude={"embedding", "embedding_dtype"})
+        row["embedding"] = encode_json(to_array(p.embedding, p.embedding_dtype), current_format())
+        data.append(row)
     return data
 
 @router.get("/{collection_id}/export/csv")
@@ -4,6 +4,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 from ...storage.database import get_session
 from ...storage.models import PhotoCollection, StoredPhoto, User as UserModel
+from ...core.hash_index import hash_indexes
+from ...search.result_cache import result_cache
+from ...core.hasher import ImageHasher
+from ...storage.attribute_store import sync_photo_attributes
 
 router = APIRouter(prefix="/collections", tags=["collections"])
 
@@ -55,12 +59,18 @@ def add_photo(collection_id: UUID, photo: StoredPhoto, session: Session = Depend
     
     photo.collection_id = collection_id
     session.add(photo)
+    session.flush()
+    sync_photo_attributes(session, photo)
     
     collection.photo_count += 1
     session.add(collection)
     
     session.commit()
     session.refresh(photo)
+    
+    hash_value = ImageHasher.hex_to_hash(photo.phash)
+    if hash_value is not None:
+        hash_indexes.add(collection_id, hash_value, photo.id)
     return photo
 
 @router.get("/{collection_id}/stats")
@@ -77,4 +87,6 @@ def delete_collection(collection_id: UUID, session: Session = Depends(get_sessio
         raise HTTPException(status_code=404, detail="Collection not found")
     session.delete(collection)
     session.commit()
+    hash_indexes.invalidate(collection_id)
+    result_cache.bump(collection_id)
     return {"ok": True}
@@ -0,0 +1,23 @@
+from typing import Dict
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from mvp.core.config import settings
+from mvp.core.profiling import list_profiles, profile_file
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin"])
+
+@router.get("")
+def get_profiles() -> Dict[str, object]:
+    """Saved request profiles, newest first (send a search with `X-Profile: 1` to record one)."""
+    return {"enabled": settings.observability.profiling_enabled, "profiles": list_profiles()}
+
+@router.get("/{name}")
+def get_profile_file(name: str):
+    """One profile file: <id>.speedscope.json or <id>.collapsed.txt."""
+    path = profile_file(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if name.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=name)
@@ -1,15 +1,19 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Body
 from pydantic import BaseModel
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import asyncio
 import json
+import numpy as np
 import time
 import os
 
-from mvp.storage.database import get_session
+from mvp.storage.database import get_async_session
 from mvp.storage.models import StoredPhoto, SearchSession
+from mvp.storage.attribute_store import load_embeddings_async, load_profiles_async, load_profiles_by_ids_async
+from mvp.storage.async_store import save_search_session
 from mvp.schema.models import PhotoProfile
 from mvp.text_search.prompt_parser import PromptParser
 from mvp.api.routes.collections import get_current_user_id
@@ -17,6 +21,14 @@ from datetime import datetime
 from mvp.api.websocket import manager
 from mvp.core.state import state
 from mvp.api.schemas import SearchResponse, SearchResult
+from mvp.search.result_cache import result_cache
+from mvp.search.vector_index import VectorIndex, fuse_scores, vector_indexes
+from mvp.search.vectorized import ProfileMatrix, SoftTarget
+from mvp.search.streaming import stream_scores
+from mvp.core.config import settings
+from mvp.core.log import get_logger
+from mvp.core.metrics import stage
+from mvp.api.routes.weights import resolve_request_weights
 
 router = APIRouter(prefix="/search", tags=["search"])
 
@@ -24,15 +36,239 @@ class TextSearchRequest(BaseModel):
     prompt: str
     collection_id: UUID
     top_k: int = 5
+    offset: int = 0  # Pagination: later pages come from the cached ranking
     session_id: Optional[str] = None
+    filters: Dict[str, Any] = {}  # Hard filters run in SQL, e.g. {"basic.gender": "female"}
+    importance_weights: Dict[str, float] = {}  # Overrides on top of the weight profile, e.g. {"hair.color": 4.0}
+    weight_profile_id: Optional[UUID] = None  # Default: the session's, then the user's default profile
+    mode: str = "attributes"  # "attributes" (LLM prompt parse) or "clip" (local CLIP text embedding)
+    blend_attributes: bool = False  # clip mode: also parse the prompt and fuse attribute scores
 
 # Initialize services
 parser = PromptParser()
+logger = get_logger(__name__)
+
+def _web_path(image_path: Any) -> str:
+    # Normalize path for frontend (remove C:\, use /images/ mount)
+    filename = str(image_path).replace("\\", "/").split("/")[-1]
+    return f"/images/{filename}"
+
+async def _ranked_page(
+    session: AsyncSession,
+    ranker,
+    target_profile: PhotoProfile,
+    request,
+    weights: Dict[str, float],
+    sess_id: Optional[str] = None,
+) -> Optional[List[SearchResult]]:
+    """
+    One page (offset, top_k) of the collection ranked against the target.
+    Rankings are cached per target/filters/collection version, so repeated searches
+    and later pages only load the photos on the page. Returns None if no photo
+    passes the filters.
+    """
+    key = result_cache.key(target_profile, request.collection_id, weights=weights, filters=request.filters)
+    ranking = result_cache.get(key)
+    end = request.offset + request.top_k
+    if ranking is not None and len(ranking) >= result_cache.top_n and end > len(ranking):
+        ranking = None  # Page lies past the cached top-N
+
+    if ranking is not None:
+        page = ranking[request.offset:end]
+        with stage("db_fetch"):
+            profiles = await load_profiles_by_ids_async(session, [photo_id for photo_id, _ in page])
+        scores = dict(page)
+        results = []
+        for cand in profiles:
+            cand.image_path = _web_path(cand.image_path)
+            results.append(SearchResult(profile=cand, score=scores[cand.id]))
+        if sess_id:
+            await manager.send_update(sess_id, {"stage": "ranking", "progress": 1.0, "status": "completed", "cached": True})
+            await send_final_results(sess_id, results)
+        return results
+
+    if sess_id:
+        await manager.send_update(sess_id, {"stage": "fetching", "progress": 0.0, "message": "Fetching photos..."})
+
+    try:
+        with stage("db_fetch"):
+            candidates = await load_profiles_async(session, request.collection_id, request.filters)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {e}")
+
+    if not candidates:
+        result_cache.put(key, request.collection_id, [])
+        return None
+
+    if sess_id:
+        await manager.send_update(sess_id, {"stage": "ranking", "progress": 0.0, "message": f"Ranking {len(candidates)} photos..."})
+
+    with stage("rank"):
+        matrix = ProfileMatrix.from_profiles(candidates)
+        if manager.is_connected(sess_id):
+            # Stream the running top-k while the collection is scored
+            async def preview(snapshot, progress: float):
+                await manager.send_update(sess_id, {
+                    "stage": "partial_results", "progress": progress, "final": False,
+                    "results": [result_preview(candidates[i].id, candidates[i].image_path, score) for i, score in snapshot],
+                })
+            table = SoftTarget.from_profile(target_profile).compile(weights)
+            scores = await stream_scores(table, matrix, end, preview)
+        else:
+            scores = await asyncio.to_thread(ranker.score_collection, target_profile, matrix, weights)
+
+    if sess_id:
+        await manager.send_update(sess_id, {"stage": "ranking", "progress": 1.0, "status": "completed"})
+
+    # Sort by score descending, only relevant matches
+    scored_results = []
+    for i in np.argsort(-scores, kind="stable"):
+        if scores[i] <= 0.0:
+            break
+        cand = candidates[i]
+        cand.image_path = _web_path(cand.image_path)
+        scored_results.append(SearchResult(profile=cand, score=float(scores[i])))
+    result_cache.put(key, request.collection_id, [(r.profile.id, r.score) for r in scored_results])
+
+    results = scored_results[request.offset:end]
+    if sess_id:
+        await send_final_results(sess_id, results)
+    return results
+
+def result_preview(photo_id: Any, image_path: Any, score: float) -> Dict[str, Any]:
+    """Compact result for streamed WebSocket previews."""
+    return {"id": str(photo_id), "image_path": _web_path(image_path), "score": round(float(score), 4)}
+
+async def send_final_results(sess_id: str, results: List[SearchResult]):
+    """Authoritative result list, replacing any streamed previews."""
+    if manager.is_connected(sess_id):
+        await manager.send_update(sess_id, {
+            "stage": "results", "final": True,
+            "results": [result_preview(r.profile.id, r.profile.image_path, r.score) for r in results],
+        })
+
+async def _collection_index(session: AsyncSession, request) -> Tuple[List[str], Optional[VectorIndex]]:
+    """Embedding index of the collection; cached per collection version unless filters narrow it."""
+    version = result_cache.version(request.collection_id)
+    if not request.filters:
+        cached = vector_indexes.get(request.collection_id, version)
+        if cached is not None:
+            return cached
+    try:
+        with stage("db_fetch"):
+            ids, embeddings = await load_embeddings_async(session, request.collection_id, request.filters)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {e}")
+    if embeddings is None:
+        return [], None
+    # A filtered subset is searched once: k-means would cost more than the exact scan it replaces
+    index = await asyncio.to_thread(VectorIndex, embeddings, exact=bool(request.filters))
+    if not request.filters:
+        vector_indexes.put(request.collection_id, version, ids, index)
+    return ids, index
+
+async def _clip_search(session: AsyncSession, request: TextSearchRequest, ranker, weights: Dict[str, float]) -> SearchResponse:
+    """
+    Text-to-image search in CLIP space: no LLM round-trip, fully local. With
+    blend_attributes the prompt is parsed concurrently and, if that succeeds,
+    attribute scores of the CLIP candidates are fused in.
+    """
+    sess_id = request.session_id
+    if not state.embedder or not state.embedder.model:
+        raise HTTPException(status_code=503, detail="CLIP model not loaded")
+
+    start_time = time.time()
+    parse_task = asyncio.create_task(parser.parse_prompt(request.prompt)) if request.blend_attributes else None
+    if sess_id:
+        await manager.send_update(sess_id, {"stage": "encoding", "progress": 0.0, "message": "Encoding prompt..."})
+
+    try:
+        with stage("clip_embed"):
+            query = await asyncio.to_thread(state.embedder.encode_text, request.prompt)
+        if query is None:
+            raise HTTPException(status_code=500, detail="Failed to encode prompt")
+        query = np.asarray(query, dtype=np.float32)
+
+        key = result_cache.key(None, request.collection_id, weights=weights if parse_task else None,
+                               filters=request.filters, mode="clip", prompt=request.prompt, blend=bool(parse_task))
+        ranking = result_cache.get(key)
+        end = request.offset + request.top_k
+        if ranking is not None and len(ranking) >= result_cache.top_n and end > len(ranking):
+            ranking = None
+        target_profile = None
+
+        if ranking is None:
+            ids, index = await _collection_index(session, request)
+            if index is None or index.dim != query.shape[0]:
+                ranking = []
+            else:
+                if sess_id:
+                    await manager.send_update(sess_id, {"stage": "ranking", "progress": 0.0, "message": f"Searching {len(index)} embeddings..."})
+                with stage("rank"):
+                    rows, sims = index.search(query, max(settings.search.hybrid_candidates, end))
+                candidate_ids = [ids[r] for r in rows]
+                scores = (sims + 1.0) / 2.0
+
+                if parse_task is not None:
+                    try:
+                        target_profile = await parse_task
+                    except Exception as e:
+                        logger.warning("prompt parsing failed, using CLIP scores only", extra={"error": str(e)})
+                    parse_task = None
+                    if target_profile is not None:
+                        clip_sims = dict(zip(candidate_ids, sims))
+                        with stage("db_fetch"):
+                            profiles = await load_profiles_by_ids_async(session, candidate_ids)
+                        with stage("rank"):
+                            attribute_scores = ranker.score_collection(target_profile, profiles, weights)
+                        candidate_ids = [p.id for p in profiles]
+                        scores = fuse_scores(attribute_scores, np.array([clip_sims[i] for i in candidate_ids], dtype=np.float32))
+
+                order = np.argsort(-scores, kind="stable")
+                ranking = [(candidate_ids[i], float(scores[i])) for i in order]
+                if not request.blend_attributes or target_profile is not None:
+                    result_cache.put(key, request.collection_id, ranking)
+    finally:
+        if parse_task is not None:
+            parse_task.cancel()
+
+    page = ranking[request.offset:end]
+    scores_by_id = dict(page)
+    results = []
+    with stage("db_fetch"):
+        profiles = await load_profiles_by_ids_async(session, [photo_id for photo_id, _ in page])
+    for cand in profiles:
+        cand.image_path = _web_path(cand.image_path)
+        results.append(SearchResult(profile=cand, score=scores_by_id[cand.id]))
+
+    if sess_id:
+        await send_final_results(sess_id, results)
+        await manager.send_update(sess_id, {"stage": "completed", "progress": 1.0, "results_count": len(results)})
+        try:
+            with stage("history_write"):
+                await save_search_session(
+                    session,
+                    session_id=UUID(sess_id),
+                    user_id=UUID(get_current_user_id()),
+                    collection_id=request.collection_id,
+                    positives=[request.prompt],
+                    results=[{"id": str(r.profile.id), "score": r.score} for r in results]
+                )
+        except Exception as e:
+            logger.error("failed to save text search history", extra={"session_id": sess_id, "error": str(e)})
+
+    return SearchResponse(
+        results=results,
+        target_profile=target_profile,
+        analyzed_positives=[],
+        analyzed_negatives=[],
+        execution_time=time.time() - start_time
+    )
 
 @router.post("/text", response_model=SearchResponse)
 async def search_by_text(
     request: TextSearchRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Search for photos in a collection matching a text description.
@@ -44,56 +280,50 @@ async def search_by_text(
     ranker = state.ranker
     
     sess_id = request.session_id
-    print(f"DEBUG: Received text search request: '{request.prompt[:50]}...' Session: {sess_id}", flush=True)
+    weights = await resolve_request_weights(session, request.importance_weights, request.weight_profile_id, sess_id)
+    if request.mode == "clip":
+        return await _clip_search(session, request, ranker, weights)
+    if request.mode != "attributes":
+        raise HTTPException(status_code=400, detail=f"Unknown search mode: {request.mode}")
+    logger.debug("text search", extra={"prompt": request.prompt[:50], "session_id": sess_id})
 
     if sess_id:
         await manager.send_update(sess_id, {"stage": "parsing", "progress": 0.1, "message": "Parsing prompt..."})
 
     # 1. Parse prompt into a target profile
     try:
-        print("DEBUG: Calling parser.parse_prompt...", flush=True)
-        target_profile = await parser.parse_prompt(request.prompt)
-        print(f"DEBUG: Parsed profile: {target_profile}", flush=True)
+        with stage("parse"):
+            target_profile = await parser.parse_prompt(request.prompt)
+        logger.debug("prompt parsed", extra={"session_id": sess_id, "target": target_profile.model_dump(mode="json", exclude_none=True)})
         
         if sess_id:
             await manager.send_update(sess_id, {"stage": "parsing", "progress": 1.0, "status": "completed"})
     except Exception as e:
-        print(f"ERROR: Prompt parsing failed: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+        logger.exception("prompt parsing failed", extra={"session_id": sess_id})
         if sess_id:
             await manager.send_update(sess_id, {"stage": "error", "message": str(e)})
         raise HTTPException(status_code=500, detail=f"Failed to parse prompt: {str(e)}")
     
-    # 2. Get photos from collection
-    if sess_id:
-        await manager.send_update(sess_id, {"stage": "fetching", "progress": 0.0, "message": "Fetching photos..."})
-        
-    stmt = select(StoredPhoto).where(StoredPhoto.collection_id == request.collection_id)
-    photos = session.exec(stmt).all()
-    
-    if not photos:
+    # 2. Rank the collection against the target
+    start_time = time.time()
+    results = await _ranked_page(session, ranker, target_profile, request, weights, sess_id)
+
+    if results is None:
         if sess_id:
             await manager.send_update(sess_id, {"stage": "completed", "progress": 1.0, "results_count": 0})
             
             # Save History (Empty Result)
             try:
-                user_id = UUID(get_current_user_id())
-                sess_uuid = UUID(sess_id)
-                new_session = SearchSession(
-                    id=sess_uuid,
-                    user_id=user_id,
-                    collection_id=request.collection_id,
-                    positives=[request.prompt],
-                    negatives=[],
-                    started_at=datetime.utcnow(),
-                    completed_at=datetime.utcnow(),
-                    results=[]
-                )
-                session.add(new_session)
-                session.commit()
+                with stage("history_write"):
+                    await save_search_session(
+                        session,
+                        session_id=UUID(sess_id),
+                        user_id=UUID(get_current_user_id()),
+                        collection_id=request.collection_id,
+                        positives=[request.prompt],
+                    )
             except Exception as e:
-                print(f"ERROR: Failed to save empty history: {e}", flush=True)
+                logger.error("failed to save empty history", extra={"session_id": sess_id, "error": str(e)})
 
         # Fix: Frontend expects "target_profile" and serialized Enums
         return {
@@ -102,59 +332,7 @@ async def search_by_text(
             "analyzed_positives": [],
             "analyzed_negatives": []
         }
-    
-    if sess_id:
-        await manager.send_update(sess_id, {"stage": "ranking", "progress": 0.0, "message": f"Ranking {len(photos)} photos..."})
 
-    # 3. Prepare candidates
-    candidates = []
-    
-    for p in photos:
-        try:
-            if not p.profile:
-                continue
-                
-            prof_obj = PhotoProfile(**p.profile)
-            prof_obj.id = str(p.id)
-            prof_obj.image_path = p.image_path
-            candidates.append(prof_obj)
-        except Exception as e:
-            # print(f"Skipping malformed profile {p.id}: {e}")
-            continue
-            
-    # 4. Rank candidates against target
-    scored_results = []
-    total_candidates = len(candidates)
-    
-    start_time = time.time()
-    
-    for i, cand in enumerate(candidates):
-        # Score similarity (0.0 - 1.0)
-        score = ranker.score_candidate(target_profile, cand)
-        
-        # Only include relevant matches
-        if score > 0.0:
-            # Fix path for frontend
-            raw_path = str(cand.image_path)
-            # Normalize path for frontend (remove C:\, use /images/ mount)
-            filename = raw_path.replace("\\", "/").split("/")[-1]
-            
-            # Create a copy or update? Update in place is fine for this scope
-            cand.image_path = f"/images/{filename}"
-            
-            scored_results.append(SearchResult(profile=cand, score=score))
-        
-        # Report progress
-        if sess_id and i % 10 == 0:
-             await manager.send_update(sess_id, {"stage": "ranking", "progress": (i / total_candidates)})
-            
-    if sess_id:
-        await manager.send_update(sess_id, {"stage": "ranking", "progress": 1.0, "status": "completed"})
-    
-    # 5. Sort by score descending
-    scored_results.sort(key=lambda x: x.score, reverse=True)
-    
-    results = scored_results[:request.top_k]
     execution_time = time.time() - start_time
     
     if sess_id:
@@ -163,23 +341,17 @@ async def search_by_text(
     # Save History
     if sess_id:
         try:
-            user_id = UUID(get_current_user_id())
-            sess_uuid = UUID(sess_id)
-            
-            new_session = SearchSession(
-                id=sess_uuid,
-                user_id=user_id,
-                collection_id=request.collection_id,
-                positives=[request.prompt], # Store prompt as positive input source
-                negatives=[],
-                started_at=datetime.utcnow(),
-                completed_at=datetime.utcnow(),
-                results=[{"id": str(r.profile.id), "score": r.score} for r in results]
-            )
-            session.add(new_session)
-            session.commit()
+            with stage("history_write"):
+                await save_search_session(
+                    session,
+                    session_id=UUID(sess_id),
+                    user_id=UUID(get_current_user_id()),
+                    collection_id=request.collection_id,
+                    positives=[request.prompt], # Store prompt as positive input source
+                    results=[{"id": str(r.profile.id), "score": r.score} for r in results]
+                )
         except Exception as e:
-            print(f"ERROR: Failed to save text search history: {e}", flush=True)
+            logger.error("failed to save text search history", extra={"session_id": sess_id, "error": str(e)})
     
     return SearchResponse(
         results=results,
@@ -199,12 +371,16 @@ class GenerateSearchRequest(BaseModel):
     collection_id: UUID
     generator: str = "dalle"
     top_k: int = 5
+    offset: int = 0
     session_id: Optional[str] = None
+    filters: Dict[str, Any] = {}
+    importance_weights: Dict[str, float] = {}
+    weight_profile_id: Optional[UUID] = None
 
 @router.post("/generate", response_model=SearchResponse)
 async def generate_and_search(
     request: GenerateSearchRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Generate an image from prompt, analyze it, and search for similar photos.
@@ -215,6 +391,7 @@ async def generate_and_search(
     ranker = state.ranker
     
     sess_id = request.session_id
+    weights = await resolve_request_weights(session, request.importance_weights, request.weight_profile_id, sess_id)
     
     # 1. Generate Image
     if sess_id:
@@ -250,23 +427,25 @@ async def generate_and_search(
         vlm_client = state.vlm_client
         
         # Run sync method in thread
-        json_str = await asyncio.to_thread(vlm_client.analyze_image, str(local_image_path), SYSTEM_PROMPT)
+        with stage("vlm"):
+            json_str = await asyncio.to_thread(vlm_client.analyze_image, str(local_image_path), SYSTEM_PROMPT)
         
-        # Clean JSON
-        cleaned = json_str.replace("```json", "").replace("```", "").strip()
-        if "{" in cleaned and "}" in cleaned:
-             start = cleaned.find("{")
-             end = cleaned.rfind("}") + 1
-             cleaned = cleaned[start:end]
-             
-        data = json.loads(cleaned)
-        # Inject dummy ID/Path if missing to bypass strict validation if model didn't reload
-        if "id" not in data:
-            data["id"] = "temp_gen_id"
-        if "image_path" not in data:
-            data["image_path"] = web_image_path
-
-        target_profile = PhotoProfile(**data)
+        with stage("profile_validate"):
+            # Clean JSON
+            cleaned = json_str.replace("```json", "").replace("```", "").strip()
+            if "{" in cleaned and "}" in cleaned:
+                 start = cleaned.find("{")
+                 end = cleaned.rfind("}") + 1
+                 cleaned = cleaned[start:end]
+                 
+            data = json.loads(cleaned)
+            # Inject dummy ID/Path if missing to bypass strict validation if model didn't reload
+            if "id" not in data:
+                data["id"] = "temp_gen_id"
+            if "image_path" not in data:
+                data["image_path"] = web_image_path
+
+            target_profile = PhotoProfile(**data)
         
         # Ensure correct path is set
         target_profile.image_path = web_image_path
@@ -283,39 +462,8 @@ async def generate_and_search(
     if sess_id:
         await manager.send_update(sess_id, {"stage": "ranking", "progress": 0.0, "message": "Searching database..."})
 
-    stmt = select(StoredPhoto).where(StoredPhoto.collection_id == request.collection_id)
-    photos = session.exec(stmt).all()
-    
     start_time = time.time()
-    
-    candidates = []
-    for p in photos:
-        try:
-            if not p.profile: continue
-            prof_obj = PhotoProfile(**p.profile)
-            prof_obj.id = str(p.id)
-            prof_obj.image_path = p.image_path
-            candidates.append(prof_obj)
-        except: continue
-        
-    scored_results = []
-    total_candidates = len(candidates)
-    
-    for i, cand in enumerate(candidates):
-        score = ranker.score_candidate(target_profile, cand)
-        if score > 0.0:
-            # Normalize path for frontend
-            raw_path = str(cand.image_path)
-            filename = raw_path.replace("\\", "/").split("/")[-1]
-            cand.image_path = f"/images/{filename}"
-            
-            scored_results.append(SearchResult(profile=cand, score=score))
-        if sess_id and i % 10 == 0:
-             await manager.send_update(sess_id, {"stage": "ranking", "progress": (i / total_candidates)})
-            
-    scored_results.sort(key=lambda x: x.score, reverse=True)
-    
-    results = scored_results[:request.top_k]
+    results = await _ranked_page(session, ranker, target_profile, request, weights, sess_id) or []
     execution_time = time.time() - start_time
 
     if sess_id:
@@ -324,25 +472,19 @@ async def generate_and_search(
     # Save History
     if sess_id:
         try:
-            user_id = UUID(get_current_user_id())
-            sess_uuid = UUID(sess_id)
-            
             # For generation, we might want to store the prompt AND the generated image path?
             # Schema says positives matches JSON list of strings.
-            new_session = SearchSession(
-                id=sess_uuid,
-                user_id=user_id,
-                collection_id=request.collection_id,
-                positives=[request.prompt, web_image_path], 
-                negatives=[],
-                started_at=datetime.utcnow(),
-                completed_at=datetime.utcnow(),
-                results=[{"id": str(r.profile.id), "score": r.score} for r in results]
-            )
-            session.add(new_session)
-            session.commit()
+            with stage("history_write"):
+                await save_search_session(
+                    session,
+                    session_id=UUID(sess_id),
+                    user_id=UUID(get_current_user_id()),
+                    collection_id=request.collection_id,
+                    positives=[request.prompt, web_image_path],
+                    results=[{"id": str(r.profile.id), "score": r.score} for r in results]
+                )
         except Exception as e:
-            print(f"ERROR: Failed to save generate search history: {e}", flush=True)
+            logger.error("failed to save generate search history", extra={"session_id": sess_id, "error": str(e)})
 
     return SearchResponse(
         results=results,
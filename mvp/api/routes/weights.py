@@ -0,0 +1,96 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.storage.database import get_session
+from mvp.storage.models import WeightProfile
+from mvp.storage.async_store import find_weight_profile
+from mvp.search.ranker import Ranker
+from mvp.search.weights import validate_weights
+from mvp.api.routes.collections import get_current_user_id
+
+router = APIRouter(prefix="/user/weights", tags=["user"])
+
+class WeightProfileRequest(BaseModel):
+    name: str
+    weights: Dict[str, float] = {}  # Overrides of Ranker.DEFAULT_WEIGHTS, e.g. {"hair.color": 4.0}
+    session_id: Optional[str] = None
+    is_default: bool = False
+
+def _validated(weights: Dict[str, float]) -> Dict[str, float]:
+    try:
+        return validate_weights(weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def resolve_request_weights(
+    session: AsyncSession,
+    overrides: Optional[Dict[str, float]] = None,
+    profile_id: Optional[UUID] = None,
+    session_id: Optional[str] = None,
+) -> Dict[str, float]:
+    """
+    Final weights for a search: DEFAULT_WEIGHTS, then the user's weight profile
+    (explicit id, session-bound or default), then per-request overrides.
+    """
+    profile = await find_weight_profile(session, UUID(get_current_user_id()), profile_id, session_id)
+    if profile_id is not None and profile is None:
+        raise HTTPException(status_code=404, detail="Weight profile not found")
+    merged = {**(profile.weights if profile else {}), **(overrides or {})}
+    return Ranker.resolve_weights(_validated(merged))
+
+@router.get("/defaults")
+def get_default_weights():
+    return Ranker.DEFAULT_WEIGHTS
+
+@router.get("", response_model=List[WeightProfile])
+def list_weight_profiles(session: Session = Depends(get_session)):
+    user_id = UUID(get_current_user_id())
+    stmt = select(WeightProfile).where(WeightProfile.user_id == user_id).order_by(WeightProfile.updated_at.desc())
+    return session.exec(stmt).all()
+
+@router.post("", response_model=WeightProfile)
+def create_weight_profile(request: WeightProfileRequest, session: Session = Depends(get_session)):
+    profile = WeightProfile(user_id=UUID(get_current_user_id()), **request.model_dump())
+    profile.weights = _validated(request.weights)
+    _save(session, profile)
+    return profile
+
+@router.put("/{profile_id}", response_model=WeightProfile)
+def update_weight_profile(profile_id: UUID, request: WeightProfileRequest, session: Session = Depends(get_session)):
+    profile = _owned(session, profile_id)
+    profile.name = request.name
+    profile.weights = _validated(request.weights)
+    profile.session_id = request.session_id
+    profile.is_default = request.is_default
+    profile.updated_at = datetime.utcnow()
+    _save(session, profile)
+    return profile
+
+@router.delete("/{profile_id}")
+def delete_weight_profile(profile_id: UUID, session: Session = Depends(get_session)):
+    session.delete(_owned(session, profile_id))
+    session.commit()
+    return {"ok": True}
+
+def _owned(session: Session, profile_id: UUID) -> WeightProfile:
+    profile = session.get(WeightProfile, profile_id)
+    if not profile or profile.user_id != UUID(get_current_user_id()):
+        raise HTTPException(status_code=404, detail="Weight profile not found")
+    return profile
+
+def _save(session: Session, profile: WeightProfile):
+    if profile.is_default:
+        # One default per user
+        for other in session.exec(select(WeightProfile).where(
+            WeightProfile.user_id == profile.user_id, WeightProfile.is_default == True, WeightProfile.id != profile.id  # noqa: E712
+        )):
+            other.is_default = False
+            session.add(other)
+    session.add(profile)
+    session.commit()
+    session.refresh(profile)
@@ -1,30 +1,162 @@
-from typing import Dict
+"""
+Search progress over WebSockets.
+
+send_update never waits for a socket: it queues the message for each socket of the
+session and returns. A background task per socket flushes the queue at most
+API_WS_MAX_RATE_HZ times per second, so a slow or stalled client cannot slow
+down ranking.
+
+Intermediate updates (progress ticks and partial_results previews) are coalesced
+per stage: only the latest one still waiting is sent. Everything else (stage
+completion, errors, final results) is delivered in order. Several sockets can
+watch one session; each has its own queue, so a slow one only falls behind itself.
+
+With several server workers, the socket may live in another worker than the
+search: updates travel over the progress bus (see progress_bus.py), which hands
+them to whichever workers hold sockets for the session.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
 from fastapi import WebSocket, APIRouter
-from mvp.search.session import SearchSession
-import json
+
+from mvp.api.progress_bus import LocalBus, ProgressBus
+from mvp.core.config import settings
+
+# Keys that may appear in an update that is safe to drop in favour of a newer one
+_INTERMEDIATE_KEYS = {"stage", "progress", "message", "results", "final"}
+
+
+def coalesce_key(data: dict) -> Optional[Hashable]:
+    """Slot an intermediate update replaces, or None if the update must be delivered."""
+    if not set(data) <= _INTERMEDIATE_KEYS or data.get("final") or data.get("stage") == "error":
+        return None
+    if "progress" not in data or data["progress"] >= 1.0:
+        return None
+    return ("progress", data.get("stage"))
+
+
+class _Subscriber:
+    """One socket watching a session: its pending updates and sender task."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.pending: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self.seq = 0
+        self.wakeup = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.task: Optional[asyncio.Task] = None
+
+    def put(self, data: dict):
+        key = coalesce_key(data)
+        if key is None:
+            # A stage update supersedes that stage's pending ticks
+            self.pending.pop(("progress", data.get("stage")), None)
+            self.seq += 1
+            key = self.seq
+        else:
+            self.pending.pop(key, None)  # Re-insert at the end, after older must-deliver updates
+        self.pending[key] = data
+        self.idle.clear()
+        self.wakeup.set()
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+    def __init__(self, max_rate_hz: Optional[float] = None, send_timeout: Optional[float] = None):
+        self.subscribers: Dict[str, Dict[WebSocket, _Subscriber]] = {}
+        self.max_rate_hz = max_rate_hz or settings.api.ws_max_rate_hz
+        self.send_timeout = send_timeout or settings.api.ws_send_timeout
+        self.bus: ProgressBus = LocalBus()
+        self.bus.deliver = self._deliver
+
+    async def start(self, bus: ProgressBus):
+        """Switch to another progress bus (at startup, before sockets connect)."""
+        await bus.start(self._deliver)
+        for session_id in self.subscribers:
+            bus.subscribe(session_id)
+        self.bus = bus
+
+    @property
+    def active_connections(self) -> Dict[str, List[WebSocket]]:
+        return {sid: list(subs) for sid, subs in self.subscribers.items()}
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
-        self.active_connections[session_id] = websocket
+        self.register(websocket, session_id)
         print(f"WS Connected: {session_id}")
 
-    def disconnect(self, session_id: str):
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
+    def register(self, websocket: WebSocket, session_id: str):
+        """Attach an accepted socket to a session and start its sender task."""
+        subscriber = _Subscriber(websocket)
+        if session_id not in self.subscribers:
+            self.subscribers[session_id] = {}
+            self.bus.subscribe(session_id)
+        self.subscribers[session_id][websocket] = subscriber
+        subscriber.task = asyncio.create_task(self._sender(session_id, subscriber))
+
+    def is_connected(self, session_id: Optional[str]) -> bool:
+        """Whether any worker holds a socket for the session."""
+        return bool(session_id) and (bool(self.subscribers.get(session_id)) or session_id in self.bus.remote_sessions)
+
+    def disconnect(self, session_id: str, websocket: Optional[WebSocket] = None):
+        """Drop one socket of a session, or all of them."""
+        subs = self.subscribers.get(session_id)
+        if subs is None:
+            return
+        for ws in ([websocket] if websocket is not None else list(subs)):
+            subscriber = subs.pop(ws, None)
+            if subscriber is None:
+                continue
+            if subscriber.task and subscriber.task is not asyncio.current_task():
+                subscriber.task.cancel()
+            subscriber.idle.set()
+        if not subs:
+            del self.subscribers[session_id]
+            self.bus.unsubscribe(session_id)
             print(f"WS Disconnected: {session_id}")
 
     async def send_update(self, session_id: str, data: dict):
-        if session_id in self.active_connections:
-            websocket = self.active_connections[session_id]
+        """Queue an update for every socket of the session, in any worker; returns without waiting for them."""
+        await self.bus.publish(session_id, data)
+
+    async def _deliver(self, session_id: str, data: dict):
+        for subscriber in self.subscribers.get(session_id, {}).values():
+            subscriber.put(data)
+
+    async def flush(self, session_id: str):
+        """Wait until everything queued for the session has been sent (or its sockets are gone)."""
+        for subscriber in list(self.subscribers.get(session_id, {}).values()):
+            await subscriber.idle.wait()
+
+    async def close(self):
+        for session_id in list(self.subscribers):
+            self.disconnect(session_id)
+        await self.bus.close()
+
+    async def _sender(self, session_id: str, subscriber: _Subscriber):
+        interval = 1.0 / self.max_rate_hz
+        last = 0.0
+        while True:
+            await subscriber.wakeup.wait()
+            delay = last + interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)  # Updates arriving meanwhile are coalesced
+            subscriber.wakeup.clear()
+            batch = list(subscriber.pending.values())
+            subscriber.pending.clear()
+            last = time.monotonic()
             try:
-                await websocket.send_json(data)
+                for data in batch:
+                    await asyncio.wait_for(subscriber.websocket.send_json(data), self.send_timeout)
             except Exception as e:
                 print(f"Error sending WS message to {session_id}: {e}")
-                self.disconnect(session_id)
+                self.disconnect(session_id, subscriber.websocket)
+                return
+            if not subscriber.pending:
+                subscriber.idle.set()
 
 manager = ConnectionManager()
 
@@ -39,4 +171,4 @@ async def search_progress(websocket: WebSocket, session_id: str):
             # For now just receiving is enough to keep it open
             await websocket.receive_text()
     except Exception:
-        manager.disconnect(session_id)
+        manager.disconnect(session_id, websocket)
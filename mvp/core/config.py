@@ -31,6 +31,12 @@ class DatabaseConfig(BaseSettings):
     """Database configuration."""
     # SQLite
     sqlite_path: str = "data/search_appearance.db"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 65536  # Page cache per connection
+    sqlite_mmap_size: int = 268435456  # 256MB memory-mapped reads
+    pool_size: int = 10  # Pooled connections for concurrent readers
+    max_overflow: int = 20
+    bulk_chunk_size: int = 5000  # Rows per executemany batch in bulk imports
     
     # LanceDB (for vector storage)
     lancedb_path: str = "data/lancedb"
@@ -48,6 +54,7 @@ class EmbeddingConfig(BaseSettings):
     model_name: str = "openai/clip-vit-base-patch32"
     device: str = "cpu"
     batch_size: int = 32
+    storage_dtype: str = "float32"  # StoredPhoto.embedding blobs: "float32" or "float16" (half the size)
     
     model_config = SettingsConfigDict(env_prefix="EMBEDDING_")
 
@@ -57,6 +64,29 @@ class SearchConfig(BaseSettings):
     default_top_k: int = 20
     min_similarity_threshold: float = 0.0
     duplicate_threshold: float = 0.9
+    phash_max_distance: int = 6  # Hamming distance treated as a near-duplicate upload
+    max_aggregation_sessions: int = 256  # Refinement sessions kept in memory (LRU)
+    result_cache_size: int = 512  # Cached rankings (LRU); 0 disables the cache, as does API_WORKERS > 1
+    result_cache_top_n: int = 100  # Results kept per cached ranking
+    shard_count: int = 0  # >1 ranks the in-memory database on a process pool, one shard per slice
+    shard_workers: int = 0  # Pool size; 0 = one process per shard
+    shard_min_candidates: int = 200_000  # Smaller collections are scored in-process
+    shard_start_method: str = "spawn"
+    score_kernel: str = "auto"  # "auto" uses numba when installed, "numpy" forces the thread-pool kernel
+    score_threads: int = 0  # 0 = all cores (capped by collection size)
+    score_chunk_size: int = 65_536  # Candidate rows per NumPy chunk
+    score_min_rows_per_thread: int = 20_000  # Below this per thread, fewer threads are used
+    weight_table_cache_size: int = 64  # Compiled weight profiles kept in memory (LRU)
+    stream_first_chunk: int = 4_096  # Rows scored before the first streamed top-k preview
+    stream_min_change: float = 0.01  # k-th score gain that makes a new preview worth sending
+    search_mode: str = "attributes"  # Default /api/search mode: "attributes" or "hybrid" (CLIP prefilter + re-rank)
+    hybrid_candidates: int = 500  # Nearest embeddings re-ranked by attributes
+    hybrid_attribute_weight: float = 0.7  # Fusion weight of the attribute score (rest: embedding similarity)
+    hybrid_fusion: str = "linear"  # "linear" or "rrf" (reciprocal-rank fusion)
+    hybrid_negative_weight: float = 0.5  # How far the query moves away from negative examples
+    ann_min_size: int = 20_000  # Smaller collections are searched exactly
+    ann_lists: int = 0  # IVF lists; 0 = sqrt(collection size)
+    ann_nprobe: int = 8  # Lists scanned per query
     
     # Ranking weights
     weight_exact_match: float = 2.0
@@ -66,6 +96,19 @@ class SearchConfig(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="SEARCH_")
 
 
+class JobsConfig(BaseSettings):
+    """Background job queue configuration."""
+    annotation_concurrency: int = 4  # Concurrent VLM calls per worker
+    lease_seconds: int = 300
+    max_attempts: int = 5
+    retry_backoff_seconds: float = 10.0  # Doubled on each retry
+    poll_interval: float = 2.0
+    auto_annotate_uploads: bool = True
+    shutdown_timeout: float = 30.0  # Seconds in-flight annotation jobs get to finish on shutdown
+    
+    model_config = SettingsConfigDict(env_prefix="JOBS_")
+
+
 class APIConfig(BaseSettings):
     """API server configuration."""
     host: str = "0.0.0.0"
@@ -80,9 +123,53 @@ class APIConfig(BaseSettings):
     max_upload_size: int = 10 * 1024 * 1024  # 10MB
     allowed_extensions: List[str] = [".jpg", ".jpeg", ".png", ".webp"]
     
+    # Archive ingestion
+    ingest_workers: int = 0  # Process pool size for hashing/thumbnails (0 = CPU count)
+    ingest_batch_size: int = 200  # StoredPhoto rows per bulk insert
+
+    # Search progress WebSocket
+    ws_max_rate_hz: float = 10.0  # Flushes per session per second; ticks in between are coalesced
+    ws_send_timeout: float = 5.0  # Seconds before a stalled socket is dropped
+    progress_bus: str = "auto"  # local | unix | auto (unix when workers > 1)
+    progress_bus_path: str = "data/progress.sock"  # Shared by all workers on the host
+    
     model_config = SettingsConfigDict(env_prefix="API_")
 
 
+class MockVLMConfig(BaseSettings):
+    """Offline mock VLM provider (mvp/providers/mock_provider.py) for load tests."""
+    enabled: bool = False  # Replaces every real provider (and the /api/search VLM client) with the mock
+    priority: int = 1000  # Ahead of every real provider when enabled
+    latency_distribution: str = "lognormal"  # fixed | uniform | exponential | lognormal
+    latency_ms: float = 800.0  # Value (fixed), midpoint (uniform), mean (exponential), median (lognormal)
+    latency_spread: float = 0.5  # Lognormal sigma; uniform +/- fraction of latency_ms
+    error_rate: float = 0.0  # Fraction of calls that fail after the full latency
+    rate_limit_rate: float = 0.0  # Fraction of calls answered with a 429 straight away
+    quota_rpm: Optional[int] = None  # Calls per minute before every call gets a 429, like a provider quota
+    retry_after: float = 1.0  # Seconds suggested by a random 429
+    seed: int = 0  # Same seed, same latencies and failures in call order
+
+    model_config = SettingsConfigDict(env_prefix="MOCK_VLM_")
+
+
+class ObservabilityConfig(BaseSettings):
+    """Metrics and logging configuration."""
+    metrics_enabled: bool = True  # Stage timings and counters on /api/metrics
+    log_level: str = "INFO"
+    log_format: str = "text"  # text | json
+    loop_monitor: bool = False  # Event-loop lag probe and blocking-call detector (mvp/core/loop_monitor.py)
+    loop_lag_interval: float = 0.1  # Seconds between lag probes
+    loop_block_threshold: float = 0.1  # Seconds the loop may be stuck before the blocking code is sampled
+    loop_block_keep: int = 50  # Recent blocks (with stacks) kept for /api/metrics/blocking
+    profiling_enabled: bool = False  # Honour X-Profile: 1 / ?profile=1 on search requests (mvp/core/profiling.py)
+    profiling_paths: List[str] = ["/api/search"]  # Path prefixes that may be profiled
+    profiling_interval: float = 0.005  # Seconds between stack samples
+    profiling_dir: str = "data/profiles"
+    profiling_keep: int = 100  # Newest profiles kept on disk
+
+    model_config = SettingsConfigDict(env_prefix="OBS_")
+
+
 class Settings(BaseSettings):
     """Main application settings."""
     # Environment
@@ -101,7 +188,10 @@ class Settings(BaseSettings):
     database: DatabaseConfig = Field(default_factory=DatabaseConfig)
     embedding: EmbeddingConfig = Field(default_factory=EmbeddingConfig)
     search: SearchConfig = Field(default_factory=SearchConfig)
+    jobs: JobsConfig = Field(default_factory=JobsConfig)
     api: APIConfig = Field(default_factory=APIConfig)
+    observability: ObservabilityConfig = Field(default_factory=ObservabilityConfig)
+    mock_vlm: MockVLMConfig = Field(default_factory=MockVLMConfig)
     
     # Provider API keys (for backward compatibility)
     openai_api_key: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
@@ -188,10 +278,22 @@ class Settings(BaseSettings):
                     default_model='qwen/qwen-2.5-vl-72b-instruct:free',
                     priority=70
                 )
+        
+        if self.mock_vlm.enabled:
+            self.providers['mock'] = ProviderConfig(
+                name='mock',
+                api_key='not-needed',
+                default_model='mock-vlm',
+                max_retries=1,
+                priority=self.mock_vlm.priority
+            )
     
     def get_enabled_providers(self) -> List[ProviderConfig]:
         """Get list of enabled providers sorted by priority."""
         enabled = [p for p in self.providers.values() if p.enabled and p.api_key]
+        if self.mock_vlm.enabled:
+            # Offline runs must never fall back to a real API
+            enabled = [p for p in enabled if p.name == 'mock']
         return sorted(enabled, key=lambda p: p.priority, reverse=True)
 
 
@@ -1,4 +1,5 @@
 from typing import Dict, Any, Type
+import numpy as np
 from mvp.schema.attributes import (
     AgeGroup, Height, HairColor, Ethnicity, BodyType, Gender,
     FaceShape, EyeColor, EyeShape, Nose, Lips, Jawline,
@@ -8,6 +9,8 @@ from mvp.schema.attributes import (
 
 class MatrixRegistry:
     _matrices: Dict[Type[Any], Dict[str, Dict[str, float]]] = {}
+    _compiled: Dict[Type[Any], np.ndarray] = {}
+    generation: int = 0  # Bumped on register so caches built from compiled arrays can tell they are stale
 
     @classmethod
     def get_matrix(cls, enum_type: Type[Any]) -> Dict[str, Dict[str, float]]:
@@ -18,6 +21,21 @@ class MatrixRegistry:
             return cls._matrices[enum_type]
         return cls._create_identity_matrix(enum_type)
 
+    @classmethod
+    def get_array(cls, enum_type: Type[Any]) -> np.ndarray:
+        """
+        Distance matrix compiled to a dense float32 array indexed by enum declaration
+        order (the same order as attribute codes). Cached; read-only.
+        """
+        array = cls._compiled.get(enum_type)
+        if array is None:
+            matrix = cls.get_matrix(enum_type)
+            members = [e.value for e in enum_type]
+            array = np.array([[matrix[v1][v2] for v2 in members] for v1 in members], dtype=np.float32)
+            array.setflags(write=False)
+            cls._compiled[enum_type] = array
+        return array
+
     @staticmethod
     def _create_identity_matrix(enum_type: Type[Any]) -> Dict[str, Dict[str, float]]:
         """Creates a default 0/1 distance matrix."""
@@ -59,6 +77,8 @@ class MatrixRegistry:
                     full_matrix[v1][v2] = 1.0
         
         cls._matrices[enum_type] = full_matrix
+        cls._compiled.pop(enum_type, None)
+        cls.generation += 1
 
 # --- Definitions of specific matrices ---
 
@@ -1,11 +1,12 @@
 import logging
-from typing import List, Optional, Union
+from typing import Optional, Sequence, Union
+
+import numpy as np
 from PIL import Image
 try:
-    from sentence_transformers import SentenceTransformer, util
+    from sentence_transformers import SentenceTransformer
 except ImportError:
     SentenceTransformer = None
-    util = None
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +36,8 @@ class ImageEmbedder:
         else:
             logger.warning("sentence-transformers not installed. Image embeddings disabled.")
 
-    def encode_image(self, image_path: str) -> Optional[List[float]]:
+    def encode_image(self, image_path: str) -> Optional[np.ndarray]:
+        """float32 vector of the image, or None without a model."""
         if not self.model:
             return None
         
@@ -43,13 +45,28 @@ class ImageEmbedder:
             img = Image.open(image_path)
             # SentenceTransformer handles image preprocessing
             embedding = self.model.encode(img)
-            return embedding.tolist()
+            return np.asarray(embedding, dtype=np.float32)
         except Exception as e:
             logger.error(f"Error encoding image {image_path}: {e}")
             return None
 
+    def encode_text(self, text: str) -> Optional[np.ndarray]:
+        """Encode text with the CLIP text tower, into the same space as encode_image."""
+        if not self.model:
+            return None
+
+        try:
+            embedding = self.model.encode(text)
+            return np.asarray(embedding, dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Error encoding text: {e}")
+            return None
+
     @staticmethod
-    def cosine_similarity(emb1: List[float], emb2: List[float]) -> float:
-        if not util or not emb1 or not emb2:
+    def cosine_similarity(emb1: Union[np.ndarray, Sequence[float]], emb2: Union[np.ndarray, Sequence[float]]) -> float:
+        if emb1 is None or emb2 is None or len(emb1) == 0 or len(emb2) == 0:
             return 0.0
-        return float(util.cos_sim(emb1, emb2)[0][0])
+        a = np.asarray(emb1, dtype=np.float32)
+        b = np.asarray(emb2, dtype=np.float32)
+        norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+        return float(np.dot(a, b)) / norm if norm else 0.0
@@ -0,0 +1,139 @@
+"""
+Hamming-distance index over 64-bit perceptual hashes.
+
+A BK-tree answers "any hash within distance d" by only visiting children whose
+edge distance lies in [dist - d, dist + d], so near-duplicate lookups stay well
+under a millisecond for collections of 100k+ photos.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from mvp.core.hasher import ImageHasher
+from mvp.storage.models import StoredPhoto
+
+
+class BKTree:
+    """BK-tree keyed by 64-bit int hashes. Each node keeps all ids sharing its hash."""
+
+    def __init__(self):
+        # Node layout: [hash, ids, children{distance: node}]
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item_id: Any = None):
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item_id], {}]
+            return
+
+        node = self._root
+        while True:
+            dist = (node[0] ^ value).bit_count()
+            if dist == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [value, [item_id], {}]
+                return
+            node = child
+
+    def find(self, value: int, max_distance: int) -> List[Tuple[Any, int]]:
+        """Return (item_id, distance) for every stored hash within max_distance, closest first."""
+        if self._root is None:
+            return []
+
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            dist = (node[0] ^ value).bit_count()
+            if dist <= max_distance:
+                results.extend((item_id, dist) for item_id in node[1])
+            low, high = dist - max_distance, dist + max_distance
+            for edge, child in node[2].items():
+                if low <= edge <= high:
+                    stack.append(child)
+
+        results.sort(key=lambda x: x[1])
+        return results
+
+    def find_first(self, value: int, max_distance: int) -> Optional[Tuple[Any, int]]:
+        """Return any single (item_id, distance) within max_distance, or None."""
+        if self._root is None:
+            return None
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            dist = (node[0] ^ value).bit_count()
+            if dist <= max_distance:
+                return node[1][0], dist
+            low, high = dist - max_distance, dist + max_distance
+            for edge, child in node[2].items():
+                if low <= edge <= high:
+                    stack.append(child)
+        return None
+
+
+class CollectionHashIndex:
+    """
+    Per-collection BK-trees, loaded lazily with a single query per collection
+    and kept in sync by callers via add().
+    """
+
+    def __init__(self):
+        self._indexes: Dict[UUID, BKTree] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, collection_id: UUID) -> BKTree:
+        with self._lock:
+            tree = self._indexes.get(collection_id)
+            if tree is not None:
+                return tree
+
+            tree = BKTree()
+            stmt = select(StoredPhoto.id, StoredPhoto.phash).where(
+                StoredPhoto.collection_id == collection_id
+            ).where(StoredPhoto.phash != None)  # noqa: E711
+            for photo_id, phash in session.exec(stmt):
+                value = ImageHasher.hex_to_hash(phash)
+                if value is not None:
+                    tree.add(value, photo_id)
+
+            self._indexes[collection_id] = tree
+            return tree
+
+    def add(self, collection_id: UUID, value: int, item_id: Any = None):
+        with self._lock:
+            tree = self._indexes.get(collection_id)
+            if tree is not None:
+                tree.add(value, item_id)
+
+    def claim(self, tree: BKTree, value: int, max_distance: int, item_id: Any = None) -> Optional[Tuple[Any, int]]:
+        """
+        Under the index lock: the near-duplicate of `value` in `tree` (a tree from get()),
+        or None after adding `value`, so concurrent ingests never both accept the same image.
+        """
+        with self._lock:
+            match = tree.find_first(value, max_distance)
+            if match is None:
+                tree.add(value, item_id)
+            return match
+
+    def invalidate(self, collection_id: Optional[UUID] = None):
+        with self._lock:
+            if collection_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(collection_id, None)
+
+
+# Global index instance
+hash_indexes = CollectionHashIndex()
@@ -1,3 +1,5 @@
+from typing import Optional, Union
+import numpy as np
 from PIL import Image
 try:
     import imagehash
@@ -13,35 +15,58 @@ class ImageHasher:
         """
         try:
             with Image.open(image_path) as img:
-                if imagehash:
-                    return str(imagehash.phash(img))
-                else:
-                    return ImageHasher._dhash(img)
+                return ImageHasher.hash_to_hex(ImageHasher.hash_image(img))
         except Exception as e:
             print(f"Error computing hash: {e}")
             return ""
 
     @staticmethod
-    def _dhash(image: Image.Image, hash_size: int = 8) -> str:
+    def compute_hash(image: Union[str, Image.Image]) -> Optional[int]:
+        """
+        Compute the 64-bit perceptual hash of an image path or opened image as an int.
+        Returns None if the image cannot be read.
+        """
+        try:
+            if isinstance(image, Image.Image):
+                return ImageHasher.hash_image(image)
+            with Image.open(image) as img:
+                return ImageHasher.hash_image(img)
+        except Exception as e:
+            print(f"Error computing hash: {e}")
+            return None
+
+    @staticmethod
+    def hash_image(image: Image.Image) -> int:
+        if imagehash:
+            return ImageHasher.hex_to_hash(str(imagehash.phash(image)))
+        return ImageHasher._dhash(image)
+
+    @staticmethod
+    def _dhash(image: Image.Image, hash_size: int = 8) -> int:
         # Grayscale and resize
         image = image.convert('L').resize(
             (hash_size + 1, hash_size),
             Image.Resampling.LANCZOS,
         )
-        
-        diff = []
-        for row in range(hash_size):
-            for col in range(hash_size):
-                pixel_left = image.getpixel((col, row))
-                pixel_right = image.getpixel((col + 1, row))
-                diff.append(pixel_left > pixel_right)
-                
-        decimal_value = 0
-        hex_string = []
-        for index, value in enumerate(diff):
-            if value:
-                decimal_value += 2**(index % 8)
-            if (index % 8) == 7:
-                hex_string.append(hex(decimal_value)[2:].rjust(2, '0'))
-                decimal_value = 0
-        return ''.join(hex_string)
+        pixels = np.asarray(image, dtype=np.int16)
+
+        # Row-major comparison of horizontally adjacent pixels. Bits are packed
+        # LSB-first within each byte so the hex form matches previously stored hashes.
+        diff = pixels[:, :-1] > pixels[:, 1:]
+        packed = np.packbits(diff.ravel(), bitorder='little')
+        return int.from_bytes(packed.tobytes(), 'big')
+
+    @staticmethod
+    def hash_to_hex(value: int, hash_size: int = 8) -> str:
+        return f"{value:0{hash_size * hash_size // 4}x}"
+
+    @staticmethod
+    def hex_to_hash(value: str) -> Optional[int]:
+        try:
+            return int(value, 16) if value else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def hamming_distance(a: int, b: int) -> int:
+        return (a ^ b).bit_count()
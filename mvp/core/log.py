@@ -0,0 +1,95 @@
+"""
+Structured logging for request handlers.
+
+    logger = get_logger(__name__)
+    logger.info("upload analyzed", extra={"upload": name, "image_path": path})
+
+Records go onto a queue and a background thread formats and writes them, so a
+handler on the event loop never blocks on stdout. OBS_LOG_FORMAT=json writes one
+JSON object per line, with the `extra` fields as top-level keys; "text" appends
+them as key=value pairs.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from mvp.core.config import settings
+
+ROOT = "mvp"
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_STANDARD = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _STANDARD}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v!r}" if isinstance(v, str) else f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None, stream=None):
+    """Route the `mvp` loggers through a queue to stdout (idempotent)."""
+    global _listener
+    cfg = settings.observability
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if (fmt or cfg.log_format) == "json" else TextFormatter())
+
+    if _listener is not None:
+        _listener.stop()
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+
+    root = logging.getLogger(ROOT)
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    root.setLevel((level or cfg.log_level).upper())
+    root.propagate = False
+
+
+def shutdown_logging():
+    """Write out queued records, stop the writer thread and detach the queue handler."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        root = logging.getLogger(ROOT)
+        root.handlers = []
+        root.propagate = True
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
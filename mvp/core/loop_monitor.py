@@ -0,0 +1,158 @@
+"""
+Event-loop lag and blocking-call detector (OBS_LOOP_MONITOR=true).
+
+A probe task sleeps for `interval` and records how late it wakes up: that
+delay is time the loop spent running other callbacks, i.e. the lag every
+request on this worker saw. A watchdog thread watches the probe's heartbeat;
+when the loop has been stuck for longer than `block_threshold`, it samples the
+loop thread's Python stack, so the report names the code that was blocking
+(a sync VLM call, sync SQL, model inference, ...), not just that something did.
+
+Exported on /api/metrics:
+    event_loop_lag_seconds                   histogram of probe lag
+    event_loop_blocking_calls_total{site}    blocks longer than the threshold
+    event_loop_blocking_seconds{site}        how long they blocked
+Recent blocks with full stacks: /api/metrics/blocking.
+
+Sites are "path:line function" of the innermost frame inside the project
+(falling back to the innermost frame), or "unattributed" when a block ended
+before the watchdog sampled it.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Optional
+
+from mvp.core.config import PROJECT_ROOT, settings
+from mvp.core.log import get_logger
+from mvp.core.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Seconds; a healthy loop sits in the first buckets
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+EVENT_LOOP_LAG = metrics.histogram("event_loop_lag_seconds", "Delay of the loop monitor's probe wake-ups", buckets=LAG_BUCKETS)
+BLOCKING_CALLS = metrics.counter("event_loop_blocking_calls_total", "Callbacks that blocked the event loop past the threshold", ["site"])
+BLOCKING_SECONDS = metrics.histogram("event_loop_blocking_seconds", "Duration of blocking callbacks", ["site"], buckets=LAG_BUCKETS)
+
+UNATTRIBUTED = "unattributed"
+_PROJECT = str(PROJECT_ROOT)
+
+
+def _is_project_frame(filename: str) -> bool:
+    return filename.startswith(_PROJECT) and "site-packages" not in filename and ".venv" not in filename
+
+
+def blocking_site(stack: traceback.StackSummary) -> str:
+    """Innermost project frame (else the innermost frame) as "path:line function"."""
+    frame = next((f for f in reversed(stack) if _is_project_frame(f.filename)), stack[-1] if stack else None)
+    if frame is None:
+        return UNATTRIBUTED
+    path = frame.filename[len(_PROJECT):].lstrip("/") if _is_project_frame(frame.filename) else frame.filename
+    return f"{path}:{frame.lineno} {frame.name}"
+
+
+class LoopMonitor:
+    def __init__(self, interval: Optional[float] = None, block_threshold: Optional[float] = None, keep: Optional[int] = None):
+        cfg = settings.observability
+        self.interval = interval if interval is not None else cfg.loop_lag_interval
+        self.block_threshold = block_threshold if block_threshold is not None else cfg.loop_block_threshold
+        self.recent: Deque[Dict[str, object]] = deque(maxlen=keep if keep is not None else cfg.loop_block_keep)
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._beat = time.monotonic()  # When the probe last went to sleep
+        self._sampled_beat: Optional[float] = None  # Heartbeat the watchdog already reported
+        self._pending: Optional[Dict[str, object]] = None  # Sampled block, duration not known yet
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start probing the running loop (call from inside it)."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info("loop monitor started", extra={"interval": self.interval, "block_threshold": self.block_threshold})
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _probe(self):
+        while True:
+            start = time.monotonic()
+            self._beat = start
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - start - self.interval, 0.0)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG.observe(lag)
+            pending, self._pending = self._pending, None
+            if pending is None and lag < self.block_threshold:
+                continue
+            report = pending or {"site": UNATTRIBUTED, "stack": [], "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds")}
+            report["blocked_s"] = round(lag, 4)
+            self._record(report)
+
+    def _record(self, report: Dict[str, object]):
+        BLOCKING_CALLS.inc(site=report["site"])
+        BLOCKING_SECONDS.observe(report["blocked_s"], site=report["site"])
+        self.recent.append(report)
+        logger.warning("event loop blocked", extra={"site": report["site"], "blocked_s": report["blocked_s"]})
+
+    def _watch(self):
+        check = max(self.block_threshold / 4, 0.005)
+        while not self._stop.wait(check):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.block_threshold or beat == self._sampled_beat:
+                continue
+            self._sampled_beat = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            self._pending = {
+                "site": blocking_site(stack),
+                "stack": stack.format(),
+                "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "stalled_when_sampled_s": round(stalled, 4),
+            }
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "block_threshold": self.block_threshold,
+            "last_lag_s": round(self.last_lag, 4),
+            "max_lag_s": round(self.max_lag, 4),
+            "blocks": list(reversed(self.recent)),
+        }
+
+
+# Global instance
+loop_monitor = LoopMonitor()
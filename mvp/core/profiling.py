@@ -0,0 +1,229 @@
+"""
+Per-request sampling profiles (OBS_PROFILING_ENABLED=true).
+
+A search request sent with `X-Profile: 1` (or `?profile=1`) is profiled: a
+thread samples the event-loop thread's stack every `interval` seconds while
+the request runs, and the result is written under OBS_PROFILING_DIR as
+    <id>.speedscope.json   open in https://www.speedscope.app
+    <id>.collapsed.txt     folded stacks for flamegraph.pl / inferno
+The response carries the id in `X-Profile-Id`; /api/admin/profiles lists them.
+
+Samples are wall-clock: each is weighted by the time since the previous one,
+so code that holds the GIL (and delays the sampler) is not under-counted. The
+loop runs other requests as well, so a sample is only a stack when the
+profiled request's task is running. Otherwise it is
+"[awaiting]" (the loop is idle: the request waits on the DB, a provider, a
+worker thread) or "[other tasks]" (the loop is busy with someone else's work,
+which the request waits behind).
+
+With profiling disabled the middleware is not installed at all.
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from mvp.core.config import PROJECT_ROOT, settings
+from mvp.core.log import get_logger
+
+logger = get_logger(__name__)
+
+HEADER = b"x-profile"
+QUERY = "profile"
+AWAITING = "[awaiting]"
+OTHER_TASKS = "[other tasks]"
+SUFFIXES = (".speedscope.json", ".collapsed.txt")
+
+Frame = Tuple[str, str, int]  # function, file, first line
+Stack = Tuple[Frame, ...]
+
+_PROJECT = str(PROJECT_ROOT) + os.sep
+
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class RequestSampler:
+    """Samples the loop thread's stack while `task` runs, until stopped."""
+
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop, interval: float, root_code=None):
+        self.task = task
+        self.loop = loop
+        self.interval = interval
+        self.root_code = root_code  # Frames above this one (server, loop internals) are dropped
+        self.thread_id = threading.get_ident()
+        self.samples: Counter = Counter()  # Stack -> seconds
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = self.started
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            current = asyncio.current_task(self.loop)
+            if current is None:
+                self.samples[((AWAITING, "", 0),)] += elapsed
+            elif current is not self.task:
+                self.samples[((OTHER_TASKS, "", 0),)] += elapsed
+            else:
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    self.samples[self._stack(frame)] += elapsed
+
+    def _stack(self, frame) -> Stack:
+        frames: List[Frame] = []
+        while frame is not None:
+            code = frame.f_code
+            if code is self.root_code:
+                break
+            path = code.co_filename
+            frames.append((code.co_name, path[len(_PROJECT):] if path.startswith(_PROJECT) else path, code.co_firstlineno))
+            frame = frame.f_back
+        return tuple(reversed(frames))
+
+
+def collapsed(samples: Counter) -> str:
+    """Folded stacks: "outer;inner;leaf microseconds" per line."""
+    def label(frame: Frame) -> str:
+        name, path, line = frame
+        return (f"{name} ({path}:{line})" if path else name).replace(";", ",")
+    return "".join(f"{';'.join(label(f) for f in stack)} {round(seconds * 1e6)}\n" for stack, seconds in sorted(samples.items()))
+
+
+def speedscope(samples: Counter, name: str) -> Dict[str, object]:
+    """Speedscope "sampled" profile; weights are seconds of wall time."""
+    index: Dict[Frame, int] = {}
+    stacks, weights = [], []
+    for stack, seconds in samples.items():
+        stacks.append([index.setdefault(f, len(index)) for f in stack])
+        weights.append(seconds)
+    frames = [{"name": n, "file": p, "line": l} if p else {"name": n} for n, p, l in index]
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "search_appearance",
+        "name": name,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled", "name": name, "unit": "seconds",
+            "startValue": 0, "endValue": sum(weights),
+            "samples": stacks, "weights": weights,
+        }],
+    }
+
+
+def profile_dir() -> Path:
+    return Path(settings.observability.profiling_dir)
+
+
+def new_profile_id(method: str, path: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")  # Ids sort by time
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")
+    return f"{stamp}_{method.lower()}_{slug}_{uuid.uuid4().hex[:6]}"
+
+
+def write_profile(sampler: RequestSampler, profile_id: str, name: str):
+    """Write both formats, then prune the oldest profiles."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{profile_id}.speedscope.json").write_text(json.dumps(speedscope(sampler.samples, name)))
+    (directory / f"{profile_id}.collapsed.txt").write_text(collapsed(sampler.samples))
+    prune(settings.observability.profiling_keep)
+
+
+def list_profiles() -> List[Dict[str, object]]:
+    """Saved profiles, newest first."""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.speedscope.json"), reverse=True):
+        profile_id = path.name[:-len(".speedscope.json")]
+        try:
+            name = json.loads(path.read_text()).get("name", "")
+        except ValueError:
+            name = ""
+        profiles.append({
+            "id": profile_id,
+            "name": name,
+            "created": datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).isoformat(timespec="seconds"),
+            "files": [profile_id + s for s in SUFFIXES if (directory / (profile_id + s)).exists()],
+        })
+    return profiles
+
+
+def prune(keep: int):
+    for profile in list_profiles()[keep:]:
+        for name in profile["files"]:
+            (profile_dir() / name).unlink(missing_ok=True)
+
+
+def profile_file(name: str) -> Optional[Path]:
+    """Path of a saved profile file, or None (also for names outside the profile dir)."""
+    if not name.endswith(SUFFIXES) or "/" in name or "\\" in name or name.startswith("."):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI, so the endpoint runs in the same task the sampler watches."""
+
+    def __init__(self, app, paths: Optional[List[str]] = None, interval: Optional[float] = None):
+        self.app = app
+        cfg = settings.observability
+        self.paths = tuple(paths if paths is not None else cfg.profiling_paths)
+        self.interval = interval if interval is not None else cfg.profiling_interval
+
+    def _requested(self, scope) -> bool:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            return False
+        for key, value in scope["headers"]:
+            if key == HEADER:
+                return _flag(value.decode("latin-1"))
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(QUERY)
+        return bool(values) and _flag(values[0])
+
+    async def __call__(self, scope, receive, send):
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id(scope["method"], scope["path"])
+        status: Dict[str, Optional[int]] = {"code": None}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler = RequestSampler(asyncio.current_task(), asyncio.get_running_loop(), self.interval, root_code=ProfilingMiddleware.__call__.__code__)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            await asyncio.to_thread(sampler.stop)  # Joins the sampler thread; keep that off the event loop
+            name = f"{scope['method']} {scope['path']} -> {status['code']} in {sampler.duration * 1000:.0f} ms"
+            await asyncio.to_thread(write_profile, sampler, profile_id, name)
+            logger.info("request profiled", extra={"profile_id": profile_id, "path": scope["path"], "duration_ms": round(sampler.duration * 1000, 1)})
@@ -1,4 +1,4 @@
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Sequence
 from mvp.schema.models import PhotoProfile
 from mvp.annotator.client import VLMClient
 from mvp.search.aggregator import ProfileAggregator
@@ -6,9 +6,12 @@ from mvp.search.ranker import Ranker
 from mvp.core.embedder import ImageEmbedder
 
 class AppState:
-    db_profiles: List[PhotoProfile] = []
+    db_profiles: Sequence[PhotoProfile] = []  # list, or a memory-mapped ProfileSnapshot
     vlm_client: Optional[VLMClient] = None
     ranker: Optional[Ranker] = None
+    db_matrix: Any = None  # ProfileMatrix over db_profiles, built on first search
+    sharded_ranker: Any = None  # ShardedRanker over db_matrix when SEARCH_SHARD_COUNT > 1
+    vector_index: Any = None  # VectorIndex over db_matrix.profiles embeddings, built on first hybrid search
     aggregator: Optional[ProfileAggregator] = None
     embedder: Optional[ImageEmbedder] = None
     face_verifier: Any = None # FaceVerifier instance
@@ -0,0 +1,193 @@
+"""
+Mock VLM provider: no network, for load tests and offline development.
+
+Each call waits for a latency drawn from a configurable distribution, then
+fails or answers 429 at configurable rates, or returns a profile derived from a
+hash of the image bytes (or prompt): the same input always gives the same
+profile, whatever the upload's file name. Latencies and failures come from a
+seeded generator, so a run with the same seed and call order behaves the same.
+
+MOCK_VLM_ENABLED=true registers the "mock" provider in place of the real ones
+and makes the /api/search upload analysis use MockVLMClient. Knobs: MOCK_VLM_*.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from mvp.core.config import MockVLMConfig, settings
+from mvp.providers.base import VLMProvider, VLMResponse
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS
+from mvp.schema.models import PhotoProfile
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class MockProviderError(Exception):
+    """Simulated provider failure (5xx, timeout)."""
+    status_code = 500
+
+
+class MockRateLimitError(MockProviderError):
+    """Simulated 429 Too Many Requests."""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MockBehaviour:
+    """Latency, failure and output model shared by the async provider and the sync client."""
+
+    def __init__(self, config: Optional[MockVLMConfig] = None):
+        self.config = config or settings.mock_vlm
+        if self.config.latency_distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.config.latency_distribution} (expected one of {DISTRIBUTIONS})")
+        self.rng = random.Random(self.config.seed)
+        self.calls: Deque[float] = deque()  # Call times inside the quota window
+        self._lock = threading.Lock()  # The sync client may be called from worker threads
+
+    def sample_latency(self) -> float:
+        """Seconds for one call."""
+        cfg = self.config
+        base = max(cfg.latency_ms, 0.0) / 1000.0
+        if cfg.latency_distribution == "fixed" or base == 0:
+            return base
+        if cfg.latency_distribution == "uniform":
+            return max(self.rng.uniform(base * (1 - cfg.latency_spread), base * (1 + cfg.latency_spread)), 0.0)
+        if cfg.latency_distribution == "exponential":
+            return self.rng.expovariate(1.0 / base)
+        return base * math.exp(self.rng.gauss(0.0, cfg.latency_spread))
+
+    def plan(self) -> Tuple[float, Optional[MockProviderError]]:
+        """
+        Latency and outcome of the next call. A 429 comes back after a tenth of
+        the latency (the provider rejects before doing work); an error after all of it.
+        """
+        cfg = self.config
+        with self._lock:
+            latency = self.sample_latency()
+            roll = self.rng.random()
+            if cfg.quota_rpm is not None:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= 60.0:
+                    self.calls.popleft()
+                if len(self.calls) >= cfg.quota_rpm:
+                    wait = 60.0 - (now - self.calls[0])
+                    return latency / 10, MockRateLimitError(f"Mock quota of {cfg.quota_rpm} requests/min exceeded", retry_after=wait)
+                self.calls.append(now)
+        if roll < cfg.rate_limit_rate:
+            return latency / 10, MockRateLimitError("Mock rate limit (429)", retry_after=cfg.retry_after)
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            return latency, MockProviderError("Mock provider error (simulated)")
+        return latency, None
+
+    def profile_data(self, key: str) -> Dict[str, Any]:
+        """Attribute values and confidences, a pure function of key and seed."""
+        digest = hashlib.sha256(f"{self.config.seed}:{key}".encode()).digest()
+        data: Dict[str, Any] = {}
+        for i, f in enumerate(ATTRIBUTE_FIELDS):
+            byte = digest[i % len(digest)] ^ i
+            data.setdefault(f.category, {})[f.field] = {
+                "value": f.members[byte % len(f.members)].value,
+                "confidence": round(0.5 + (byte % 50) / 100, 2),
+            }
+        return data
+
+    def profile_json(self, image_path: str) -> str:
+        try:
+            with open(image_path, "rb") as f:
+                key = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            key = hashlib.sha1(image_path.encode()).hexdigest()
+        return json.dumps({"id": key[:16], "image_path": image_path, **self.profile_data(key)})
+
+
+class MockProvider(VLMProvider):
+    """VLM provider with simulated latency, errors and 429s, and deterministic profiles."""
+
+    def __init__(
+        self,
+        api_key: str = "not-needed",
+        model: str = "mock-vlm",
+        base_url: Optional[str] = None,
+        config: Optional[MockVLMConfig] = None,
+        **kwargs
+    ):
+        super().__init__(api_key=api_key, model=model, base_url=base_url, **kwargs)
+        self.behaviour = MockBehaviour(config)
+
+    async def _call(self):
+        latency, error = self.behaviour.plan()
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        return latency
+
+    async def analyze_image(
+        self,
+        image_path: str,
+        system_prompt: str,
+        user_prompt: Optional[str] = None,
+        **kwargs
+    ) -> VLMResponse:
+        """Deterministic profile for the image after a simulated delay."""
+        latency = await self._call()
+        raw_text = self.behaviour.profile_json(image_path)
+        return VLMResponse(
+            raw_text=raw_text,
+            profile=await self.parse_text_to_profile(raw_text),
+            provider="mock",
+            model=self.model,
+            tokens_used=len(raw_text) // 4,
+            latency_ms=latency * 1000,
+            metadata={"simulated": True},
+        )
+
+    async def generate_text(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Profile JSON (without id/image_path) for a text prompt, as the prompt parser expects."""
+        await self._call()
+        return json.dumps(self.behaviour.profile_data(prompt))
+
+    async def parse_text_to_profile(self, text: str) -> PhotoProfile:
+        try:
+            return PhotoProfile(**json.loads(text))
+        except Exception as e:
+            raise ValueError(f"Failed to parse mock response: {e}")
+
+    async def health_check(self) -> bool:
+        return True
+
+
+class MockVLMClient:
+    """
+    Drop-in for mvp.annotator.client.VLMClient. Like the real client it blocks
+    the calling thread for the whole call, so load tests see the same event-loop
+    behaviour as production.
+    """
+
+    def __init__(self, config: Optional[MockVLMConfig] = None):
+        self.behaviour = MockBehaviour(config)
+        self.model = "mock-vlm"
+
+    def analyze_image(self, image_path: str, system_prompt: str, retries: int = 3) -> str:
+        last_exception = None
+        for attempt in range(retries):
+            latency, error = self.behaviour.plan()
+            time.sleep(latency)
+            if error is None:
+                return self.behaviour.profile_json(image_path)
+            print(f"Attempt {attempt+1}/{retries} failed: {error}")
+            last_exception = error
+        raise last_exception
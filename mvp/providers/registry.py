@@ -13,7 +13,9 @@ from mvp.providers.anthropic_provider import AnthropicProvider
 from mvp.providers.gemini_provider import GeminiProvider
 from mvp.providers.openrouter_provider import OpenRouterProvider
 from mvp.providers.ollama_provider import OllamaProvider
+from mvp.providers.mock_provider import MockProvider
 from mvp.core.config import settings, ProviderConfig
+from mvp.core.metrics import PROVIDER_REQUESTS, PROVIDER_SECONDS, PROVIDER_TOKENS
 
 
 class RateLimiter:
@@ -63,6 +65,7 @@ class ProviderRegistry:
         'gemini': GeminiProvider,
         'openrouter': OpenRouterProvider,
         'ollama': OllamaProvider,
+        'mock': MockProvider,
     }
     
     def __init__(self):
@@ -157,6 +160,7 @@ class ProviderRegistry:
             # Check health
             if not await self._check_health(provider_name):
                 print(f"Skipping unhealthy provider: {provider_name}")
+                PROVIDER_REQUESTS.inc(provider=provider_name, outcome="skipped")
                 continue
             
             try:
@@ -179,10 +183,13 @@ class ProviderRegistry:
                 
                 # Update stats
                 self.stats[provider_name]['successes'] += 1
+                PROVIDER_REQUESTS.inc(provider=provider_name, outcome="success")
                 if response.latency_ms:
                     self.stats[provider_name]['total_latency_ms'] += response.latency_ms
+                    PROVIDER_SECONDS.observe(response.latency_ms / 1000.0, provider=provider_name)
                 if response.tokens_used:
                     self.stats[provider_name]['total_tokens'] += response.tokens_used
+                    PROVIDER_TOKENS.inc(response.tokens_used, provider=provider_name)
                 
                 print(f"✓ Success with {provider_name} ({response.latency_ms:.0f}ms)")
                 
@@ -191,6 +198,7 @@ class ProviderRegistry:
             except Exception as e:
                 print(f"✗ {provider_name} failed: {e}")
                 self.stats[provider_name]['failures'] += 1
+                PROVIDER_REQUESTS.inc(provider=provider_name, outcome="failure")
                 self.health_status[provider_name] = False  # Mark as unhealthy
                 last_exception = e
                 continue
@@ -0,0 +1,132 @@
+"""
+Integer codes for profile attributes.
+
+Each attribute ("basic.gender", "hair.color", ...) maps its enum members to small
+int codes in declaration order, so profiles can be stored and compared as typed
+columns/arrays instead of nested JSON.
+"""
+import hashlib
+import json
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Type, get_args
+
+from mvp.schema.models import (
+    PhotoProfile, AttributeScore,
+    BasicAttributesModel, FaceAttributesModel,
+    HairAttributesModel, ExtraAttributesModel, VibeAttributesModel
+)
+
+CATEGORIES: Dict[str, Type] = {
+    "basic": BasicAttributesModel,
+    "face": FaceAttributesModel,
+    "hair": HairAttributesModel,
+    "extra": ExtraAttributesModel,
+    "vibe": VibeAttributesModel,
+}
+
+
+class AttributeField:
+    """One scalar attribute of a PhotoProfile and its enum <-> code mapping."""
+
+    def __init__(self, category: str, field: str, score_type: Type[AttributeScore], enum_type: Type[Enum]):
+        self.category = category
+        self.field = field
+        self.key = f"{category}.{field}"
+        self.column = f"{category}_{field}"
+        self.score_type = score_type
+        self.enum_type = enum_type
+        self.members: List[Enum] = list(enum_type)
+        self.codes: Dict[str, int] = {m.value: i for i, m in enumerate(self.members)}
+
+    def encode(self, value: Any) -> Optional[int]:
+        if value is None:
+            return None
+        raw = value.value if hasattr(value, "value") else value
+        return self.codes.get(raw)
+
+    def decode(self, code: Optional[int]) -> Optional[Enum]:
+        if code is None or code < 0 or code >= len(self.members):
+            return None
+        return self.members[code]
+
+    def __repr__(self) -> str:
+        return f"AttributeField({self.key}, {len(self.members)} values)"
+
+
+def _build_fields() -> List[AttributeField]:
+    fields = []
+    for cat_name, cat_model in CATEGORIES.items():
+        for field_name, info in cat_model.model_fields.items():
+            # Optional[AttributeScore[EnumT]] -> AttributeScore[EnumT] -> EnumT
+            score_type = next(a for a in get_args(info.annotation) if a is not type(None))
+            enum_type = score_type.model_fields["value"].annotation
+            fields.append(AttributeField(cat_name, field_name, score_type, enum_type))
+    return fields
+
+
+# All scalar attributes in stable (category, declaration) order
+ATTRIBUTE_FIELDS: List[AttributeField] = _build_fields()
+FIELDS_BY_KEY: Dict[str, AttributeField] = {f.key: f for f in ATTRIBUTE_FIELDS}
+
+
+def schema_fingerprint() -> str:
+    """Fingerprint of the code tables; codes stored under another fingerprint decode to the wrong values."""
+    spec = [(f.key, [m.value for m in f.members]) for f in ATTRIBUTE_FIELDS]
+    return hashlib.blake2b(json.dumps(spec).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def encode_profile(profile: Any) -> Dict[str, Any]:
+    """
+    Flatten a PhotoProfile (or its JSON dict form) into {column: code, column_conf: confidence}.
+    Missing or unknown values become None.
+    """
+    is_dict = isinstance(profile, dict)
+    row: Dict[str, Any] = {}
+    for f in ATTRIBUTE_FIELDS:
+        value, confidence = None, None
+        if is_dict:
+            attr = (profile.get(f.category) or {}).get(f.field)
+            if isinstance(attr, dict):
+                value, confidence = attr.get("value"), attr.get("confidence")
+        else:
+            cat_obj = getattr(profile, f.category, None)
+            attr = getattr(cat_obj, f.field, None) if cat_obj else None
+            if attr:
+                value, confidence = attr.value, attr.confidence
+
+        code = f.encode(value)
+        row[f.column] = code
+        row[f"{f.column}_conf"] = float(confidence) if code is not None and confidence is not None else None
+    return row
+
+
+def decode_profile(row: Any, id: Optional[str] = None, image_path: Optional[str] = None) -> PhotoProfile:
+    """
+    Build a PhotoProfile from a row with code/confidence columns (mapping or attribute access).
+    Values come from a typed table, so Pydantic validation is skipped.
+    """
+    get = row.get if isinstance(row, dict) else (lambda k: getattr(row, k, None))
+    categories: Dict[str, Dict[str, AttributeScore]] = {name: {} for name in CATEGORIES}
+    for f in ATTRIBUTE_FIELDS:
+        member = f.decode(get(f.column))
+        if member is None:
+            continue
+        confidence = get(f"{f.column}_conf")
+        categories[f.category][f.field] = f.score_type.model_construct(
+            value=member, confidence=1.0 if confidence is None else confidence
+        )
+
+    return PhotoProfile.model_construct(
+        id=id,
+        image_path=image_path,
+        embedding=None,
+        **{name: CATEGORIES[name].model_construct(**attrs) for name, attrs in categories.items()}
+    )
+
+
+def column_for(key: str) -> Tuple[str, AttributeField]:
+    """Resolve "basic.gender" to its code column name and field spec."""
+    f = FIELDS_BY_KEY.get(key)
+    if f is None:
+        raise KeyError(f"Unknown attribute: {key}")
+    return f.column, f
@@ -0,0 +1,124 @@
+"""
+Embeddings as packed float32/float16 vectors.
+
+`PhotoProfile.embedding` holds a 1-D NumPy array instead of a list of Python
+floats: a 512-d CLIP vector is 2 KB (1 KB as float16) instead of ~16 KB of
+float objects. Arrays built from stored bytes are `np.frombuffer` views, so
+loading from `StoredPhoto.embedding` does not copy.
+
+Input accepts an array, raw float32 bytes, a list of floats (metadata files,
+older clients) or the base64 form below.
+
+JSON output is opt-in. By default embeddings serialize as null, so API
+responses carry no vectors. A request can ask for them with
+`?embeddings=base64` (or the `X-Embeddings` header), which gives
+`{"dtype": "float32", "base64": "..."}`, or with `?embeddings=list`, which
+gives a list of floats. Python code passes `context={"embeddings": "base64"}`
+to `model_dump`. In Python mode `model_dump` returns the array itself.
+"""
+import base64
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Annotated, Any, Iterator, Optional
+
+import numpy as np
+from pydantic import PlainSerializer, PlainValidator, SerializationInfo, WithJsonSchema
+
+DTYPES = {"float32": np.float32, "float16": np.float16}
+FORMATS = ("none", "base64", "list")
+
+_format: ContextVar[str] = ContextVar("embedding_format", default="none")
+
+
+def to_array(value: Any, dtype: Optional[str] = None) -> Optional[np.ndarray]:
+    """1-D float32/float16 array from any accepted input (bytes are viewed, not copied)."""
+    if value is None:
+        return None
+    if isinstance(value, np.ndarray):
+        vector = value if value.dtype in (np.float32, np.float16) else value.astype(np.float32)
+        return vector.reshape(-1)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=DTYPES[dtype or "float32"])
+    if isinstance(value, dict):
+        return np.frombuffer(base64.b64decode(value["base64"]), dtype=DTYPES[value.get("dtype", "float32")])
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype=DTYPES[dtype or "float32"])
+    return np.asarray(value, dtype=np.float32).reshape(-1)
+
+
+def to_bytes(value: Any, dtype: str = "float32") -> Optional[bytes]:
+    """Packed bytes for StoredPhoto.embedding."""
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown embedding dtype: {dtype} (expected one of {tuple(DTYPES)})")
+    vector = to_array(value)
+    return None if vector is None else vector.astype(DTYPES[dtype], copy=False).tobytes()
+
+
+def embeddings_equal(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> bool:
+    if a is None or b is None:
+        return a is b
+    return np.array_equal(a, b)
+
+
+def dtype_name(vector: np.ndarray) -> str:
+    return "float16" if vector.dtype == np.float16 else "float32"
+
+
+def encode_json(vector: Optional[np.ndarray], fmt: str) -> Any:
+    if vector is None or fmt == "none":
+        return None
+    if fmt == "base64":
+        return {"dtype": dtype_name(vector), "base64": base64.b64encode(vector.tobytes()).decode("ascii")}
+    if fmt == "list":
+        return vector.astype(np.float32).tolist()
+    raise ValueError(f"Unknown embedding format: {fmt} (expected one of {FORMATS})")
+
+
+def _validate(value: Any) -> Optional[np.ndarray]:
+    try:
+        return to_array(value)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid embedding: {e}")
+
+
+def _serialize(vector: Optional[np.ndarray], info: SerializationInfo) -> Any:
+    if not info.mode_is_json():
+        return vector
+    context = info.context if isinstance(info.context, dict) else {}
+    return encode_json(vector, context.get("embeddings") or _format.get())
+
+
+Embedding = Annotated[
+    Optional[np.ndarray],
+    PlainValidator(_validate),
+    PlainSerializer(_serialize),
+    WithJsonSchema({
+        "anyOf": [
+            {"type": "null"},
+            {"type": "object", "properties": {"dtype": {"enum": list(DTYPES)}, "base64": {"type": "string"}}},
+            {"type": "array", "items": {"type": "number"}},
+        ],
+        "description": "Image embedding; null unless requested with ?embeddings=base64|list",
+    }),
+]
+
+
+def current_format() -> str:
+    return _format.get()
+
+
+def parse_format(value: Optional[str]) -> str:
+    fmt = (value or "none").strip().lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown embedding format: {value} (expected one of {FORMATS})")
+    return fmt
+
+
+@contextmanager
+def embedding_format(fmt: str) -> Iterator[None]:
+    """JSON format for embeddings serialized inside the block (one request)."""
+    token = _format.set(parse_format(fmt))
+    try:
+        yield
+    finally:
+        _format.reset(token)
@@ -7,6 +7,7 @@ from .attributes import (
     FacialHair, SkinTone, Glasses, Tattoos,
     Style, Vibe
 )
+from .embedding import Embedding, embeddings_equal
 
 T = TypeVar('T')
 
@@ -47,13 +48,21 @@ class VibeAttributesModel(BaseModel):
 class PhotoProfile(BaseModel):
     id: Optional[str] = Field(default=None)
     image_path: Optional[str] = Field(default=None)
-    embedding: Optional[List[float]] = Field(default=None, description="Vector embedding of the image")
+    embedding: Embedding = Field(default=None, description="Vector embedding of the image (float32/float16 array)")
     basic: BasicAttributesModel = Field(default_factory=BasicAttributesModel)
     face: FaceAttributesModel = Field(default_factory=FaceAttributesModel)
     hair: HairAttributesModel = Field(default_factory=HairAttributesModel)
     extra: ExtraAttributesModel = Field(default_factory=ExtraAttributesModel)
     vibe: VibeAttributesModel = Field(default_factory=VibeAttributesModel)
 
+    def __eq__(self, other: object) -> bool:
+        # The array embedding has no single truth value, so it is compared on its own
+        if not isinstance(other, PhotoProfile):
+            return NotImplemented
+        fields = {k: v for k, v in self.__dict__.items() if k != "embedding"}
+        other_fields = {k: v for k, v in other.__dict__.items() if k != "embedding"}
+        return type(self) is type(other) and fields == other_fields and embeddings_equal(self.embedding, other.embedding)
+
 class SearchQuery(BaseModel):
     positive_ids: List[str]
     negative_ids: List[str] = Field(default_factory=list)
@@ -1,12 +1,126 @@
-from typing import List, Dict, Any, Type
-from collections import defaultdict
+from typing import List, Dict, Any, Type, Hashable, Optional, Tuple
+from collections import OrderedDict
+from uuid import uuid4
+import numpy as np
 from pydantic import BaseModel
+from mvp.core.config import settings
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS, encode_profile
 from mvp.schema.models import (
     PhotoProfile, AttributeScore, 
     BasicAttributesModel, FaceAttributesModel, 
     HairAttributesModel, ExtraAttributesModel, VibeAttributesModel
 )
 
+NEGATIVE_WEIGHT = 0.8  # Negatives are slightly weaker votes than positives
+
+# Flat layout: field j owns tally slots FIELD_OFFSETS[j] .. FIELD_OFFSETS[j + 1]
+FIELD_OFFSETS = np.cumsum([0] + [len(f.members) for f in ATTRIBUTE_FIELDS])
+
+
+class AggregationState:
+    """
+    Rolling vote tallies for one search session.
+
+    Every example is encoded once into (slot, confidence) pairs; adding or removing
+    it touches only its own ~20 slots, and the target profile is an argmax per
+    field segment. Produces the same targets as rebuilding from all examples.
+    """
+
+    def __init__(self):
+        size = int(FIELD_OFFSETS[-1])
+        self.scores = np.zeros(size, dtype=np.float64)
+        self.votes = np.zeros(size, dtype=np.int32)  # Slot seen at all (value may net to <= 0)
+        self.items: Dict[Hashable, Tuple[np.ndarray, np.ndarray, float]] = OrderedDict()
+        self.profiles: Dict[Hashable, PhotoProfile] = {}
+
+    @staticmethod
+    def _encode(profile: PhotoProfile) -> Tuple[np.ndarray, np.ndarray]:
+        row = encode_profile(profile)
+        slots, confidences = [], []
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            code = row[f.column]
+            if code is not None:
+                slots.append(FIELD_OFFSETS[j] + code)
+                confidences.append(row[f"{f.column}_conf"] or 0.0)
+        return np.asarray(slots, dtype=np.intp), np.asarray(confidences, dtype=np.float64)
+
+    def _add(self, profile: PhotoProfile, weight: float, key: Optional[Hashable]) -> Hashable:
+        key = key if key is not None else uuid4().hex
+        if key in self.items:
+            self.remove(key)
+        slots, confidences = self._encode(profile)
+        # Slots within one profile are unique (one per field), so plain fancy-index += is safe
+        self.scores[slots] += weight * confidences
+        self.votes[slots] += 1
+        self.items[key] = (slots, confidences, weight)
+        self.profiles[key] = profile
+        return key
+
+    def add_positive(self, profile: PhotoProfile, key: Optional[Hashable] = None) -> Hashable:
+        return self._add(profile, 1.0, key)
+
+    def add_negative(self, profile: PhotoProfile, key: Optional[Hashable] = None) -> Hashable:
+        return self._add(profile, -NEGATIVE_WEIGHT, key)
+
+    def remove(self, key: Hashable) -> bool:
+        item = self.items.pop(key, None)
+        if item is None:
+            return False
+        slots, confidences, weight = item
+        self.scores[slots] -= weight * confidences
+        self.votes[slots] -= 1
+        del self.profiles[key]
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _best_code(self, j: int) -> Optional[int]:
+        start, end = FIELD_OFFSETS[j], FIELD_OFFSETS[j + 1]
+        seen = self.votes[start:end] > 0
+        if not seen.any():
+            return None
+        scores = np.where(seen, self.scores[start:end], -np.inf)
+        return int(np.argmax(scores))
+
+    def target_profile(self) -> PhotoProfile:
+        categories: Dict[str, Dict[str, AttributeScore]] = {name: {} for name in ProfileAggregator.CATEGORIES}
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            code = self._best_code(j)
+            if code is not None:
+                # Confidence 1.0 marks "this is what we want"
+                categories[f.category][f.field] = f.score_type(value=f.members[code], confidence=1.0)
+
+        return PhotoProfile(
+            id="target_aggregated",
+            image_path="aggregated",
+            **{name: model(**categories[name]) for name, model in ProfileAggregator.CATEGORIES.items()}
+        )
+
+    def target_distribution(self) -> Dict[str, np.ndarray]:
+        """
+        Soft target: per attribute key ("hair.color"), a probability vector over enum codes
+        proportional to the positive net votes. Fields without votes are omitted.
+        """
+        distribution = {}
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            code = self._best_code(j)
+            if code is None:
+                continue
+            start, end = FIELD_OFFSETS[j], FIELD_OFFSETS[j + 1]
+            weights = np.clip(self.scores[start:end], 0.0, None)
+            total = weights.sum()
+            if total <= 0:
+                weights = np.zeros(end - start)
+                weights[code] = 1.0
+                total = 1.0
+            distribution[f.key] = weights / total
+        return distribution
+
+
 class ProfileAggregator:
     CATEGORIES = {
         "basic": BasicAttributesModel, 
@@ -16,68 +130,25 @@ class ProfileAggregator:
         "vibe": VibeAttributesModel
     }
 
-    @staticmethod
-    def _aggregate_attribute(
-        positives: List[PhotoProfile], 
-        negatives: List[PhotoProfile], 
-        category: str, 
-        field: str
-    ) -> AttributeScore:
-        scores = defaultdict(float)
-        
-        # Add weights from positives
-        for p in positives:
-            cat_obj = getattr(p, category, None)
-            if not cat_obj: continue
-            attr = getattr(cat_obj, field, None)
-            if attr and attr.value:
-                # Use raw string value for aggregation
-                val = attr.value.value if hasattr(attr.value, 'value') else attr.value
-                scores[val] += attr.confidence
-
-        # Subtract weights from negatives
-        for n in negatives:
-            cat_obj = getattr(n, category, None)
-            if not cat_obj: continue
-            attr = getattr(cat_obj, field, None)
-            if attr and attr.value:
-                val = attr.value.value if hasattr(attr.value, 'value') else attr.value
-                # Penalize, but don't let it go below zero too easily if it was strong positive
-                # Penalty weight 0.5 implies negatives are half as strong 'votes' against
-                scores[val] -= (attr.confidence * 0.8)
-
-        if not scores:
-            return None
+    def __init__(self):
+        # Rolling state per search session, least recently used evicted first
+        self.sessions: "OrderedDict[str, AggregationState]" = OrderedDict()
 
-        # Filter out negative scores and find max
-        valid_scores = {k: v for k, v in scores.items() if v > 0}
-        if not valid_scores:
-            # Fallback to the raw max even if negative, or just return None?
-            # If everything is negative, we probably shouldn't search for it.
-            # But let's pick the "least negative" or just the top one.
-            best_val = max(scores.items(), key=lambda x: x[1])[0]
-        else:
-            best_val = max(valid_scores.items(), key=lambda x: x[1])[0]
+    def session_state(self, session_id: str) -> AggregationState:
+        """Get or create the incremental aggregation state for a search session."""
+        agg = self.sessions.pop(session_id, None) or AggregationState()
+        self.sessions[session_id] = agg
+        while len(self.sessions) > settings.search.max_aggregation_sessions:
+            self.sessions.popitem(last=False)
+        return agg
 
-        # Return constructed score. 
-        # We set confidence to 1.0 for the Target Profile to indicate "This is what we want".
-        return AttributeScore(value=best_val, confidence=1.0)
+    def drop_session(self, session_id: str):
+        self.sessions.pop(session_id, None)
 
     def build_target_profile(self, positives: List[PhotoProfile], negatives: List[PhotoProfile]) -> PhotoProfile:
-        result_data = {
-            "id": "target_aggregated",
-            "image_path": "aggregated",
-        }
-
-        # Iterate over each category and field
-        for cat_name, cat_model in self.CATEGORIES.items():
-            cat_data = {}
-            # Inspect fields of the Pydantic model
-            for field_name in cat_model.model_fields.keys():
-                score = self._aggregate_attribute(positives, negatives, cat_name, field_name)
-                if score:
-                    cat_data[field_name] = score
-            
-            result_data[cat_name] = cat_model(**cat_data)
-
-        return PhotoProfile(**result_data)
+        agg = AggregationState()
+        for p in positives:
+            agg.add_positive(p)
+        for n in negatives:
+            agg.add_negative(n)
+        return agg.target_profile()
@@ -0,0 +1,133 @@
+"""
+Parallel scoring kernel.
+
+score_compiled runs one NumPy gather over the whole collection in one thread.
+Here the candidate rows are split into chunks that are scored concurrently:
+
+- numba (optional, `pip install .[fast]`): a jitted loop over candidates with
+  `prange`, compiled with nogil so it runs on all cores without the GIL.
+- NumPy fallback: chunks on a shared thread pool. Gathers, arithmetic and
+  reductions release the GIL, so threads scale with cores; chunking also caps
+  the [rows, fields, 4] temporary at chunk size.
+
+auto_tune picks the thread count from the core count and collection size:
+small collections stay single-threaded, since thread hand-off costs more than
+it saves below a few tens of thousands of rows.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+from mvp.core.config import settings
+from mvp.search.vectorized import NEGATIVE_PENALTY, ProfileMatrix, score_compiled
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_kernel = None
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def auto_tune(n_rows: int, threads: Optional[int] = None, chunk_size: Optional[int] = None) -> Tuple[int, int]:
+    """(threads, chunk_size) for scoring n_rows candidates; an explicit thread count is only capped by n_rows."""
+    cfg = settings.search
+    if not threads:
+        threads = cfg.score_threads or cpu_count()
+        # Each thread should get at least score_min_rows_per_thread rows
+        threads = min(threads, n_rows // max(1, cfg.score_min_rows_per_thread))
+    threads = max(1, min(threads, n_rows))
+    chunk_size = chunk_size or cfg.score_chunk_size
+    # At least one chunk per thread, so every thread has work
+    chunk_size = max(1, min(chunk_size, -(-n_rows // threads))) if n_rows else chunk_size
+    return threads, chunk_size
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=cpu_count(), thread_name_prefix="score")
+        return _pool
+
+
+def shutdown_thread_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def _numba_kernel():
+    """Compile the numba kernel on first use (None if numba is missing or disabled)."""
+    global _kernel
+    if numba is None or settings.search.score_kernel == "numpy":
+        return None
+    if _kernel is None:
+        @numba.njit(parallel=True, nogil=True, cache=True, fastmath=True)
+        def kernel(table, codes, conf_sqrt, penalty, out):
+            n, fields = codes.shape
+            for i in numba.prange(n):
+                pos_sim = pos_w = neg_sim = neg_w = 0.0
+                for j in range(fields):
+                    code = codes[i, j]
+                    if code < 0:
+                        continue
+                    pos_sim += table[j, code, 0] * conf_sqrt[i, j]
+                    pos_w += table[j, code, 1]
+                    neg_sim += table[j, code, 2] * conf_sqrt[i, j]
+                    neg_w += table[j, code, 3]
+                score = 0.0
+                if pos_w > 0:
+                    score = pos_sim / pos_w
+                    if neg_w > 0:
+                        score -= penalty * neg_sim / neg_w
+                out[i] = max(0.0, score)
+        _kernel = kernel
+    return _kernel
+
+
+def score_parallel(
+    table: np.ndarray,
+    matrix: ProfileMatrix,
+    threads: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> np.ndarray:
+    """score_compiled over all cores; same scores (float32), same order."""
+    n = len(matrix)
+    threads, chunk_size = auto_tune(n, threads, chunk_size)
+
+    kernel = _numba_kernel()
+    if kernel is not None and n:
+        out = np.empty(n, dtype=np.float32)
+        numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+        kernel(table, matrix.codes, matrix.conf_sqrt, NEGATIVE_PENALTY, out)
+        return out
+
+    if threads <= 1 or n <= chunk_size:
+        return score_compiled(table, matrix)
+
+    out = np.empty(n, dtype=np.float32)
+    starts = range(0, n, chunk_size)
+
+    def score_chunks(first: int):
+        # Thread `first` takes every threads-th chunk; each writes its own slice of `out`
+        for start in starts[first::threads]:
+            out[start:start + chunk_size] = score_compiled(table, matrix.rows(start, start + chunk_size))
+
+    # list() waits for every thread and re-raises worker errors
+    list(get_thread_pool().map(score_chunks, range(threads)))
+    return out
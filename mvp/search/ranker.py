@@ -1,6 +1,11 @@
-from typing import Dict, Any, Type, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, Type, List, Mapping, Optional, Sequence, Union
+import numpy as np
 from mvp.schema.models import PhotoProfile
 from mvp.core.similarity import calculate_single_sim
+from mvp.search.kernel import score_parallel
+from mvp.search.vectorized import ProfileMatrix, SoftTarget
+from mvp.search.weights import WeightKey, compile_weights, weight_key
 # Import all enums to ensure they are registered/available if needed, 
 # though we rely on the object's type.
 
@@ -32,15 +37,23 @@ class Ranker:
         "vibe.vibe": 0.5
     }
 
+    @classmethod
+    def resolve_weights(cls, weights: Optional[Mapping[str, float]] = None) -> Dict[str, float]:
+        """
+        DEFAULT_WEIGHTS with overrides applied, e.g. a user's weight profile.
+        Merged once per distinct override set; the result is shared, don't mutate it.
+        """
+        if not weights:
+            return cls.DEFAULT_WEIGHTS
+        return _merged_weights(weight_key(weights))
+
     def score_candidate(self, target: PhotoProfile, candidate: PhotoProfile, weights: Dict[str, float] = None, negative_target: Optional[PhotoProfile] = None) -> float:
         """
         Calculates a weighted similarity score between a target profile and a candidate.
         Returns visual similarity on scale 0.0 to 1.0.
         If negative_target is provided, subtracts its similarity from the score.
         """
-        final_weights = self.DEFAULT_WEIGHTS.copy()
-        if weights:
-            final_weights.update(weights)
+        final_weights = self.resolve_weights(weights)
             
         total_score = 0.0
         total_weight = 0.0
@@ -130,6 +143,28 @@ class Ranker:
             
         return max(0.0, base_score - neg_penalty)
 
+    def score_collection(
+        self,
+        target: Union[PhotoProfile, SoftTarget],
+        candidates: Union[ProfileMatrix, Sequence[PhotoProfile]],
+        weights: Dict[str, float] = None,
+        negative_target: Optional[PhotoProfile] = None
+    ) -> np.ndarray:
+        """
+        Vectorized score_candidate over a whole collection, one score per candidate.
+        A SoftTarget carries its own negative side; for a PhotoProfile target the
+        optional negative_target is used.
+        """
+        # Weighted distance tables are compiled once per weight profile and cached
+        tables = compile_weights(self.resolve_weights(weights))
+
+        if not isinstance(target, SoftTarget):
+            target = SoftTarget.from_profile(target, negative_target)
+        if not isinstance(candidates, ProfileMatrix):
+            candidates = ProfileMatrix.from_profiles(candidates)
+        # Chunked across cores (numba when installed) for large collections
+        return score_parallel(target.compile(tables), candidates)
+
     def filter_candidates(self, candidates: List[PhotoProfile], criteria: Dict[str, Any]) -> List[PhotoProfile]:
         """
         Hard filtering of candidates. 
@@ -168,3 +203,10 @@ class Ranker:
                 filtered.append(cand)
                 
         return filtered
+
+
+@lru_cache(maxsize=256)
+def _merged_weights(overrides: WeightKey) -> Dict[str, float]:
+    merged = Ranker.DEFAULT_WEIGHTS.copy()
+    merged.update(overrides)
+    return merged
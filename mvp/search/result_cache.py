@@ -0,0 +1,150 @@
+"""
+Search result cache.
+
+Entries are keyed by a canonical hash of everything that determines a ranking:
+target, negative target, weights, filters and the collection id + version. Only
+the top-N (id, score) pairs are kept, so repeated and paginated searches skip
+scoring entirely. Writers bump the collection version on ingest, which makes
+older entries unreachable; they are dropped right away to free memory.
+
+Versions live in process memory, so one worker never sees another's bumps. With
+API_WORKERS > 1 the cache (and the per-collection vector indexes keyed by the
+same versions) is therefore disabled rather than left to serve stale rankings.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from mvp.core.config import settings
+from mvp.core.metrics import CACHE_REQUESTS
+from mvp.schema.attribute_codes import encode_profile
+
+CachedResults = List[Tuple[Any, float]]
+
+
+def _canonical(obj: Any) -> Any:
+    """JSON-able, order-independent form of a target, weights or filters."""
+    if obj is None:
+        return None
+    if hasattr(obj, "positive") and hasattr(obj, "negative"):
+        # SoftTarget
+        return {
+            "positive": {k: [round(float(x), 6) for x in v] for k, v in sorted(obj.positive.items())},
+            "negative": {k: [round(float(x), 6) for x in v] for k, v in sorted(obj.negative.items())},
+            "positive_confidence": _canonical(obj.positive_confidence),
+            "negative_confidence": _canonical(obj.negative_confidence),
+        }
+    if isinstance(obj, BaseModel):
+        # PhotoProfile: only attribute values/confidences matter, not id/path/embedding
+        return {k: round(v, 6) if isinstance(v, float) else v for k, v in sorted(encode_profile(obj).items())}
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, (list, tuple, set)):
+        items = [_canonical(v) for v in obj]
+        return sorted(items, key=json.dumps) if isinstance(obj, set) else items
+    if isinstance(obj, (float, np.floating)):
+        return round(float(obj), 6)
+    return obj if isinstance(obj, (str, int, bool)) else str(obj)
+
+
+def fingerprint(
+    target: Any,
+    collection_id: Any,
+    version: int,
+    weights: Optional[Dict[str, float]] = None,
+    negative_target: Any = None,
+    filters: Optional[Dict[str, Any]] = None,
+    **extra: Any,
+) -> str:
+    """`extra` holds anything else a ranking depends on, e.g. search mode or a query-embedding digest."""
+    payload = {
+        "target": _canonical(target),
+        "negative": _canonical(negative_target),
+        "weights": _canonical(weights or {}),
+        "filters": _canonical(filters or {}),
+        "collection": str(collection_id),
+        "version": version,
+    }
+    if extra:
+        payload["extra"] = _canonical(extra)
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 512, top_n: int = 100):
+        self.max_entries = max_entries
+        self.top_n = top_n
+        self._entries: "OrderedDict[str, CachedResults]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._keys_by_collection: Dict[str, Set[str]] = {}
+        self._key_collection: Dict[str, str] = {}
+        self._lock = threading.Lock()  # Versions are bumped from worker threads too
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, collection_id: Hashable) -> int:
+        return self._versions.get(str(collection_id), 0)
+
+    def key(self, target: Any, collection_id: Hashable, **kwargs) -> str:
+        return fingerprint(target, collection_id, self.version(collection_id), **kwargs)
+
+    def get(self, key: str) -> Optional[CachedResults]:
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="results", outcome="miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="results", outcome="hit")
+            return results
+
+    def put(self, key: str, collection_id: Hashable, results: CachedResults):
+        if self.max_entries <= 0:
+            return
+        collection = str(collection_id)
+        with self._lock:
+            self._entries[key] = list(results[:self.top_n])
+            self._entries.move_to_end(key)
+            self._keys_by_collection.setdefault(collection, set()).add(key)
+            self._key_collection[key] = collection
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+
+    def _forget(self, key: str):
+        collection = self._key_collection.pop(key, None)
+        if collection is not None:
+            self._keys_by_collection.get(collection, set()).discard(key)
+
+    def bump(self, collection_id: Hashable) -> int:
+        """Invalidate a collection's cached results (call after its photos or profiles change)."""
+        collection = str(collection_id)
+        with self._lock:
+            self._versions[collection] = self._versions.get(collection, 0) + 1
+            for key in self._keys_by_collection.pop(collection, set()):
+                self._entries.pop(key, None)
+                self._key_collection.pop(key, None)
+            return self._versions[collection]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_collection.clear()
+            self._key_collection.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global cache instance; off with several workers, whose versions would drift apart
+result_cache = ResultCache(0 if settings.api.workers > 1 else settings.search.result_cache_size, settings.search.result_cache_top_n)
@@ -0,0 +1,201 @@
+"""
+Sharded ranking across worker processes.
+
+The candidate matrix is split by rows into N shards. Each worker process maps its
+shard without copying — straight from the profile snapshot file when the
+collection is snapshot-backed, otherwise from a shared-memory block the parent
+fills once — scores it with the precompiled SoftTarget table and returns only
+its local top-k. The parent merges the N short lists.
+
+A ProcessPoolExecutor stands in for separate nodes: a shard spec only names a
+file or a shared-memory block plus a row range, so the same protocol works for
+workers on other machines that mount the same snapshot.
+"""
+import asyncio
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from mvp.core.config import settings
+from mvp.search.vectorized import N_FIELDS, ProfileMatrix, SoftTarget, score_compiled, top_k
+
+Ranking = List[Tuple[int, float]]
+
+
+class ShardSpec(NamedTuple):
+    kind: str  # "mmap" (snapshot file) or "shm" (shared-memory blocks)
+    source: str  # snapshot path, or shared-memory name prefix
+    start: int  # first global row of the shard
+    stop: int
+    generation: int  # bumped on every load(); workers drop older mappings
+
+
+# Worker-side: shard matrices mapped by this process, keyed by spec
+_mapped: Dict[ShardSpec, Tuple[List[object], ProfileMatrix]] = {}
+
+
+def _release(handles: List[object]):
+    for handle in handles:
+        handle.close()
+
+
+def _shard_matrix(spec: ShardSpec) -> ProfileMatrix:
+    entry = _mapped.get(spec)
+    if entry is not None:
+        return entry[1]
+
+    for old in [s for s in _mapped if s.generation != spec.generation]:
+        # Drop the matrix (numpy views) before closing what it points into
+        _release(_mapped.pop(old)[0])
+
+    rows = spec.stop - spec.start
+    if spec.kind == "mmap":
+        from mvp.storage.snapshot import ProfileSnapshot
+
+        snapshot = ProfileSnapshot(spec.source)
+        handles = [snapshot]
+        codes = snapshot.codes[spec.start:spec.stop]
+        confidences = snapshot.confidences[spec.start:spec.stop]
+    else:
+        codes_shm = shared_memory.SharedMemory(name=f"{spec.source}_codes")
+        conf_shm = shared_memory.SharedMemory(name=f"{spec.source}_conf")
+        handles = [codes_shm, conf_shm]
+        codes = np.ndarray((rows, N_FIELDS), dtype=np.int16, buffer=codes_shm.buf)
+        confidences = np.ndarray((rows, N_FIELDS), dtype=np.float32, buffer=conf_shm.buf)
+
+    matrix = ProfileMatrix(codes, confidences)
+    _mapped[spec] = (handles, matrix)
+    return matrix
+
+
+def score_shard(spec: ShardSpec, table: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker entry point: local top-k of one shard as (global row indices, scores)."""
+    scores = score_compiled(table, _shard_matrix(spec))
+    idx = np.asarray(top_k(scores, k), dtype=np.int64)
+    return idx + spec.start, scores[idx]
+
+
+def merge_top_k(parts: List[Tuple[np.ndarray, np.ndarray]], k: int) -> Ranking:
+    """Merge per-shard top-k lists into the global top-k, best first."""
+    if not parts:
+        return []
+    indices = np.concatenate([p[0] for p in parts])
+    scores = np.concatenate([p[1] for p in parts])
+    return [(int(indices[i]), float(scores[i])) for i in top_k(scores, k)]
+
+
+class _Generation:
+    """Shard specs of one load() and the shared-memory blocks they name."""
+
+    def __init__(self, number: int):
+        self.number = number
+        self.specs: List[ShardSpec] = []
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.in_flight = 0  # Submitted shard tasks not finished yet
+        self.retired = False  # Replaced by a newer load(); blocks go once in_flight drops to 0
+
+    def unlink(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+class ShardedRanker:
+    """Scores a ProfileMatrix in `shards` row ranges on a process pool and merges the local top-k."""
+
+    def __init__(self, shards: Optional[int] = None, workers: Optional[int] = None, start_method: Optional[str] = None):
+        self.shards = max(1, shards or settings.search.shard_count)
+        self.workers = workers or settings.search.shard_workers or self.shards
+        # spawn by default: forking a server process that already runs threads (aiosqlite, uvicorn) is unsafe
+        context = multiprocessing.get_context(start_method or settings.search.shard_start_method)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        # load() may run while searches of the previous generation are still being scored:
+        # its blocks stay linked until the last of their shard tasks finishes
+        self._lock = threading.Lock()
+        self._current = _Generation(0)
+        self._retired: List[_Generation] = []
+        self.matrix: Optional[ProfileMatrix] = None
+
+    def __len__(self) -> int:
+        return len(self.matrix) if self.matrix is not None else 0
+
+    def load(self, matrix: ProfileMatrix):
+        """Partition a matrix into shards. Snapshot-backed matrices are shared by file, others copied once into shared memory."""
+        generation = _Generation(self._current.number + 1)
+        bounds = np.linspace(0, len(matrix), self.shards + 1).astype(int)
+
+        snapshot_path = getattr(matrix.profiles, "path", None)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if stop <= start:
+                continue
+            if snapshot_path is not None:
+                generation.specs.append(ShardSpec("mmap", str(snapshot_path), int(start), int(stop), generation.number))
+            else:
+                prefix = self._share(generation, matrix, int(start), int(stop))
+                generation.specs.append(ShardSpec("shm", prefix, int(start), int(stop), generation.number))
+
+        with self._lock:
+            previous, self._current = self._current, generation
+            self.matrix = matrix
+            previous.retired = True
+            if previous.in_flight:
+                self._retired.append(previous)
+            else:
+                previous.unlink()
+
+    def _share(self, generation: _Generation, matrix: ProfileMatrix, start: int, stop: int) -> str:
+        prefix = f"sap_{os.getpid()}_{secrets.token_hex(4)}"
+        for suffix, array in (("codes", matrix.codes[start:stop].astype(np.int16)),
+                              ("conf", matrix.confidences[start:stop].astype(np.float32))):
+            block = shared_memory.SharedMemory(name=f"{prefix}_{suffix}", create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            generation.blocks.append(block)
+        return prefix
+
+    def _submit(self, table: np.ndarray, k: int) -> List[Future]:
+        """One task per shard of the current generation, which stays linked until they all finish."""
+        with self._lock:
+            generation = self._current
+            generation.in_flight += len(generation.specs)
+        futures = []
+        try:
+            for spec in generation.specs:
+                future = self._pool.submit(score_shard, spec, table, k)
+                futures.append(future)
+                future.add_done_callback(lambda _: self._finished(generation))
+        finally:
+            for _ in range(len(generation.specs) - len(futures)):
+                self._finished(generation)  # Never submitted
+        return futures
+
+    def _finished(self, generation: _Generation):
+        with self._lock:
+            generation.in_flight -= 1
+            if generation.retired and generation.in_flight == 0 and generation in self._retired:
+                self._retired.remove(generation)
+                generation.unlink()
+
+    def score_top_k(self, target: SoftTarget, weights: Dict[str, float], k: int) -> Ranking:
+        """Global top-k (row index, score) pairs, best first."""
+        futures = self._submit(target.compile(weights), k)
+        return merge_top_k([f.result() for f in futures], k)
+
+    async def score_top_k_async(self, target: SoftTarget, weights: Dict[str, float], k: int) -> Ranking:
+        """score_top_k without blocking the event loop while shards are scored."""
+        futures = [asyncio.wrap_future(f) for f in self._submit(target.compile(weights), k)]
+        return merge_top_k(list(await asyncio.gather(*futures)), k)
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for generation in [self._current, *self._retired]:
+                generation.unlink()
+            self._retired = []
+            self.matrix = None
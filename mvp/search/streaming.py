@@ -0,0 +1,96 @@
+"""
+Progressive ranking: score a collection chunk by chunk and report the running
+top-k whenever it changes materially.
+
+Chunks start small, so the first snapshot arrives after a few thousand
+candidates, and then double up to SEARCH_SCORE_CHUNK_SIZE (each chunk still uses
+the parallel kernel). The caller gets the full score array at the end; partial
+snapshots are a preview, the final ranking is authoritative.
+"""
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from mvp.core.config import settings
+from mvp.search.kernel import score_parallel
+from mvp.search.vectorized import ProfileMatrix, top_k
+
+Snapshot = List[Tuple[int, float]]
+OnSnapshot = Callable[[Snapshot, float], Awaitable[None]]
+
+
+class TopKTracker:
+    """Running top-k (row, score) over chunks of scores."""
+
+    def __init__(self, k: int, min_change: Optional[float] = None):
+        self.k = k
+        self.min_change = settings.search.stream_min_change if min_change is None else min_change
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.scores = np.zeros(0, dtype=np.float32)
+        self._reported: Snapshot = []
+
+    def update(self, start: int, scores: np.ndarray):
+        """Merge the scores of rows [start, start + len(scores))."""
+        best = np.asarray(top_k(scores, self.k), dtype=np.int64)
+        rows = np.concatenate([self.rows, best + start])
+        merged = np.concatenate([self.scores, scores[best]])
+        keep = top_k(merged, self.k)
+        self.rows, self.scores = rows[keep], merged[keep]
+
+    def snapshot(self) -> Snapshot:
+        return [(int(r), float(s)) for r, s in zip(self.rows, self.scores) if s > 0]
+
+    def changed(self) -> bool:
+        """
+        True (and remembers the snapshot) if the preview is worth sending: the list
+        grew, the best result changed, or the k-th score rose by more than min_change.
+        A row's score never changes, so this only reacts to new rows entering.
+        """
+        current, previous = self.snapshot(), self._reported
+        if not current:
+            return False
+        material = (
+            len(current) > len(previous)
+            or current[0][0] != previous[0][0]
+            or current[-1][1] - previous[-1][1] > self.min_change
+        )
+        if material:
+            self._reported = current
+        return material
+
+
+def chunk_bounds(n: int, first: Optional[int] = None, largest: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Row ranges for progressive scoring: `first` rows, then doubling up to `largest`."""
+    size = first or settings.search.stream_first_chunk
+    largest = largest or settings.search.score_chunk_size
+    bounds, start = [], 0
+    while start < n:
+        stop = min(n, start + size)
+        bounds.append((start, stop))
+        start, size = stop, min(size * 2, largest)
+    return bounds
+
+
+async def stream_scores(
+    table: np.ndarray,
+    matrix: ProfileMatrix,
+    k: int,
+    on_snapshot: OnSnapshot,
+    first_chunk: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Score all candidates with a compiled SoftTarget table, awaiting
+    on_snapshot(top_k_snapshot, progress) after each chunk that changed the top-k
+    materially. Scoring runs in a worker thread; returns the full score array.
+    """
+    n = len(matrix)
+    scores = np.empty(n, dtype=np.float32)
+    tracker = TopKTracker(k)
+    for start, stop in chunk_bounds(n, first_chunk):
+        chunk = await asyncio.to_thread(score_parallel, table, matrix.rows(start, stop))
+        scores[start:stop] = chunk
+        tracker.update(start, chunk)
+        if stop < n and tracker.changed():
+            await on_snapshot(tracker.snapshot(), stop / n)
+    return scores
@@ -0,0 +1,197 @@
+"""
+Approximate nearest-neighbour index over CLIP image embeddings.
+
+Embeddings are L2-normalized, so cosine similarity is a dot product. Small
+collections are searched exactly (one matrix-vector product). Larger ones use an
+inverted-file (IVF) layout: k-means splits the vectors into ~sqrt(n) lists, and a
+query scans only the `nprobe` lists whose centroids are closest, so latency grows
+with sqrt(n) instead of n.
+
+Rows without an embedding (NaN in the snapshot, None in a profile) are never returned.
+"""
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mvp.core.config import settings
+from mvp.core.metrics import CACHE_REQUESTS
+from mvp.schema.models import PhotoProfile
+from mvp.search.vectorized import top_k
+
+KMEANS_SAMPLE = 50_000
+KMEANS_ITERATIONS = 10
+ASSIGN_BATCH = 65_536
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def query_vector(positives: Sequence[Sequence[float]], negatives: Sequence[Sequence[float]] = (), negative_weight: Optional[float] = None) -> Optional[np.ndarray]:
+    """Unit query: mean positive direction minus `negative_weight` times the mean negative direction."""
+    if not positives:
+        return None
+    if negative_weight is None:
+        negative_weight = settings.search.hybrid_negative_weight
+    query = normalize(np.mean(normalize(np.asarray(positives, dtype=np.float32)), axis=0))
+    if len(negatives):
+        query = query - negative_weight * normalize(np.mean(normalize(np.asarray(negatives, dtype=np.float32)), axis=0))
+    return normalize(query).astype(np.float32)
+
+
+def profile_embeddings(profiles: Sequence[PhotoProfile]) -> Optional[np.ndarray]:
+    """[n, dim] float32 embeddings of a profile database (NaN rows where missing), or None if there are none."""
+    snapshot_embeddings = getattr(profiles, "embeddings", None)
+    if snapshot_embeddings is not None:
+        return snapshot_embeddings
+    dim = max((len(p.embedding) for p in profiles if p.embedding is not None), default=0)
+    if not dim:
+        return None
+    embeddings = np.full((len(profiles), dim), np.nan, dtype=np.float32)
+    for i, p in enumerate(profiles):
+        if p.embedding is not None and len(p.embedding) == dim:
+            embeddings[i] = p.embedding
+    return embeddings
+
+
+class VectorIndex:
+    def __init__(
+        self, embeddings: np.ndarray, n_lists: Optional[int] = None, nprobe: Optional[int] = None,
+        seed: int = 0, exact: bool = False,
+    ):
+        """exact=True always scans every vector (no k-means), for one-off indexes that are not cached."""
+        cfg = settings.search
+        valid = ~np.isnan(embeddings).any(axis=1)
+        self.rows = np.flatnonzero(valid)  # index position -> database row
+        self.vectors = normalize(np.asarray(embeddings[valid], dtype=np.float32))
+        self.dim = embeddings.shape[1]
+        self.nprobe = nprobe or cfg.ann_nprobe
+
+        n = len(self.rows)
+        self.centroids: Optional[np.ndarray] = None
+        if not exact and n >= cfg.ann_min_size:
+            n_lists = n_lists or cfg.ann_lists or int(np.sqrt(n))
+            self._build_ivf(max(1, min(n_lists, n)), np.random.default_rng(seed))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def exact(self) -> bool:
+        return self.centroids is None
+
+    def _build_ivf(self, n_lists: int, rng: np.random.Generator):
+        sample = self.vectors
+        if len(sample) > KMEANS_SAMPLE:
+            sample = sample[rng.choice(len(sample), KMEANS_SAMPLE, replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        # Spherical k-means: assign by dot product, re-normalize the means
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+
+        assign = np.concatenate([
+            np.argmax(self.vectors[i:i + ASSIGN_BATCH] @ centroids.T, axis=1)
+            for i in range(0, len(self.vectors), ASSIGN_BATCH)
+        ])
+        # Lay vectors out list by list so each probed list is one contiguous slice
+        order = np.argsort(assign, kind="stable")
+        self.vectors = np.ascontiguousarray(self.vectors[order])
+        self.rows = self.rows[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        self.centroids = centroids
+
+    def search(self, query: np.ndarray, m: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Up to m (database rows, cosine similarities), best first."""
+        if not len(self.rows) or m <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query = normalize(np.asarray(query, dtype=np.float32))
+
+        if self.exact:
+            positions = np.arange(len(self.rows))
+        else:
+            probes = np.argsort(-(self.centroids @ query))[:self.nprobe]
+            positions = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in probes])
+
+        sims = self.vectors[positions] @ query
+        m = min(m, len(sims))
+        best = np.argpartition(-sims, m - 1)[:m]
+        best = best[np.argsort(-sims[best], kind="stable")]
+        return self.rows[positions[best]], sims[best]
+
+
+class CollectionIndexes:
+    """VectorIndex per stored collection, valid for one collection version (see result_cache.bump)."""
+
+    def __init__(self, max_collections: int = 16):
+        self.max_collections = max_collections
+        self._indexes: "OrderedDict[str, Tuple[int, List[str], VectorIndex]]" = OrderedDict()
+
+    def get(self, collection_id: Hashable, version: int) -> Optional[Tuple[List[str], VectorIndex]]:
+        entry = self._indexes.get(str(collection_id))
+        if entry is None or entry[0] != version:
+            CACHE_REQUESTS.inc(cache="vector_index", outcome="miss")
+            return None
+        CACHE_REQUESTS.inc(cache="vector_index", outcome="hit")
+        self._indexes.move_to_end(str(collection_id))
+        return entry[1], entry[2]
+
+    def put(self, collection_id: Hashable, version: int, ids: List[str], index: VectorIndex):
+        if self.max_collections <= 0:
+            return
+        self._indexes[str(collection_id)] = (version, ids, index)
+        self._indexes.move_to_end(str(collection_id))
+        while len(self._indexes) > self.max_collections:
+            self._indexes.popitem(last=False)
+
+
+# Global instance; not cached across requests when versions are per worker (see result_cache)
+vector_indexes = CollectionIndexes(0 if settings.api.workers > 1 else 16)
+
+
+def fuse_scores(attribute_scores: np.ndarray, similarities: np.ndarray, attribute_weight: Optional[float] = None, method: Optional[str] = None) -> np.ndarray:
+    """
+    Combine attribute scores (0..1) and cosine similarities of the same candidates.
+    "linear": w * attribute + (1 - w) * (cos + 1) / 2.
+    "rrf": reciprocal-rank fusion, w / (60 + attribute rank) + (1 - w) / (60 + embedding rank).
+    """
+    cfg = settings.search
+    w = cfg.hybrid_attribute_weight if attribute_weight is None else attribute_weight
+    method = method or cfg.hybrid_fusion
+    if method == "linear":
+        return (w * attribute_scores + (1.0 - w) * (similarities + 1.0) / 2.0).astype(np.float32)
+    if method == "rrf":
+        def ranks(scores: np.ndarray) -> np.ndarray:
+            r = np.empty(len(scores), dtype=np.float32)
+            r[np.argsort(-scores, kind="stable")] = np.arange(1, len(scores) + 1)
+            return r
+        return (w / (60.0 + ranks(attribute_scores)) + (1.0 - w) / (60.0 + ranks(similarities))).astype(np.float32)
+    raise ValueError(f"Unknown fusion method: {method}")
+
+
+def hybrid_rank(
+    ranker,
+    target,
+    matrix,
+    index: VectorIndex,
+    query: np.ndarray,
+    weights: Optional[Dict[str, float]] = None,
+    k: int = 100,
+    m: Optional[int] = None,
+) -> List[Tuple[int, float]]:
+    """
+    Two-stage search: the m nearest embeddings, re-ranked by attribute score and
+    fused with their similarity. Returns the top k (database row, fused score).
+    """
+    rows, sims = index.search(query, m or settings.search.hybrid_candidates)
+    if not len(rows):
+        return []
+    attribute_scores = ranker.score_collection(target, matrix.take(rows), weights)
+    fused = fuse_scores(attribute_scores, sims)
+    return [(int(rows[i]), float(fused[i])) for i in top_k(fused, k)]
@@ -0,0 +1,198 @@
+"""
+Vectorized scoring over a whole collection.
+
+Candidates are held column-wise as attribute codes + confidences (ProfileMatrix).
+A target is a SoftTarget: per attribute, a probability vector over values for
+what we want and one for what we don't. Expected similarity against a candidate
+value c is  sum_v p[v] * (1 - D[v, c]) * sqrt(conf_t * conf_c),  so each field
+reduces to a lookup table over c built once per query from the weight profile's
+precompiled tables (see weights.py). Positive and negative terms share one gather over the collection.
+
+A one-hot SoftTarget built from a PhotoProfile scores exactly like
+Ranker.score_candidate.
+"""
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS, encode_profile
+from mvp.schema.models import PhotoProfile
+from mvp.search.weights import MAX_MEMBERS, N_FIELDS, WeightedTables, compile_weights
+
+MISSING = -1
+NEGATIVE_PENALTY = 0.5  # Full similarity to the negative target subtracts 0.5
+
+
+class ProfileMatrix:
+    """Column-wise view of candidate profiles: codes [n, fields] (-1 = missing) and confidences."""
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        confidences: np.ndarray,
+        profiles: Optional[Sequence[PhotoProfile]] = None,
+        conf_sqrt: Optional[np.ndarray] = None,
+    ):
+        self.codes = codes
+        self.confidences = confidences
+        self.profiles = profiles
+        # sqrt(candidate confidence) is the candidate half of the geometric-mean weight
+        if conf_sqrt is None:
+            conf_sqrt = np.sqrt(np.clip(confidences.astype(np.float32), 0.0, None))
+        self.conf_sqrt = conf_sqrt
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def take(self, indices: np.ndarray) -> "ProfileMatrix":
+        """Copy of the given candidate rows (e.g. ANN hits to re-rank)."""
+        return ProfileMatrix(self.codes[indices], self.confidences[indices], conf_sqrt=self.conf_sqrt[indices])
+
+    def rows(self, start: int, stop: int) -> "ProfileMatrix":
+        """View of candidates [start, stop) sharing this matrix's arrays."""
+        return ProfileMatrix(self.codes[start:stop], self.confidences[start:stop], conf_sqrt=self.conf_sqrt[start:stop])
+
+    @classmethod
+    def from_profiles(cls, profiles: Sequence[PhotoProfile]) -> "ProfileMatrix":
+        # Snapshot-backed sequences already hold the encoded columns
+        if hasattr(profiles, "codes") and hasattr(profiles, "confidences"):
+            return cls(np.asarray(profiles.codes), np.asarray(profiles.confidences, dtype=np.float32), profiles)
+
+        codes = np.full((len(profiles), N_FIELDS), MISSING, dtype=np.int16)
+        confidences = np.zeros((len(profiles), N_FIELDS), dtype=np.float32)
+        for i, profile in enumerate(profiles):
+            row = encode_profile(profile)
+            for j, f in enumerate(ATTRIBUTE_FIELDS):
+                code = row[f.column]
+                if code is not None:
+                    codes[i, j] = code
+                    confidences[i, j] = row[f"{f.column}_conf"] or 0.0
+        return cls(codes, confidences, profiles)
+
+
+class SoftTarget:
+    """
+    Per attribute key ("hair.color"): a probability vector over enum codes for the
+    positive side, optionally one for the negative side, and a confidence per side.
+    """
+
+    def __init__(
+        self,
+        positive: Dict[str, np.ndarray],
+        negative: Optional[Dict[str, np.ndarray]] = None,
+        positive_confidence: Optional[Dict[str, float]] = None,
+        negative_confidence: Optional[Dict[str, float]] = None,
+    ):
+        self.positive = positive
+        self.negative = negative or {}
+        self.positive_confidence = positive_confidence or {}
+        self.negative_confidence = negative_confidence or {}
+
+    @staticmethod
+    def _one_hot(profile: Optional[PhotoProfile]):
+        dist, conf = {}, {}
+        if profile is None:
+            return dist, conf
+        row = encode_profile(profile)
+        for f in ATTRIBUTE_FIELDS:
+            code = row[f.column]
+            if code is not None:
+                p = np.zeros(len(f.members), dtype=np.float32)
+                p[code] = 1.0
+                dist[f.key] = p
+                conf[f.key] = row[f"{f.column}_conf"] or 0.0
+        return dist, conf
+
+    @classmethod
+    def from_profile(cls, target: PhotoProfile, negative_target: Optional[PhotoProfile] = None) -> "SoftTarget":
+        """Hard target(s): one-hot vectors carrying the attribute confidences."""
+        pos, pos_conf = cls._one_hot(target)
+        neg, neg_conf = cls._one_hot(negative_target)
+        return cls(pos, neg, pos_conf, neg_conf)
+
+    @classmethod
+    def from_state(cls, state) -> "SoftTarget":
+        """
+        Soft target from an AggregationState: values with net positive votes form the
+        positive distribution, values the negatives outweigh form the negative one.
+        """
+        from mvp.search.aggregator import FIELD_OFFSETS
+
+        positive, negative = {}, {}
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            start, end = FIELD_OFFSETS[j], FIELD_OFFSETS[j + 1]
+            seen = state.votes[start:end] > 0
+            if not seen.any():
+                continue
+            scores = state.scores[start:end]
+
+            pos = np.clip(scores, 0.0, None)
+            if pos.sum() <= 0:
+                # Only negative votes: fall back to the least-rejected value, like the hard target
+                pos = np.zeros(end - start)
+                pos[int(np.argmax(np.where(seen, scores, -np.inf)))] = 1.0
+            positive[f.key] = (pos / pos.sum()).astype(np.float32)
+
+            neg = np.clip(-scores, 0.0, None)
+            if neg.sum() > 0:
+                negative[f.key] = (neg / neg.sum()).astype(np.float32)
+        return cls(positive, negative)
+
+    def _tables(self, dist: Dict[str, np.ndarray], conf: Dict[str, float], tables: WeightedTables):
+        """Per field: similarity table over candidate codes (weighted) and the field weight."""
+        sim = np.zeros((N_FIELDS, MAX_MEMBERS), dtype=np.float32)
+        w = np.zeros((N_FIELDS, MAX_MEMBERS), dtype=np.float32)
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            p = dist.get(f.key)
+            if p is None:
+                continue
+            weight = tables.field_weights[j]
+            n = len(f.members)
+            # weight * E_v~p[1 - D(v, c)] for every candidate value c
+            expected = p @ tables.similarity[j, :n, :n]
+            sim[j, :n] = np.sqrt(conf.get(f.key, 1.0)) * np.clip(expected, 0.0, weight)
+            w[j, :n] = weight
+        return sim, w
+
+    def compile(self, weights: Union[Mapping[str, float], WeightedTables]) -> np.ndarray:
+        """Fused lookup table [fields, values, 4]: positive sim, positive weight, negative sim, negative weight."""
+        tables = weights if isinstance(weights, WeightedTables) else compile_weights(weights)
+        pos_sim, pos_w = self._tables(self.positive, self.positive_confidence, tables)
+        neg_sim, neg_w = self._tables(self.negative, self.negative_confidence, tables)
+        return np.stack([pos_sim, pos_w, neg_sim, neg_w], axis=-1)
+
+
+def score_matrix(target: SoftTarget, matrix: ProfileMatrix, weights: Union[Mapping[str, float], WeightedTables]) -> np.ndarray:
+    """Scores (0.0 - 1.0) of every candidate in one gather over [n, fields]."""
+    return score_compiled(target.compile(weights), matrix)
+
+
+def score_compiled(table: np.ndarray, matrix: ProfileMatrix) -> np.ndarray:
+    """score_matrix with a precompiled SoftTarget table; needs no distance matrices, so it runs in any process."""
+    n = len(matrix)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    present = matrix.codes >= 0
+    codes = np.where(present, matrix.codes, 0).astype(np.intp)
+
+    # [n, fields, 4]; missing candidate values contribute neither similarity nor weight
+    gathered = table[np.arange(N_FIELDS), codes] * present[..., None]
+    gathered[..., 0] *= matrix.conf_sqrt
+    gathered[..., 2] *= matrix.conf_sqrt
+    pos_sim, pos_w, neg_sim, neg_w = gathered.sum(axis=1).T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base = np.where(pos_w > 0, pos_sim / pos_w, 0.0)
+        penalty = np.where(neg_w > 0, neg_sim / neg_w, 0.0) * NEGATIVE_PENALTY
+    scores = np.where(pos_w > 0, np.maximum(0.0, base - penalty), 0.0)
+    return scores.astype(np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> List[int]:
+    """Indices of the k best scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")].tolist()
@@ -0,0 +1,84 @@
+"""
+Compiled attribute weight profiles.
+
+A weight profile (Ranker.DEFAULT_WEIGHTS plus per-user or per-request overrides)
+is compiled once into WeightedTables: for every attribute, the similarity
+matrix 1 - D is pre-multiplied by that attribute's weight. Building a query's
+lookup table is then one small matrix product per attribute, and scoring the
+collection is a pure gather-and-sum (candidate confidences are folded into
+ProfileMatrix.conf_sqrt once per collection).
+
+Compiled tables are cached per distinct weight set (LRU) and rebuilt when a
+distance matrix is re-registered.
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+
+from mvp.core.config import settings
+from mvp.core.distance_matrices import MatrixRegistry
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS
+
+N_FIELDS = len(ATTRIBUTE_FIELDS)
+MAX_MEMBERS = max(len(f.members) for f in ATTRIBUTE_FIELDS)
+ATTRIBUTE_KEYS = frozenset(f.key for f in ATTRIBUTE_FIELDS)
+
+WeightKey = Tuple[Tuple[str, float], ...]
+
+
+def weight_key(weights: Mapping[str, float]) -> WeightKey:
+    return tuple(sorted((k, float(v)) for k, v in weights.items()))
+
+
+def validate_weights(weights: Mapping[str, float]) -> Dict[str, float]:
+    """Check keys ("hair.color") and values; raises ValueError on unknown attributes or non-numeric, non-finite or negative weights."""
+    unknown = sorted(set(weights) - ATTRIBUTE_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown attribute(s): {', '.join(unknown)}")
+    invalid = sorted(
+        k for k, v in weights.items()
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v)
+    )
+    if invalid:
+        raise ValueError(f"Weights must be finite numbers: {', '.join(invalid)}")
+    negative = sorted(k for k, v in weights.items() if v < 0)
+    if negative:
+        raise ValueError(f"Weights must be >= 0: {', '.join(negative)}")
+    return {k: float(v) for k, v in weights.items()}
+
+
+class WeightedTables:
+    """Per attribute: weight and weight * (1 - D), padded to [fields, MAX_MEMBERS, MAX_MEMBERS]."""
+
+    def __init__(self, weights: Mapping[str, float]):
+        self.weights = dict(weights)
+        self.field_weights = np.array([self.weights.get(f.key, 1.0) for f in ATTRIBUTE_FIELDS], dtype=np.float32)
+        self.similarity = np.zeros((N_FIELDS, MAX_MEMBERS, MAX_MEMBERS), dtype=np.float32)
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            n = len(f.members)
+            self.similarity[j, :n, :n] = self.field_weights[j] * (1.0 - MatrixRegistry.get_array(f.enum_type))
+        self.field_weights.setflags(write=False)
+        self.similarity.setflags(write=False)
+
+
+_tables: "OrderedDict[Tuple[int, WeightKey], WeightedTables]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def compile_weights(weights: Mapping[str, float]) -> WeightedTables:
+    """Cached WeightedTables for a resolved weight dict (missing attributes weigh 1.0)."""
+    key = (MatrixRegistry.generation, weight_key(weights))
+    with _lock:
+        tables = _tables.get(key)
+        if tables is not None:
+            _tables.move_to_end(key)
+            return tables
+    tables = WeightedTables(weights)
+    with _lock:
+        _tables[key] = tables
+        while len(_tables) > max(1, settings.search.weight_table_cache_size):
+            _tables.popitem(last=False)
+    return tables
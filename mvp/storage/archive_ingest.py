@@ -0,0 +1,244 @@
+"""
+Streaming archive ingestion.
+
+Reads zip members one at a time (no extractall), hashes and thumbnails them in a
+process pool, dedupes against the collection's in-memory hash index and inserts
+StoredPhoto rows in batches. Runs as a background job so the request worker only
+spools the upload to disk.
+"""
+import asyncio
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from PIL import Image
+from pydantic import BaseModel, Field
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.core.config import settings
+from mvp.core.hash_index import hash_indexes
+from mvp.core.hasher import ImageHasher
+from mvp.storage.async_store import insert_photos
+from mvp.storage.database import async_engine, engine
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+THUMBNAIL_SIZE = (256, 256)
+
+ProgressCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class IngestJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid4()))
+    collection_id: UUID
+    filename: str
+    status: str = "queued"  # queued, running, completed, error
+    total: int = 0
+    processed: int = 0
+    added: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    message: Optional[str] = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
+    @property
+    def progress(self) -> float:
+        return self.processed / self.total if self.total else 0.0
+
+
+# In-process job tracking (job_id -> job)
+ingest_jobs: Dict[str, IngestJob] = {}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def ingest_worker_count() -> int:
+    return settings.api.ingest_workers or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=ingest_worker_count())
+    return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def process_image_bytes(data: bytes) -> Tuple[Optional[int], Optional[bytes]]:
+    """
+    Worker-side: decode once, return (64-bit phash, JPEG thumbnail bytes).
+    Returns (None, None) if the bytes are not a readable image.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            hash_value = ImageHasher.hash_image(img)
+
+            thumb = img.convert("RGB")
+            thumb.thumbnail(THUMBNAIL_SIZE)
+            buf = io.BytesIO()
+            thumb.save(buf, format="JPEG", quality=85)
+            return hash_value, buf.getvalue()
+    except Exception:
+        return None, None
+
+
+def _list_image_members(zip_ref: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    members = []
+    for info in zip_ref.infolist():
+        if info.is_dir():
+            continue
+        name = Path(info.filename)
+        if name.name.startswith(".") or "__MACOSX" in name.parts:
+            continue
+        if name.suffix.lower() in IMAGE_EXTENSIONS:
+            members.append(info)
+    return members
+
+
+def _unique_dest(dest_dir: Path, name: str, used: set) -> Path:
+    dest_path = dest_dir / name
+    n = 0
+    while dest_path.name in used or dest_path.exists():
+        n += 1
+        dest_path = dest_dir / f"{Path(name).stem}_{n}{Path(name).suffix}"
+    used.add(dest_path.name)
+    return dest_path
+
+
+def _write_files(dest_path: Path, data: bytes, thumb_path: Path, thumb: bytes):
+    dest_path.write_bytes(data)
+    thumb_path.write_bytes(thumb)
+
+
+async def _flush_rows(collection_id: UUID, rows: List[Dict[str, Any]]):
+    async with AsyncSession(async_engine) as session:
+        await insert_photos(session, collection_id, rows)
+
+
+async def run_archive_ingest(
+    job: IngestJob,
+    zip_path: Path,
+    progress: Optional[ProgressCallback] = None,
+    session_id: Optional[str] = None,
+):
+    """Background job: stream images out of zip_path into job.collection_id."""
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    collection_id = job.collection_id
+    batch_size = settings.api.ingest_batch_size
+    max_distance = settings.search.phash_max_distance
+    # Bound in-flight members so memory stays flat regardless of archive size
+    max_in_flight = max(2, ingest_worker_count() * 2)
+
+    async def report():
+        if progress and session_id:
+            await progress(session_id, {
+                "stage": "ingesting",
+                "progress": job.progress,
+                "job_id": job.id,
+                "added": job.added,
+                "duplicates": job.duplicates,
+                "failed": job.failed,
+            })
+
+    dest_dir = Path(f"data/uploads/{collection_id}")
+    thumb_dir = dest_dir / "thumbs"
+    thumb_dir.mkdir(parents=True, exist_ok=True)
+
+    job.status = "running"
+    rows: List[Dict[str, Any]] = []
+    used_names: set = set()
+
+    try:
+        with Session(engine) as session:
+            hash_index = await asyncio.to_thread(hash_indexes.get, session, collection_id)
+
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            members = _list_image_members(zip_ref)
+            job.total = len(members)
+            await report()
+
+            async def handle(info: zipfile.ZipInfo, data: bytes, future: asyncio.Future):
+                hash_value, thumb = await future
+                job.processed += 1
+                if hash_value is None:
+                    job.failed += 1
+                    return
+                photo_id = uuid4()
+                if hash_indexes.claim(hash_index, hash_value, max_distance, photo_id):
+                    job.duplicates += 1
+                    return
+
+                dest_path = _unique_dest(dest_dir, Path(info.filename).name, used_names)
+                thumb_path = thumb_dir / f"{dest_path.stem}.jpg"
+                await asyncio.to_thread(_write_files, dest_path, data, thumb_path, thumb)
+
+                rows.append({
+                    "id": photo_id,
+                    "collection_id": collection_id,
+                    "image_path": str(dest_path),
+                    "profile": {},  # Empty profile, needs analysis later
+                    "phash": ImageHasher.hash_to_hex(hash_value),
+                    "embedding": None,
+                    "created_at": datetime.utcnow(),
+                })
+
+            pending: List[Tuple[zipfile.ZipInfo, bytes, asyncio.Future]] = []
+            for info in members:
+                data = await asyncio.to_thread(zip_ref.read, info)
+                pending.append((info, data, loop.run_in_executor(pool, process_image_bytes, data)))
+
+                if len(pending) >= max_in_flight:
+                    # Handle in submission order; dedupe must see earlier members first
+                    await handle(*pending.pop(0))
+
+                if len(rows) >= batch_size:
+                    await _flush_rows(collection_id, rows)
+                    job.added += len(rows)
+                    rows = []
+                    await report()
+
+            for item in pending:
+                await handle(*item)
+
+        if rows:
+            await _flush_rows(collection_id, rows)
+            job.added += len(rows)
+
+        job.status = "completed"
+        job.message = "Photos uploaded. Analysis required."
+        if job.added and settings.jobs.auto_annotate_uploads:
+            from mvp.annotator.annotation_worker import enqueue_collection_annotation
+            queued = await asyncio.to_thread(enqueue_collection_annotation, collection_id)
+            job.message = f"Photos uploaded. {queued} queued for analysis."
+    except zipfile.BadZipFile:
+        job.status = "error"
+        job.message = "Invalid zip file"
+    except Exception as e:
+        job.status = "error"
+        job.message = f"Upload failed: {e}"
+        # Index may hold hashes of rows that were never committed
+        hash_indexes.invalidate(collection_id)
+    finally:
+        job.completed_at = datetime.utcnow()
+        if zip_path.exists():
+            os.remove(zip_path)
+
+    if progress and session_id:
+        if job.status == "completed":
+            await progress(session_id, {"stage": "completed", "progress": 1.0, "job_id": job.id, "added": job.added, "duplicates": job.duplicates, "failed": job.failed})
+        else:
+            await progress(session_id, {"stage": "error", "job_id": job.id, "message": job.message})
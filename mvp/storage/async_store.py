@@ -0,0 +1,93 @@
+"""
+Async write paths for request handlers and background jobs.
+
+All statements go through an aiosqlite AsyncSession, so a large insert or a
+slow commit waits on the driver thread instead of blocking the event loop.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.search.result_cache import result_cache
+from mvp.storage.attribute_store import attribute_row
+from mvp.storage.models import PhotoAttributes, PhotoCollection, SearchSession, StoredPhoto, WeightProfile
+
+
+async def save_search_session(
+    session: AsyncSession,
+    session_id: UUID,
+    user_id: UUID,
+    collection_id: UUID,
+    positives: List[str],
+    negatives: Optional[List[str]] = None,
+    results: Optional[List[Dict[str, Any]]] = None,
+    started_at: Optional[datetime] = None,
+) -> bool:
+    """Record a finished search in the user's history. Returns False if the session id is already stored."""
+    if await session.get(SearchSession, session_id) is not None:
+        return False
+
+    now = datetime.utcnow()
+    session.add(SearchSession(
+        id=session_id,
+        user_id=user_id,
+        collection_id=collection_id,
+        positives=positives,
+        negatives=negatives or [],
+        started_at=started_at or now,
+        completed_at=now,
+        results=results or [],
+    ))
+    await session.commit()
+    return True
+
+
+async def insert_photos(session: AsyncSession, collection_id: UUID, rows: List[Dict[str, Any]]):
+    """
+    Bulk-insert StoredPhoto rows (plus their attribute rows for annotated profiles)
+    and bump the collection's photo_count in one transaction.
+    """
+    if not rows:
+        return
+    await session.execute(insert(StoredPhoto.__table__), rows)
+
+    attributes = [attribute_row(r["id"], collection_id, r.get("profile")) for r in rows]
+    attributes = [a for a in attributes if a]
+    if attributes:
+        await session.execute(insert(PhotoAttributes.__table__), attributes)
+
+    await session.execute(
+        update(PhotoCollection)
+        .where(PhotoCollection.id == collection_id)
+        .values(photo_count=PhotoCollection.photo_count + len(rows))
+    )
+    await session.commit()
+    result_cache.bump(collection_id)
+
+
+async def find_weight_profile(
+    session: AsyncSession,
+    user_id: UUID,
+    profile_id: Optional[UUID] = None,
+    session_id: Optional[str] = None,
+) -> Optional[WeightProfile]:
+    """
+    The weight profile a search should use: `profile_id` if given (must belong to
+    the user), else the one bound to `session_id`, else the user's default.
+    """
+    if profile_id is not None:
+        profile = await session.get(WeightProfile, profile_id)
+        return profile if profile is not None and profile.user_id == user_id else None
+
+    stmt = select(WeightProfile).where(WeightProfile.user_id == user_id)
+    if session_id:
+        result = await session.exec(stmt.where(WeightProfile.session_id == session_id).order_by(WeightProfile.updated_at.desc()))
+        profile = result.first()
+        if profile is not None:
+            return profile
+    result = await session.exec(stmt.where(WeightProfile.is_default == True).order_by(WeightProfile.updated_at.desc()))  # noqa: E712
+    return result.first()
@@ -0,0 +1,160 @@
+"""
+Typed attribute storage for StoredPhoto profiles.
+
+Writers keep PhotoAttributes in sync with StoredPhoto.profile; readers load
+candidates straight from int/float columns (no JSON parsing or Pydantic
+validation) and push hard filters into indexed SQL WHERE clauses.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from sqlalchemy import delete, event, insert
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS, column_for, decode_profile, encode_profile
+from mvp.schema.embedding import to_array
+from mvp.schema.models import PhotoProfile
+from mvp.search.result_cache import result_cache
+from mvp.storage.models import PhotoAttributes, StoredPhoto
+
+
+def mark_collection_changed(session: Session, collection_id: UUID):
+    """Invalidate the collection's cached search results once this session commits."""
+    session.info.setdefault("changed_collections", set()).add(collection_id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _bump_changed_collections(session):
+    for collection_id in session.info.pop("changed_collections", ()):
+        result_cache.bump(collection_id)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_changed_collections(session):
+    session.info.pop("changed_collections", None)
+
+
+def attribute_row(photo_id: UUID, collection_id: UUID, profile: Any) -> Optional[Dict[str, Any]]:
+    """Row dict for PhotoAttributes, or None if the profile carries no known attributes."""
+    if not profile:
+        return None
+    row = encode_profile(profile)
+    if all(row[f.column] is None for f in ATTRIBUTE_FIELDS):
+        return None
+    return {"photo_id": photo_id, "collection_id": collection_id, **row}
+
+
+def sync_photo_attributes(session: Session, photo: StoredPhoto):
+    """Replace the attribute row of a photo from its JSON profile. Caller commits."""
+    session.execute(delete(PhotoAttributes).where(PhotoAttributes.photo_id == photo.id))
+    row = attribute_row(photo.id, photo.collection_id, photo.profile)
+    if row:
+        session.execute(insert(PhotoAttributes.__table__), [row])
+    mark_collection_changed(session, photo.collection_id)
+
+
+def bulk_insert_attributes(session: Session, rows: Iterable[Dict[str, Any]]):
+    rows = [r for r in rows if r]
+    if rows:
+        session.execute(insert(PhotoAttributes.__table__), rows)
+    for collection_id in {r["collection_id"] for r in rows}:
+        mark_collection_changed(session, collection_id)
+
+
+def build_filters(criteria: Dict[str, Any]) -> List[Any]:
+    """
+    Translate Ranker.filter_candidates-style criteria into SQL clauses, e.g.
+    {"basic.gender": "male", "basic.age_group": ["25-34", "35-44"]}.
+    """
+    clauses = []
+    for key, required in criteria.items():
+        column_name, field = column_for(key)
+        column = getattr(PhotoAttributes, column_name)
+        if required is None:
+            continue
+        if isinstance(required, (list, tuple, set)):
+            codes = [c for c in (field.encode(v) for v in required) if c is not None]
+            clauses.append(column.in_(codes))
+        else:
+            code = field.encode(required)
+            clauses.append(column == code if code is not None else column.is_(None))
+    return clauses
+
+
+def _profiles_query(collection_id: UUID, criteria: Optional[Dict[str, Any]] = None):
+    # Plain column tuples, no ORM identity map
+    stmt = (
+        select(StoredPhoto.image_path, *PhotoAttributes.__table__.columns)
+        .select_from(PhotoAttributes)
+        .join(StoredPhoto, StoredPhoto.id == PhotoAttributes.photo_id)
+        .where(PhotoAttributes.collection_id == collection_id)
+    )
+    for clause in build_filters(criteria or {}):
+        stmt = stmt.where(clause)
+    return stmt
+
+
+def _decode_rows(rows: Iterable[Any]) -> List[PhotoProfile]:
+    return [decode_profile(row, id=str(row["photo_id"]), image_path=row["image_path"]) for row in rows]
+
+
+def load_profiles(session: Session, collection_id: UUID, criteria: Optional[Dict[str, Any]] = None) -> List[PhotoProfile]:
+    """Load annotated photos of a collection as PhotoProfiles, filtered in SQL."""
+    return _decode_rows(session.execute(_profiles_query(collection_id, criteria)).mappings())
+
+
+async def load_profiles_async(session: AsyncSession, collection_id: UUID, criteria: Optional[Dict[str, Any]] = None) -> List[PhotoProfile]:
+    """Async variant of load_profiles; the query runs on the aiosqlite thread, not the event loop."""
+    result = await session.execute(_profiles_query(collection_id, criteria))
+    return _decode_rows(result.mappings())
+
+
+async def load_profiles_by_ids_async(session: AsyncSession, photo_ids: List[Any]) -> List[PhotoProfile]:
+    """
+    Load specific photos as PhotoProfiles, in the order of `photo_ids` (missing ids are skipped).
+    Photos without attributes yet come back as bare profiles (id and path only).
+    """
+    if not photo_ids:
+        return []
+    ids = [UUID(str(i)) for i in photo_ids]
+    attribute_columns = [c for c in PhotoAttributes.__table__.columns if c.name not in ("photo_id", "collection_id")]
+    stmt = (
+        select(StoredPhoto.id.label("stored_id"), StoredPhoto.image_path, *attribute_columns)
+        .select_from(StoredPhoto)
+        .outerjoin(PhotoAttributes, PhotoAttributes.photo_id == StoredPhoto.id)
+        .where(StoredPhoto.id.in_(ids))
+    )
+    result = await session.execute(stmt)
+    by_id = {
+        str(row["stored_id"]): decode_profile(row, id=str(row["stored_id"]), image_path=row["image_path"])
+        for row in result.mappings()
+    }
+    return [by_id[str(i)] for i in ids if str(i) in by_id]
+
+
+async def load_embeddings_async(
+    session: AsyncSession, collection_id: UUID, criteria: Optional[Dict[str, Any]] = None
+) -> Tuple[List[str], Optional[np.ndarray]]:
+    """Photo ids and their CLIP embeddings [n, dim] (float32) for a collection; filters need attribute rows."""
+    stmt = select(StoredPhoto.id, StoredPhoto.embedding, StoredPhoto.embedding_dtype).where(
+        StoredPhoto.collection_id == collection_id, StoredPhoto.embedding.is_not(None)
+    )
+    clauses = build_filters(criteria or {})
+    if clauses:
+        stmt = stmt.join(PhotoAttributes, PhotoAttributes.photo_id == StoredPhoto.id)
+        for clause in clauses:
+            stmt = stmt.where(clause)
+    rows = (await session.execute(stmt)).all()
+
+    ids, vectors = [], []
+    for photo_id, blob, dtype in rows:
+        vector = to_array(blob, dtype)  # A view of the row's bytes
+        if vectors and vector.shape != vectors[0].shape:
+            continue  # Embedded with a different model
+        ids.append(str(photo_id))
+        vectors.append(vector)
+    return ids, (np.stack(vectors).astype(np.float32, copy=False) if vectors else None)
@@ -0,0 +1,138 @@
+"""
+Bulk import of StoredPhoto rows from metadata files.
+
+Existing keys of the target collection are preloaded into memory once, new rows
+go through Core executemany inserts in chunks, existing rows are updated in
+place, and the whole import runs in a single transaction.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from mvp.core.config import settings
+from mvp.search.result_cache import result_cache
+from mvp.storage.attribute_store import attribute_row
+from mvp.storage.models import PhotoAttributes, PhotoCollection, StoredPhoto
+
+PROFILE_FIELDS = ("basic", "face", "hair", "extra", "vibe")
+
+
+class ImportStats(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+
+def profile_dict(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Category part of a metadata item (id/image_path/embedding excluded)."""
+    return {name: item.get(name) for name in PROFILE_FIELDS}
+
+
+def count_photos(connection: Connection, collection_id: Optional[UUID] = None) -> int:
+    stmt = select(func.count()).select_from(StoredPhoto)
+    if collection_id is not None:
+        stmt = stmt.where(StoredPhoto.collection_id == collection_id)
+    return connection.execute(stmt).scalar_one()
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_import_photos(
+    engine: Engine,
+    collection_id: UUID,
+    rows: Iterable[Dict[str, Any]],
+    key: str = "image_path",
+    update_existing: bool = True,
+    chunk_size: Optional[int] = None,
+) -> ImportStats:
+    """
+    Insert or update photos of one collection.
+
+    Each row needs `image_path` and `profile`; `id` is optional (generated if missing).
+    `key` ("image_path" or "id") decides which rows already exist. Existing rows get
+    their profile replaced when update_existing is set, otherwise they are skipped.
+    """
+    chunk_size = chunk_size or settings.database.bulk_chunk_size
+    key_column = getattr(StoredPhoto, key)
+    stats = ImportStats()
+
+    update_profile = (
+        update(StoredPhoto.__table__)
+        .where(StoredPhoto.__table__.c.id == bindparam("b_id"))
+        .values(profile=bindparam("b_profile"))
+    )
+
+    with engine.begin() as conn:
+        # key -> id of every photo already in the collection, loaded once
+        existing: Dict[Any, UUID] = {
+            k: pid for k, pid in conn.execute(
+                select(key_column, StoredPhoto.id).where(StoredPhoto.collection_id == collection_id)
+            )
+        }
+
+        for chunk in _chunks(rows, chunk_size):
+            now = datetime.utcnow()
+            new_rows, updates = [], []
+            attributes: Dict[UUID, Optional[Dict[str, Any]]] = {}  # By photo: a key repeated in a chunk keeps its last profile
+            for row in chunk:
+                row_key = row.get(key)
+                if row_key is None:
+                    stats.skipped += 1
+                    continue
+
+                photo_id = existing.get(row_key)
+                if photo_id is not None:
+                    if not update_existing:
+                        stats.skipped += 1
+                        continue
+                    updates.append({"b_id": photo_id, "b_profile": row["profile"]})
+                else:
+                    photo_id = row.get("id") or uuid4()
+                    existing[row_key] = photo_id
+                    new_rows.append({
+                        "id": photo_id,
+                        "collection_id": collection_id,
+                        "image_path": row["image_path"],
+                        "profile": row["profile"],
+                        "phash": row.get("phash"),
+                        "embedding": row.get("embedding"),
+                        "embedding_dtype": row.get("embedding_dtype"),
+                        "created_at": now,
+                    })
+                attributes[photo_id] = attribute_row(photo_id, collection_id, row["profile"])
+
+            if new_rows:
+                conn.execute(insert(StoredPhoto.__table__), new_rows)
+            if updates:
+                conn.execute(update_profile, updates)
+                conn.execute(delete(PhotoAttributes).where(PhotoAttributes.photo_id.in_([u["b_id"] for u in updates])))
+            attributes = [a for a in attributes.values() if a]
+            if attributes:
+                conn.execute(insert(PhotoAttributes.__table__), attributes)
+
+            stats.inserted += len(new_rows)
+            stats.updated += len(updates)
+
+        if stats.inserted:
+            conn.execute(
+                update(PhotoCollection)
+                .where(PhotoCollection.id == collection_id)
+                .values(photo_count=PhotoCollection.photo_count + stats.inserted)
+            )
+
+    if stats.inserted or stats.updated:
+        result_cache.bump(collection_id)
+    return stats
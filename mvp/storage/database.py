@@ -1,20 +1,114 @@
 import os
+from pathlib import Path
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 # Import models to ensure they are registered with SQLModel.metadata
-from .models import User, PhotoCollection, StoredPhoto, SearchSession 
+from .models import User, PhotoCollection, StoredPhoto, SearchSession, Job, PhotoAttributes, AttributeSchema
+from mvp.core.config import settings
 
 # Ensure data directory exists
 os.makedirs("data", exist_ok=True)
 
 sqlite_file_name = "database.db"
 sqlite_url = f"sqlite:///data/{sqlite_file_name}"
+async_sqlite_url = f"sqlite+aiosqlite:///data/{sqlite_file_name}"
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, echo=False, connect_args=connect_args)
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# Last revision whose schema could have been produced by create_all() before migrations existed
+BASELINE_REVISION = "0001"
+
+def configure_sqlite(engine: Engine) -> Engine:
+    """
+    Apply per-connection pragmas: WAL so readers never block the writer,
+    a busy timeout instead of immediate "database is locked" errors,
+    and a larger page cache / mmap window for collection scans.
+    """
+    db = settings.database
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(db.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(db.sqlite_cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(db.sqlite_mmap_size)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    return engine
+
+def create_sqlite_engine(url: str = sqlite_url, **kwargs) -> Engine:
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": settings.database.sqlite_busy_timeout_ms / 1000,
+    }
+    engine = create_engine(
+        url,
+        echo=False,
+        connect_args=connect_args,
+        pool_size=settings.database.pool_size,
+        max_overflow=settings.database.max_overflow,
+        **kwargs
+    )
+    return configure_sqlite(engine)
+
+def create_async_sqlite_engine(url: str = async_sqlite_url, **kwargs) -> AsyncEngine:
+    """aiosqlite-backed engine for async routes; same pragmas and pool sizing as the sync engine."""
+    engine = create_async_engine(
+        url,
+        echo=False,
+        connect_args={"timeout": settings.database.sqlite_busy_timeout_ms / 1000},
+        pool_size=settings.database.pool_size,
+        max_overflow=settings.database.max_overflow,
+        **kwargs
+    )
+    configure_sqlite(engine.sync_engine)
+    return engine
+
+engine = create_sqlite_engine()
+async_engine = create_async_sqlite_engine()
+
+def run_migrations(target_engine: Engine = engine, revision: str = "head"):
+    """Upgrade the database schema with Alembic. Pre-migration databases are stamped at the baseline first."""
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config()
+    cfg.set_main_option("script_location", str(MIGRATIONS_DIR))
+    cfg.set_main_option("sqlalchemy.url", str(target_engine.url))
+
+    with target_engine.begin() as connection:
+        cfg.attributes["connection"] = connection
+        insp = inspect(connection)
+        if not insp.has_table("alembic_version") and insp.has_table("storedphoto"):
+            command.stamp(cfg, BASELINE_REVISION)
+        command.upgrade(cfg, revision)
+
+def check_attribute_codes(target_engine: Engine = engine):
+    """Refuse to run when PhotoAttributes codes were written with other attribute enums."""
+    from mvp.schema.attribute_codes import schema_fingerprint
+
+    with Session(target_engine) as session:
+        stored = session.get(AttributeSchema, 1)
+    if stored is not None and stored.fingerprint != schema_fingerprint():
+        raise RuntimeError(
+            f"Attribute enums changed (database codes {stored.fingerprint}, code {schema_fingerprint()}): "
+            "add a migration that re-codes photoattributes and updates attributeschema"
+        )
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    check_attribute_codes(engine)
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    # expire_on_commit=False: attributes stay readable after commit without a lazy (sync) refresh
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -41,7 +41,8 @@ class PhotoDatabase:
             self.profiles = {}
 
     def save(self):
-        data = {k: v.model_dump(mode='json') for k, v in self.profiles.items()}
+        # Embeddings are written as base64 float buffers (API responses leave them out)
+        data = {k: v.model_dump(mode='json', context={"embeddings": "base64"}) for k, v in self.profiles.items()}
         with open(self.db_path, "w") as f:
             json.dump(data, f, indent=2)
 
@@ -0,0 +1,164 @@
+"""
+Durable job queue backed by the SQLite `job` table.
+
+Workers claim jobs with a time-limited lease. A job whose lease expires (worker
+crashed or the server restarted) becomes claimable again, so long-running work
+such as annotating a large collection resumes where it stopped. Failures are
+retried with exponential backoff until max_attempts is reached.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from mvp.core.config import settings
+from mvp.storage.database import engine as default_engine
+from mvp.storage.models import Job
+
+
+class JobQueue:
+    def __init__(self, engine: Engine = default_engine, retry_backoff_seconds: float = 5.0, max_backoff_seconds: float = 3600.0):
+        self.engine = engine
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        collection_id: Optional[UUID] = None,
+        priority: int = 0,
+        max_attempts: int = 5,
+    ) -> UUID:
+        return self.enqueue_many(kind, [payload], collection_id, priority, max_attempts)[0]
+
+    def enqueue_many(
+        self,
+        kind: str,
+        payloads: Iterable[Dict[str, Any]],
+        collection_id: Optional[UUID] = None,
+        priority: int = 0,
+        max_attempts: int = 5,
+    ) -> List[UUID]:
+        now = datetime.utcnow()
+        rows = [{
+            "id": uuid4(),
+            "kind": kind,
+            "payload": payload,
+            "collection_id": collection_id,
+            "status": "queued",
+            "priority": priority,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_after": now,
+            "created_at": now,
+            "updated_at": now,
+        } for payload in payloads]
+        if rows:
+            with Session(self.engine) as session:
+                session.execute(insert(Job.__table__), rows)
+                session.commit()
+        return [r["id"] for r in rows]
+
+    def claim(self, kind: str, owner: str, limit: int = 1, lease_seconds: float = 120.0) -> List[Job]:
+        """
+        Atomically lease up to `limit` runnable jobs of `kind`, highest priority first.
+        Runnable = queued and due, or running with an expired lease.
+        """
+        now = datetime.utcnow()
+        # Unique per claim so a stale worker can never finish a job someone else re-leased
+        token = f"{owner}:{uuid4().hex}"
+
+        runnable = select(Job.id).where(Job.kind == kind).where(or_(
+            and_(Job.status == "queued", Job.run_after <= now),
+            and_(Job.status == "running", Job.lease_expires_at < now),
+        )).order_by(Job.priority.desc(), Job.created_at).limit(limit)
+
+        with Session(self.engine) as session:
+            session.execute(
+                update(Job)
+                .where(Job.id.in_(runnable))
+                .values(
+                    status="running",
+                    lease_owner=token,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=Job.attempts + 1,
+                    updated_at=now,
+                )
+            )
+            session.commit()
+            return list(session.exec(select(Job).where(Job.lease_owner == token)).all())
+
+    def extend_lease(self, job: Job, lease_seconds: float = 120.0) -> bool:
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            result = session.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.lease_owner == job.lease_owner, Job.status == "running")
+                .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+            )
+            session.commit()
+            return result.rowcount > 0
+
+    def complete(self, job: Job) -> bool:
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            result = session.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.lease_owner == job.lease_owner)
+                .values(status="done", lease_owner=None, lease_expires_at=None, updated_at=now, finished_at=now, last_error=None)
+            )
+            session.commit()
+            return result.rowcount > 0
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Record a failed attempt; requeue with backoff or mark failed once attempts are exhausted."""
+        now = datetime.utcnow()
+        if job.attempts >= job.max_attempts:
+            values = {"status": "failed", "finished_at": now}
+        else:
+            delay = min(self.retry_backoff_seconds * (2 ** (job.attempts - 1)), self.max_backoff_seconds)
+            values = {"status": "queued", "run_after": now + timedelta(seconds=delay)}
+
+        with Session(self.engine) as session:
+            result = session.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.lease_owner == job.lease_owner)
+                .values(lease_owner=None, lease_expires_at=None, updated_at=now, last_error=error[:2000], **values)
+            )
+            session.commit()
+            return result.rowcount > 0
+
+    def retry_failed(self, kind: str, collection_id: Optional[UUID] = None) -> int:
+        now = datetime.utcnow()
+        stmt = update(Job).where(Job.kind == kind, Job.status == "failed")
+        if collection_id is not None:
+            stmt = stmt.where(Job.collection_id == collection_id)
+        with Session(self.engine) as session:
+            result = session.execute(stmt.values(status="queued", attempts=0, run_after=now, updated_at=now, finished_at=None))
+            session.commit()
+            return result.rowcount
+
+    def counts(self, kind: str, collection_id: Optional[UUID] = None) -> Dict[str, int]:
+        stmt = select(Job.status, func.count()).where(Job.kind == kind)
+        if collection_id is not None:
+            stmt = stmt.where(Job.collection_id == collection_id)
+        with Session(self.engine) as session:
+            rows = session.exec(stmt.group_by(Job.status)).all()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({status: n for status, n in rows})
+        return counts
+
+    def completed_since(self, kind: str, since: datetime, collection_id: Optional[UUID] = None) -> int:
+        stmt = select(func.count()).select_from(Job).where(Job.kind == kind, Job.status == "done", Job.finished_at >= since)
+        if collection_id is not None:
+            stmt = stmt.where(Job.collection_id == collection_id)
+        with Session(self.engine) as session:
+            return session.exec(stmt).one()
+
+
+# Global queue instance
+job_queue = JobQueue(retry_backoff_seconds=settings.jobs.retry_backoff_seconds)
@@ -0,0 +1,93 @@
+"""Initial schema (users, collections, photos, search sessions, saved examples)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('email', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('api_keys', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_user_email', 'user', ['email'], unique=True)
+
+    op.create_table(
+        'photocollection',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('photo_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'savedexample',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('image_path', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('profile', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'searchsession',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('collection_id', sa.Uuid(), nullable=False),
+        sa.Column('positives', sa.JSON(), nullable=True),
+        sa.Column('negatives', sa.JSON(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('results', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['collection_id'], ['photocollection.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'storedphoto',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('collection_id', sa.Uuid(), nullable=False),
+        sa.Column('image_path', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('profile', sa.JSON(), nullable=True),
+        sa.Column('phash', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('embedding', sa.LargeBinary(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['collection_id'], ['photocollection.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('storedphoto')
+    op.drop_table('searchsession')
+    op.drop_table('savedexample')
+    op.drop_table('photocollection')
+    op.drop_index('ix_user_email', table_name='user')
+    op.drop_table('user')
@@ -0,0 +1,33 @@
+"""Index StoredPhoto lookups by collection, phash and image path
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_storedphoto_collection_id', 'storedphoto', ['collection_id'], if_not_exists=True)
+    op.create_index('ix_storedphoto_phash', 'storedphoto', ['phash'], if_not_exists=True)
+    op.create_index('ix_storedphoto_image_path', 'storedphoto', ['image_path'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_storedphoto_image_path', table_name='storedphoto')
+    op.drop_index('ix_storedphoto_phash', table_name='storedphoto')
+    op.drop_index('ix_storedphoto_collection_id', table_name='storedphoto')
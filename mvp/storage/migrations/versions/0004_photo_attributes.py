@@ -0,0 +1,145 @@
+"""Typed PhotoAttributes table, backfilled from StoredPhoto JSON profiles
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 5000
+
+# Attribute code tables at this revision (code = index of the value). Frozen here rather
+# than read from mvp.schema, so replaying 0004 later writes the codes of this revision.
+CODE_TABLES = {
+    'basic.gender': ('male', 'female', 'other'),
+    'basic.age_group': ('18-24', '25-34', '35-44', '45-54', '55+'),
+    'basic.ethnicity': ('caucasian', 'african', 'asian', 'latino', 'middle_eastern', 'indian', 'other'),
+    'basic.height': ('short', 'medium', 'tall', 'very_tall'),
+    'basic.body_type': ('slim', 'athletic', 'average', 'curvy', 'plus_size'),
+    'face.face_shape': ('oval', 'round', 'square', 'heart', 'diamond', 'oblong'),
+    'face.eye_color': ('blue', 'green', 'hazel', 'brown', 'black', 'grey'),
+    'face.eye_shape': ('almond', 'round', 'monolid', 'hooded', 'downturned', 'upturned'),
+    'face.nose': ('small', 'average', 'large', 'straight', 'hooked', 'button'),
+    'face.lips': ('thin', 'average', 'full'),
+    'face.jawline': ('soft', 'defined', 'strong'),
+    'hair.color': ('black', 'dark_brown', 'light_brown', 'blonde', 'red', 'grey', 'dyed'),
+    'hair.length': ('bald', 'short', 'medium', 'long'),
+    'hair.texture': ('straight', 'wavy', 'curly', 'coily'),
+    'extra.facial_hair': ('none', 'stubble', 'beard', 'mustache', 'goatee'),
+    'extra.skin_tone': ('fair', 'light', 'medium', 'tan', 'dark'),
+    'extra.glasses': ('none', 'reading', 'sunglasses'),
+    'extra.tattoos': ('none', 'minimal', 'visible'),
+    'vibe.style': ('casual', 'formal', 'chic', 'bohemian', 'streetwear', 'vintage', 'edgy', 'sporty'),
+    'vibe.vibe': ('friendly', 'serious', 'confident', 'shy', 'energetic', 'calm', 'intellectual'),
+}
+
+
+def attribute_row(photo_id, collection_id, profile):
+    """PhotoAttributes row of a JSON profile, or None if it carries no known attributes."""
+    if not profile:
+        return None
+    row = {'photo_id': photo_id, 'collection_id': collection_id}
+    found = False
+    for key, values in CODE_TABLES.items():
+        category, field = key.split('.')
+        column = key.replace('.', '_')
+        attr = (profile.get(category) or {}).get(field)
+        value = attr.get('value') if isinstance(attr, dict) else None
+        code = values.index(value) if value in values else None
+        confidence = attr.get('confidence') if code is not None else None
+        row[column] = code
+        row[f'{column}_conf'] = float(confidence) if confidence is not None else None
+        found = found or code is not None
+    return row if found else None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    attributes = op.create_table(
+        'photoattributes',
+        sa.Column('photo_id', sa.Uuid(), nullable=False),
+        sa.Column('collection_id', sa.Uuid(), nullable=False),
+        sa.Column('basic_gender', sa.Integer(), nullable=True),
+        sa.Column('basic_gender_conf', sa.Float(), nullable=True),
+        sa.Column('basic_age_group', sa.Integer(), nullable=True),
+        sa.Column('basic_age_group_conf', sa.Float(), nullable=True),
+        sa.Column('basic_ethnicity', sa.Integer(), nullable=True),
+        sa.Column('basic_ethnicity_conf', sa.Float(), nullable=True),
+        sa.Column('basic_height', sa.Integer(), nullable=True),
+        sa.Column('basic_height_conf', sa.Float(), nullable=True),
+        sa.Column('basic_body_type', sa.Integer(), nullable=True),
+        sa.Column('basic_body_type_conf', sa.Float(), nullable=True),
+        sa.Column('face_face_shape', sa.Integer(), nullable=True),
+        sa.Column('face_face_shape_conf', sa.Float(), nullable=True),
+        sa.Column('face_eye_color', sa.Integer(), nullable=True),
+        sa.Column('face_eye_color_conf', sa.Float(), nullable=True),
+        sa.Column('face_eye_shape', sa.Integer(), nullable=True),
+        sa.Column('face_eye_shape_conf', sa.Float(), nullable=True),
+        sa.Column('face_nose', sa.Integer(), nullable=True),
+        sa.Column('face_nose_conf', sa.Float(), nullable=True),
+        sa.Column('face_lips', sa.Integer(), nullable=True),
+        sa.Column('face_lips_conf', sa.Float(), nullable=True),
+        sa.Column('face_jawline', sa.Integer(), nullable=True),
+        sa.Column('face_jawline_conf', sa.Float(), nullable=True),
+        sa.Column('hair_color', sa.Integer(), nullable=True),
+        sa.Column('hair_color_conf', sa.Float(), nullable=True),
+        sa.Column('hair_length', sa.Integer(), nullable=True),
+        sa.Column('hair_length_conf', sa.Float(), nullable=True),
+        sa.Column('hair_texture', sa.Integer(), nullable=True),
+        sa.Column('hair_texture_conf', sa.Float(), nullable=True),
+        sa.Column('extra_facial_hair', sa.Integer(), nullable=True),
+        sa.Column('extra_facial_hair_conf', sa.Float(), nullable=True),
+        sa.Column('extra_skin_tone', sa.Integer(), nullable=True),
+        sa.Column('extra_skin_tone_conf', sa.Float(), nullable=True),
+        sa.Column('extra_glasses', sa.Integer(), nullable=True),
+        sa.Column('extra_glasses_conf', sa.Float(), nullable=True),
+        sa.Column('extra_tattoos', sa.Integer(), nullable=True),
+        sa.Column('extra_tattoos_conf', sa.Float(), nullable=True),
+        sa.Column('vibe_style', sa.Integer(), nullable=True),
+        sa.Column('vibe_style_conf', sa.Float(), nullable=True),
+        sa.Column('vibe_vibe', sa.Integer(), nullable=True),
+        sa.Column('vibe_vibe_conf', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['collection_id'], ['photocollection.id']),
+        sa.ForeignKeyConstraint(['photo_id'], ['storedphoto.id']),
+        sa.PrimaryKeyConstraint('photo_id'),
+    )
+    op.create_index('ix_photoattributes_collection_id', 'photoattributes', ['collection_id'])
+    op.create_index('ix_photoattributes_collection_gender_age', 'photoattributes', ['collection_id', 'basic_gender', 'basic_age_group'])
+
+    # Backfill from existing JSON profiles
+    photos = sa.table(
+        'storedphoto',
+        sa.column('id', sa.Uuid()),
+        sa.column('collection_id', sa.Uuid()),
+        sa.column('profile', sa.JSON()),
+    )
+    bind = op.get_bind()
+    batch = []
+    for photo_id, collection_id, profile in bind.execute(sa.select(photos.c.id, photos.c.collection_id, photos.c.profile)).all():
+        row = attribute_row(photo_id, collection_id, profile)
+        if row:
+            batch.append(row)
+        if len(batch) >= BACKFILL_BATCH:
+            bind.execute(attributes.insert(), batch)
+            batch = []
+    if batch:
+        bind.execute(attributes.insert(), batch)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_photoattributes_collection_gender_age', table_name='photoattributes')
+    op.drop_index('ix_photoattributes_collection_id', table_name='photoattributes')
+    op.drop_table('photoattributes')
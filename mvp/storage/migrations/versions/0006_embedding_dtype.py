@@ -0,0 +1,32 @@
+"""Storage dtype of StoredPhoto.embedding
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing blobs are float32, which NULL stands for
+    with op.batch_alter_table('storedphoto') as batch_op:
+        batch_op.add_column(sa.Column('embedding_dtype', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('storedphoto') as batch_op:
+        batch_op.drop_column('embedding_dtype')
@@ -0,0 +1,67 @@
+"""Fingerprint of the attribute code tables behind PhotoAttributes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:06
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The code tables 0004 backfilled with (unchanged since); a migration that changes them
+# must re-code photoattributes and store the new fingerprint.
+CODE_TABLES = {
+    'basic.gender': ('male', 'female', 'other'),
+    'basic.age_group': ('18-24', '25-34', '35-44', '45-54', '55+'),
+    'basic.ethnicity': ('caucasian', 'african', 'asian', 'latino', 'middle_eastern', 'indian', 'other'),
+    'basic.height': ('short', 'medium', 'tall', 'very_tall'),
+    'basic.body_type': ('slim', 'athletic', 'average', 'curvy', 'plus_size'),
+    'face.face_shape': ('oval', 'round', 'square', 'heart', 'diamond', 'oblong'),
+    'face.eye_color': ('blue', 'green', 'hazel', 'brown', 'black', 'grey'),
+    'face.eye_shape': ('almond', 'round', 'monolid', 'hooded', 'downturned', 'upturned'),
+    'face.nose': ('small', 'average', 'large', 'straight', 'hooked', 'button'),
+    'face.lips': ('thin', 'average', 'full'),
+    'face.jawline': ('soft', 'defined', 'strong'),
+    'hair.color': ('black', 'dark_brown', 'light_brown', 'blonde', 'red', 'grey', 'dyed'),
+    'hair.length': ('bald', 'short', 'medium', 'long'),
+    'hair.texture': ('straight', 'wavy', 'curly', 'coily'),
+    'extra.facial_hair': ('none', 'stubble', 'beard', 'mustache', 'goatee'),
+    'extra.skin_tone': ('fair', 'light', 'medium', 'tan', 'dark'),
+    'extra.glasses': ('none', 'reading', 'sunglasses'),
+    'extra.tattoos': ('none', 'minimal', 'visible'),
+    'vibe.style': ('casual', 'formal', 'chic', 'bohemian', 'streetwear', 'vintage', 'edgy', 'sporty'),
+    'vibe.vibe': ('friendly', 'serious', 'confident', 'shy', 'energetic', 'calm', 'intellectual'),
+}
+
+
+def fingerprint() -> str:
+    spec = [(key, list(values)) for key, values in CODE_TABLES.items()]
+    return hashlib.blake2b(json.dumps(spec).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    schema = op.create_table(
+        'attributeschema',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.bulk_insert(schema, [{'id': 1, 'fingerprint': fingerprint()}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('attributeschema')
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship, Column, JSON
 
 # User model
@@ -28,11 +29,12 @@ class PhotoCollection(SQLModel, table=True):
 # Stored Photo model
 class StoredPhoto(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    collection_id: UUID = Field(foreign_key="photocollection.id")
-    image_path: str
+    collection_id: UUID = Field(foreign_key="photocollection.id", index=True)
+    image_path: str = Field(index=True)
     profile: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))  # Serialized PhotoProfile
-    phash: Optional[str] = None # Perceptual hash for deduplication
-    embedding: Optional[bytes] = None  # Serialized numpy array
+    phash: Optional[str] = Field(default=None, index=True) # Perceptual hash for deduplication
+    embedding: Optional[bytes] = None  # Packed vector (see schema/embedding.py)
+    embedding_dtype: Optional[str] = None  # "float32" or "float16"; NULL (rows before 0006) is float32
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     collection: Optional[PhotoCollection] = Relationship(back_populates="photos")
@@ -58,3 +60,97 @@ class SavedExample(SQLModel, table=True):
     profile: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+
+# Named attribute importance weights of a user, optionally tied to one search session.
+# Only overrides are stored ({"hair.color": 4.0}); Ranker.DEFAULT_WEIGHTS fill the rest.
+class WeightProfile(SQLModel, table=True):
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="user.id", index=True)
+    name: str
+    session_id: Optional[str] = Field(default=None, index=True)
+    weights: Dict[str, float] = Field(default={}, sa_column=Column(JSON))
+    is_default: bool = Field(default=False)  # Used when a search names no profile
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Fingerprint of the attribute code tables the PhotoAttributes codes were written with
+# (schema/attribute_codes.schema_fingerprint). A migration that changes the codes re-codes
+# the table and updates this row; startup refuses to run on a mismatch.
+class AttributeSchema(SQLModel, table=True):
+    id: int = Field(default=1, primary_key=True)
+    fingerprint: str
+
+
+# Background job model (durable queue, see storage/job_queue.py)
+class Job(SQLModel, table=True):
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    kind: str = Field(index=True)
+    payload: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    collection_id: Optional[UUID] = Field(default=None, index=True)
+    status: str = Field(default="queued", index=True)  # queued, running, done, failed
+    priority: int = Field(default=0)  # Higher = claimed first
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=5)
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+# Typed attribute columns for a StoredPhoto profile (see schema/attribute_codes.py).
+# One row per annotated photo; codes index the attribute's enum members, *_conf holds confidence.
+class PhotoAttributes(SQLModel, table=True):
+    photo_id: UUID = Field(foreign_key="storedphoto.id", primary_key=True)
+    collection_id: UUID = Field(foreign_key="photocollection.id", index=True)
+    # basic
+    basic_gender: Optional[int] = None
+    basic_gender_conf: Optional[float] = None
+    basic_age_group: Optional[int] = None
+    basic_age_group_conf: Optional[float] = None
+    basic_ethnicity: Optional[int] = None
+    basic_ethnicity_conf: Optional[float] = None
+    basic_height: Optional[int] = None
+    basic_height_conf: Optional[float] = None
+    basic_body_type: Optional[int] = None
+    basic_body_type_conf: Optional[float] = None
+    # face
+    face_face_shape: Optional[int] = None
+    face_face_shape_conf: Optional[float] = None
+    face_eye_color: Optional[int] = None
+    face_eye_color_conf: Optional[float] = None
+    face_eye_shape: Optional[int] = None
+    face_eye_shape_conf: Optional[float] = None
+    face_nose: Optional[int] = None
+    face_nose_conf: Optional[float] = None
+    face_lips: Optional[int] = None
+    face_lips_conf: Optional[float] = None
+    face_jawline: Optional[int] = None
+    face_jawline_conf: Optional[float] = None
+    # hair
+    hair_color: Optional[int] = None
+    hair_color_conf: Optional[float] = None
+    hair_length: Optional[int] = None
+    hair_length_conf: Optional[float] = None
+    hair_texture: Optional[int] = None
+    hair_texture_conf: Optional[float] = None
+    # extra
+    extra_facial_hair: Optional[int] = None
+    extra_facial_hair_conf: Optional[float] = None
+    extra_skin_tone: Optional[int] = None
+    extra_skin_tone_conf: Optional[float] = None
+    extra_glasses: Optional[int] = None
+    extra_glasses_conf: Optional[float] = None
+    extra_tattoos: Optional[int] = None
+    extra_tattoos_conf: Optional[float] = None
+    # vibe
+    vibe_style: Optional[int] = None
+    vibe_style_conf: Optional[float] = None
+    vibe_vibe: Optional[int] = None
+    vibe_vibe_conf: Optional[float] = None
+
+    __table_args__ = (
+        Index("ix_photoattributes_collection_gender_age", "collection_id", "basic_gender", "basic_age_group"),
+    )
@@ -0,0 +1,241 @@
+"""
+Memory-mapped binary snapshot of the in-memory profile database.
+
+Startup used to json.load the whole metadata file and validate every item into a
+PhotoProfile. A snapshot is built once from that file (`python -m
+mvp.storage.snapshot build`) and opened with mmap: nothing is parsed up front,
+profiles are decoded on first access, and worker processes share the same
+page-cache pages.
+
+Layout (little-endian, sections 64-byte aligned):
+
+    header       magic, version, flags, count, n_fields, embedding_dim,
+                 schema hash, 7 section offsets
+    codes        int8    [count, n_fields]   attribute codes, -1 = missing
+    confidences  float16 [count, n_fields]
+    id offsets   uint64  [count + 1]  + utf-8 id blob
+    path offsets uint64  [count + 1]  + utf-8 path blob
+    embeddings   float32 [count, embedding_dim]   (only if FLAG_EMBEDDINGS)
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS, decode_profile, encode_profile, schema_fingerprint
+from mvp.schema.models import PhotoProfile
+
+MAGIC = b"SAPSNAP\x00"
+VERSION = 1
+FLAG_EMBEDDINGS = 1
+ALIGN = 64
+MISSING = -1
+
+_HEADER = struct.Struct("<8sHHQHIQ7Q")
+
+
+def schema_hash() -> int:
+    """Fingerprint of the attribute code mapping; a snapshot built with other enums must be rebuilt."""
+    return int.from_bytes(bytes.fromhex(schema_fingerprint()), "little")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _string_table(values: List[str]):
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def write_snapshot(path: Union[str, Path], profiles: Iterable[PhotoProfile], include_embeddings: bool = True) -> int:
+    """Write profiles to `path`. Returns the number of profiles written."""
+    profiles = list(profiles)
+    count, n_fields = len(profiles), len(ATTRIBUTE_FIELDS)
+
+    codes = np.full((count, n_fields), MISSING, dtype=np.int8)
+    confidences = np.zeros((count, n_fields), dtype=np.float16)
+    for i, profile in enumerate(profiles):
+        row = encode_profile(profile)
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            code = row[f.column]
+            if code is not None:
+                codes[i, j] = code
+                confidences[i, j] = row[f"{f.column}_conf"] or 0.0
+
+    id_offsets, id_blob = _string_table([p.id or "" for p in profiles])
+    path_offsets, path_blob = _string_table([p.image_path or "" for p in profiles])
+
+    embedding_dim = 0
+    embeddings = None
+    if include_embeddings:
+        embedding_dim = max((len(p.embedding) for p in profiles if p.embedding is not None), default=0)
+    if embedding_dim:
+        # Profiles without an embedding get a NaN row
+        embeddings = np.full((count, embedding_dim), np.nan, dtype=np.float32)
+        for i, p in enumerate(profiles):
+            if p.embedding is not None and len(p.embedding) == embedding_dim:
+                embeddings[i] = p.embedding
+
+    sections = [codes.tobytes(), confidences.tobytes(), id_offsets.tobytes(), id_blob, path_offsets.tobytes(), path_blob]
+    if embeddings is not None:
+        sections.append(embeddings.tobytes())
+
+    offsets = []
+    position = _align(_HEADER.size)
+    for data in sections:
+        offsets.append(position)
+        position = _align(position + len(data))
+    offsets += [0] * (7 - len(offsets))
+
+    flags = FLAG_EMBEDDINGS if embeddings is not None else 0
+    header = _HEADER.pack(MAGIC, VERSION, flags, count, n_fields, embedding_dim, schema_hash(), *offsets)
+
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for offset, data in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    # Readers with the old file mapped keep their pages; new readers see the new file
+    tmp_path.replace(path)
+    return count
+
+
+class ProfileSnapshot(Sequence):
+    """Read-only, memory-mapped sequence of PhotoProfiles. Profiles are decoded lazily and cached."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < _HEADER.size:
+            raise ValueError(f"{self.path} is not a profile snapshot")
+        magic, version, flags, count, n_fields, embedding_dim, fingerprint, *offsets = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a profile snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} (expected {VERSION})")
+        if n_fields != len(ATTRIBUTE_FIELDS) or fingerprint != schema_hash():
+            raise ValueError(f"Snapshot {self.path} was built for a different attribute schema, rebuild it")
+
+        self.count = count
+        self.embedding_dim = embedding_dim
+        codes_off, conf_off, id_off, id_blob, path_off, path_blob, emb_off = offsets
+
+        buf = memoryview(self._mm)
+        self.codes = np.frombuffer(buf, dtype=np.int8, count=count * n_fields, offset=codes_off).reshape(count, n_fields)
+        self.confidences = np.frombuffer(buf, dtype=np.float16, count=count * n_fields, offset=conf_off).reshape(count, n_fields)
+        self._id_offsets = np.frombuffer(buf, dtype=np.uint64, count=count + 1, offset=id_off)
+        self._path_offsets = np.frombuffer(buf, dtype=np.uint64, count=count + 1, offset=path_off)
+        self._id_blob, self._path_blob = id_blob, path_blob
+
+        self.embeddings: Optional[np.ndarray] = None
+        if flags & FLAG_EMBEDDINGS:
+            self.embeddings = np.frombuffer(buf, dtype=np.float32, count=count * embedding_dim, offset=emb_off).reshape(count, embedding_dim)
+
+        self._cache: List[Optional[PhotoProfile]] = [None] * count
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "ProfileSnapshot":
+        return cls(path)
+
+    def _string(self, blob: int, offsets: np.ndarray, i: int) -> Optional[str]:
+        start, end = blob + int(offsets[i]), blob + int(offsets[i + 1])
+        return self._mm[start:end].decode("utf-8") or None
+
+    def id_at(self, i: int) -> Optional[str]:
+        return self._string(self._id_blob, self._id_offsets, i)
+
+    def path_at(self, i: int) -> Optional[str]:
+        return self._string(self._path_blob, self._path_offsets, i)
+
+    def _decode(self, i: int) -> PhotoProfile:
+        row: Dict[str, Any] = {}
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            code = int(self.codes[i, j])
+            if code != MISSING:
+                row[f.column] = code
+                # float16 keeps ~3 significant digits; annotator confidences have two decimals
+                row[f"{f.column}_conf"] = round(float(self.confidences[i, j]), 3)
+        profile = decode_profile(row, id=self.id_at(i), image_path=self.path_at(i))
+
+        if self.embeddings is not None:
+            vector = self.embeddings[i]
+            if not np.isnan(vector[0]):
+                profile.embedding = vector.copy()  # 2 KB array; a view would pin the mmap open
+        return profile
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        profile = self._cache[index]
+        if profile is None:
+            profile = self._cache[index] = self._decode(index)
+        return profile
+
+    def close(self):
+        # Drop numpy views first; mmap refuses to close with exported buffers
+        self.codes = self.confidences = self.embeddings = None
+        self._id_offsets = self._path_offsets = None
+        self._cache = []
+        self._mm.close()
+
+
+def load_metadata_profiles(metadata_path: Union[str, Path]) -> List[PhotoProfile]:
+    """Parse and validate a metadata JSON file, skipping invalid items (same rules as the JSON startup path)."""
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+    profiles = []
+    for item in raw_data:
+        try:
+            profiles.append(PhotoProfile(**item))
+        except Exception as e:
+            print(f"Skipping profile {item.get('id', '?')}: {e}")
+    return profiles
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m mvp.storage.snapshot", description="Profile snapshot tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Build a snapshot from a metadata JSON file")
+    build.add_argument("--metadata", default="data/wiki_1000_metadata.json")
+    build.add_argument("--out", default="data/wiki_1000_profiles.snap")
+    build.add_argument("--no-embeddings", action="store_true", help="Omit the embedding block")
+
+    info = commands.add_parser("info", help="Print snapshot header information")
+    info.add_argument("path", nargs="?", default="data/wiki_1000_profiles.snap")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        profiles = load_metadata_profiles(args.metadata)
+        count = write_snapshot(args.out, profiles, include_embeddings=not args.no_embeddings)
+        print(f"Wrote {count} profiles to {args.out} ({Path(args.out).stat().st_size / 1e6:.1f} MB)")
+    elif args.command == "info":
+        snapshot = ProfileSnapshot(args.path)
+        print(f"{args.path}: version {VERSION}, {len(snapshot)} profiles, "
+              f"{len(ATTRIBUTE_FIELDS)} attributes, embedding dim {snapshot.embedding_dim or 'none'}")
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,13 +5,15 @@ Converts natural language descriptions into structured PhotoProfile objects
 using the configured VLM/LLM providers.
 """
 import json
-import logging
+import time
 from typing import Optional, Dict, Any
 
 from mvp.schema.models import PhotoProfile
 from mvp.providers.registry import registry
+from mvp.core.log import get_logger
+from mvp.core.metrics import PROVIDER_REQUESTS, PROVIDER_SECONDS
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 class PromptParser:
     """
@@ -101,7 +103,7 @@ Rules:
         Returns:
             PhotoProfile with extracted attributes
         """
-        print(f"DEBUG: PromptParser.parse_prompt called with: '{text}'", flush=True)
+        logger.debug("parse_prompt", extra={"prompt": text})
         
         try:
             # Use the registry to get a working provider
@@ -112,10 +114,10 @@ Rules:
                 preferred_provider = 'anthropic'
             
             provider_names = self.registry._get_provider_order(preferred_provider)
-            print(f"DEBUG: Available providers: {provider_names}", flush=True)
+            logger.debug("available providers", extra={"providers": provider_names})
             
             if not provider_names:
-                print("ERROR: No providers available! Check .env and provider config.", flush=True)
+                logger.error("no providers available, check .env and provider config")
             
             for provider_name in provider_names:
                 provider = self.registry.get_provider(provider_name)
@@ -123,9 +125,9 @@ Rules:
                     continue
                 
                 try:
-                    logger.info(f"Parsing prompt with {provider_name}...")
-                    print(f"DEBUG: Using provider {provider_name}...", flush=True)
+                    logger.info("parsing prompt", extra={"provider": provider_name})
                     
+                    started = time.perf_counter()
                     response_text = await provider.generate_text(
                         prompt=text,
                         system_prompt=self.SYSTEM_PROMPT,
@@ -133,7 +135,8 @@ Rules:
                         response_format={"type": "json_object"} if provider_name == 'openai' else None
                     )
                     
-                    print(f"DEBUG: Provider response (len={len(response_text)})", flush=True)
+                    PROVIDER_SECONDS.observe(time.perf_counter() - started, provider=provider_name)
+                    logger.debug("provider response", extra={"provider": provider_name, "length": len(response_text)})
                     
                     # Clean and parse
                     cleaned = response_text.replace("```json", "").replace("```", "").strip()
@@ -158,20 +161,18 @@ Rules:
                     # Fill defaults as requested
                     profile = self._fill_defaults(profile)
                     
+                    PROVIDER_REQUESTS.inc(provider=provider_name, outcome="success")
                     return profile
                     
                 except Exception as e:
-                    logger.warning(f"Provider {provider_name} failed to parse prompt: {e}")
-                    print(f"WARNING: Provider {provider_name} failed: {e}", flush=True)
-                    import traceback
-                    traceback.print_exc()
+                    PROVIDER_REQUESTS.inc(provider=provider_name, outcome="failure")
+                    logger.warning("provider failed to parse prompt", extra={"provider": provider_name, "error": str(e)}, exc_info=True)
                     continue
             
             raise Exception("All providers failed to parse prompt")
             
         except Exception as e:
-            logger.error(f"Error parsing prompt '{text}': {e}")
-            print(f"ERROR: parse_prompt failed: {e}", flush=True)
+            logger.error("parse_prompt failed", extra={"prompt": text, "error": str(e)})
             raise e
 
     def _fill_defaults(self, profile: PhotoProfile) -> PhotoProfile:
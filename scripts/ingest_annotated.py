@@ -10,6 +10,7 @@ sys.path.append(os.getcwd())
 
 from sqlmodel import Session, select, create_engine
 from mvp.storage.models import PhotoCollection, StoredPhoto, User
+from mvp.storage.bulk_import import bulk_import_photos, profile_dict
 from mvp.core.hasher import ImageHasher
 
 # Params
@@ -53,9 +54,12 @@ def main():
         col_dir = Path(f"data/uploads/{col.id}")
         col_dir.mkdir(parents=True, exist_ok=True)
         
-        count = 0
-        skipped = 0
-        
+        collection_id = col.id
+    
+    skipped = 0
+    
+    def rows():
+        nonlocal skipped
         for entry in data:
             # 1. Resolve File
             json_path = entry.get("image_path", "")
@@ -69,61 +73,21 @@ def main():
                 if os.path.exists(json_path):
                      local_path = Path(json_path)
                 else:
-                     # print(f"Missing file: {filename}")
                      skipped += 1
                      continue
             
-            # 2. Copy to collection folder (renaming not needed usually, but good practice for unique IDs)
-            # Check if already exists in DB by hash or name
-            # Calculate hash?
-            
+            # 2. Copy to collection folder
             dest_path = col_dir / filename
             
             if not dest_path.exists():
                 shutil.copy2(local_path, dest_path)
             
-            # 3. Create DB Entry
-            # Check existance by path
-            existing = session.exec(select(StoredPhoto).where(StoredPhoto.image_path == str(dest_path))).first()
-            
-            if existing:
-                # Update profile
-                profile_data = {
-                    "basic": entry.get("basic"),
-                    "face": entry.get("face"),
-                    "hair": entry.get("hair"),
-                    "extra": entry.get("extra"),
-                    "vibe": entry.get("vibe")
-                }
-                existing.profile = profile_data
-                session.add(existing)
-            else:
-                profile_data = {
-                    "basic": entry.get("basic"),
-                    "face": entry.get("face"),
-                    "hair": entry.get("hair"),
-                    "extra": entry.get("extra"),
-                    "vibe": entry.get("vibe")
-                }
-                
-                photo = StoredPhoto(
-                    collection_id=col.id,
-                    image_path=str(dest_path),
-                    profile=profile_data
-                )
-                session.add(photo)
-                count += 1
-                
-            if count % 100 == 0:
-                print(f"Processed {count}...")
-                session.commit() # Commit batch
-        
-        # Update Stats
-        col.photo_count += count
-        session.add(col)
-        session.commit()
-        
-        print(f"Done. Imported {count} new photos. Skipped {skipped} missing files.")
+            # 3. DB entry; existing paths get their profile updated
+            yield {"image_path": str(dest_path), "profile": profile_dict(entry)}
+    
+    stats = bulk_import_photos(engine, collection_id, rows(), key="image_path", update_existing=True)
+    
+    print(f"Done. Imported {stats.inserted} new photos, updated {stats.updated}. Skipped {skipped} missing files.")
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,7 @@ sys.path.append(os.getcwd())
 
 from sqlmodel import Session, select, create_engine
 from mvp.storage.models import PhotoCollection, StoredPhoto, User
+from mvp.storage.attribute_store import sync_photo_attributes
 from mvp.annotator.client import VLMClient
 from mvp.annotator.prompts import SYSTEM_PROMPT
 
@@ -125,6 +126,7 @@ async def main():
                 print(f"Photo already exists {existing.id}, updating profile.")
                 existing.profile = profile_data
                 session.add(existing)
+                sync_photo_attributes(session, existing)
             else:
                 photo = StoredPhoto(
                     collection_id=col.id,
@@ -132,6 +134,8 @@ async def main():
                     profile=profile_data
                 )
                 session.add(photo)
+                session.flush()
+                sync_photo_attributes(session, photo)
                 count += 1
             
         if count > 0:
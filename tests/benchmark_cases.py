@@ -0,0 +1,321 @@
+"""
+Synthetic workloads and benchmark cases for tests/benchmark_search.py.
+
+Collections are fully populated (every attribute set) and generated from a fixed
+seed, so every run times the same data. Cases that need PhotoProfile objects,
+JSON or a database are capped (object_limit, db_limit): a million pydantic
+objects would measure the allocator, not the code path.
+
+A case is `def case(workload) -> (run, items)`: `run()` is timed,
+`items` is how many things one run processes (for per-item rates). Returning a
+string instead means the case is skipped, with that reason.
+"""
+import json
+import tempfile
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from uuid import UUID, uuid4
+
+import numpy as np
+from PIL import Image
+
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS
+from mvp.schema.models import PhotoProfile
+from mvp.search.aggregator import AggregationState
+from mvp.search.ranker import Ranker
+from mvp.search.vectorized import ProfileMatrix, SoftTarget, top_k
+
+CaseResult = Union[Tuple[Callable[[], Any], int], str]
+CASES: Dict[str, Callable[["Workload"], CaseResult]] = {}
+FIXED_SIZE_CASES = set()  # Cases whose cost does not depend on the collection size
+
+IMAGE_COUNT = 32
+LOOP_LIMIT = 10_000
+FILTER = {"basic.gender": "female", "basic.age_group": ["25-34", "35-44"]}
+
+
+def case(name: str, fixed_size: bool = False):
+    def register(fn):
+        CASES[name] = fn
+        if fixed_size:
+            FIXED_SIZE_CASES.add(name)
+        return fn
+    return register
+
+
+class Workload:
+    """A synthetic collection of n profiles; parts are built on first use."""
+
+    def __init__(self, n: int, seed: int = 0, object_limit: int = 100_000, db_limit: int = 100_000, tmp_dir: Optional[Path] = None):
+        self.n = n
+        self.seed = seed
+        self.object_limit = object_limit
+        self.db_limit = db_limit
+        self._tmp = None if tmp_dir else tempfile.TemporaryDirectory(prefix="bench_")
+        self.tmp_dir = Path(tmp_dir or self._tmp.name)
+
+    def close(self):
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+    @cached_property
+    def codes(self) -> Tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(self.seed)
+        codes = np.stack([rng.integers(0, len(f.members), self.n) for f in ATTRIBUTE_FIELDS], axis=1).astype(np.int8)
+        confidences = rng.uniform(0.4, 1.0, size=codes.shape).round(2).astype(np.float16)
+        return codes, confidences
+
+    @cached_property
+    def matrix(self) -> ProfileMatrix:
+        codes, confidences = self.codes
+        return ProfileMatrix(codes, confidences)
+
+    def profile_dict(self, i: int) -> Dict[str, Any]:
+        codes, confidences = self.codes
+        profile: Dict[str, Any] = {"id": f"p{i}", "image_path": f"/data/{i}.jpg"}
+        for j, f in enumerate(ATTRIBUTE_FIELDS):
+            profile.setdefault(f.category, {})[f.field] = {
+                "value": f.members[codes[i, j]].value, "confidence": float(confidences[i, j]),
+            }
+        return profile
+
+    @cached_property
+    def object_count(self) -> int:
+        return min(self.n, self.object_limit)
+
+    @cached_property
+    def profile_dicts(self) -> List[Dict[str, Any]]:
+        return [self.profile_dict(i) for i in range(self.object_count)]
+
+    @cached_property
+    def profiles(self) -> List[PhotoProfile]:
+        return [PhotoProfile(**d) for d in self.profile_dicts]
+
+    @cached_property
+    def profile_json(self) -> List[str]:
+        return [json.dumps(d) for d in self.profile_dicts]
+
+    @cached_property
+    def target(self) -> SoftTarget:
+        rng = np.random.default_rng(self.seed + 1)
+        state = AggregationState()
+        for i in rng.choice(self.object_count, size=min(6, self.object_count), replace=False):
+            state.add_positive(PhotoProfile(**self.profile_dict(int(i))))
+        state.add_negative(PhotoProfile(**self.profile_dict(int(rng.integers(self.object_count)))))
+        return SoftTarget.from_state(state)
+
+    @cached_property
+    def database(self) -> Tuple[str, UUID]:
+        """SQLite file with min(n, db_limit) photos in one collection."""
+        from sqlmodel import Session
+        from mvp.storage.bulk_import import bulk_import_photos
+        from mvp.storage.database import create_sqlite_engine, run_migrations
+        from mvp.storage.models import PhotoCollection
+
+        path = self.tmp_dir / f"bench_{self.n}.db"
+        engine = create_sqlite_engine(f"sqlite:///{path}")
+        run_migrations(engine)
+        with Session(engine) as session:
+            collection = PhotoCollection(name="bench", user_id=uuid4())
+            session.add(collection)
+            session.commit()
+            collection_id = collection.id
+        rows = (
+            {"image_path": f"/data/{i}.jpg", "profile": {k: v for k, v in self.profile_dict(i).items() if k not in ("id", "image_path")}}
+            for i in range(min(self.n, self.db_limit))
+        )
+        bulk_import_photos(engine, collection_id, rows)
+        engine.dispose()
+        return str(path), collection_id
+
+    @cached_property
+    def images(self) -> List[Path]:
+        """Small JPEGs of smooth random noise (phash and embedders decode real files)."""
+        rng = np.random.default_rng(self.seed + 2)
+        paths = []
+        for i in range(IMAGE_COUNT):
+            small = rng.integers(0, 256, size=(16, 16, 3), dtype=np.uint8)
+            path = self.tmp_dir / f"img_{i}.jpg"
+            Image.fromarray(small).resize((256, 256), Image.Resampling.BILINEAR).save(path, quality=85)
+            paths.append(path)
+        return paths
+
+
+# --- Ranking ---
+
+@case("score")
+def score(w: Workload) -> CaseResult:
+    ranker, matrix, target = Ranker(), w.matrix, w.target
+    return (lambda: ranker.score_collection(target, matrix)), w.n
+
+
+@case("score_loop")
+def score_loop(w: Workload) -> CaseResult:
+    """The per-candidate Python path (score_candidate), on up to LOOP_LIMIT profiles."""
+    ranker, profiles = Ranker(), w.profiles[:LOOP_LIMIT]
+    target = profiles[0]
+    return (lambda: [ranker.score_candidate(target, c) for c in profiles]), len(profiles)
+
+
+@case("top_k")
+def top_k_case(w: Workload) -> CaseResult:
+    scores = np.random.default_rng(w.seed).random(w.n, dtype=np.float32)
+    return (lambda: top_k(scores, 100)), w.n
+
+
+@case("filter")
+def filter_case(w: Workload) -> CaseResult:
+    ranker, profiles = Ranker(), w.profiles
+    return (lambda: ranker.filter_candidates(profiles, FILTER)), len(profiles)
+
+
+@case("aggregate", fixed_size=True)
+def aggregate(w: Workload) -> CaseResult:
+    """Refine a session: 10 positives, 3 negatives, then build and compile the soft target."""
+    examples = [PhotoProfile(**w.profile_dict(i)) for i in range(min(13, w.object_count))]
+
+    def run():
+        state = AggregationState()
+        for p in examples[:10]:
+            state.add_positive(p)
+        for p in examples[10:]:
+            state.add_negative(p)
+        state.target_profile()
+        return SoftTarget.from_state(state).compile(Ranker.DEFAULT_WEIGHTS)
+    return run, len(examples)
+
+
+# --- Profiles and storage ---
+
+@case("profile_parse")
+def profile_parse(w: Workload) -> CaseResult:
+    """VLM output -> validated PhotoProfile."""
+    documents = w.profile_json
+    return (lambda: [PhotoProfile.model_validate_json(d) for d in documents]), len(documents)
+
+
+@case("db_scan")
+def db_scan(w: Workload) -> CaseResult:
+    from sqlmodel import Session
+    from mvp.storage.attribute_store import load_profiles
+    from mvp.storage.database import create_sqlite_engine
+
+    path, collection_id = w.database
+    engine = create_sqlite_engine(f"sqlite:///{path}")
+
+    def run():
+        with Session(engine) as session:
+            return load_profiles(session, collection_id)
+    return run, min(w.n, w.db_limit)
+
+
+@case("db_filter")
+def db_filter(w: Workload) -> CaseResult:
+    from sqlmodel import Session
+    from mvp.storage.attribute_store import load_profiles
+    from mvp.storage.database import create_sqlite_engine
+
+    path, collection_id = w.database
+    engine = create_sqlite_engine(f"sqlite:///{path}")
+
+    def run():
+        with Session(engine) as session:
+            return load_profiles(session, collection_id, FILTER)
+    return run, min(w.n, w.db_limit)
+
+
+# --- Images ---
+
+@case("phash", fixed_size=True)
+def phash(w: Workload) -> CaseResult:
+    from mvp.core.hasher import ImageHasher
+    images = w.images
+    return (lambda: [ImageHasher.compute_hash(str(p)) for p in images]), len(images)
+
+
+class _TinyImageModel:
+    """Stand-in for the CLIP image tower: downsample and project to 512-d."""
+
+    def __init__(self, seed: int = 0):
+        self.projection = np.random.default_rng(seed).standard_normal((32 * 32 * 3, 512)).astype(np.float32)
+
+    def encode(self, item):
+        if isinstance(item, str):
+            item = Image.new("RGB", (32, 32))
+        pixels = np.asarray(item.convert("RGB").resize((32, 32)), dtype=np.float32).ravel() / 255.0
+        embedding = pixels @ self.projection
+        return embedding / np.linalg.norm(embedding)
+
+
+@case("clip_embed", fixed_size=True)
+def clip_embed(w: Workload) -> CaseResult:
+    """ImageEmbedder.encode_image (decode, preprocess, model call) with a tiny stand-in model."""
+    from mvp.core.embedder import ImageEmbedder
+    embedder = ImageEmbedder.__new__(ImageEmbedder)
+    embedder.model_name, embedder.model = "bench-tiny", _TinyImageModel(w.seed)
+    images = w.images
+    return (lambda: [embedder.encode_image(str(p)) for p in images]), len(images)
+
+
+@case("face_embed", fixed_size=True)
+def face_embed(w: Workload) -> CaseResult:
+    """FaceVerifier.get_face_embedding with a tiny crop + conv net in place of MTCNN/InceptionResnet."""
+    try:
+        import torch
+        from mvp.core.face_recognition import FaceVerifier
+    except ImportError:
+        return "torch not installed"
+
+    torch.manual_seed(w.seed)
+    verifier = FaceVerifier.__new__(FaceVerifier)
+    verifier.disabled, verifier.device = False, torch.device("cpu")
+    verifier.mtcnn = lambda img: torch.from_numpy(np.asarray(img.resize((160, 160)), dtype=np.float32)).permute(2, 0, 1)
+    verifier.resnet = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 8, 5, stride=4), torch.nn.ReLU(), torch.nn.AdaptiveAvgPool2d(4),
+        torch.nn.Flatten(), torch.nn.Linear(128, 512),
+    ).eval()
+    images = w.images
+
+    def run():
+        with torch.no_grad():
+            return [verifier.get_face_embedding(p) for p in images]
+    return run, len(images)
+
+
+# --- End to end ---
+
+@case("api_text_search")
+def api_text_search(w: Workload) -> CaseResult:
+    """POST /api/search/text through TestClient: stubbed prompt parser, real DB fetch and ranking."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from mvp.api.routes import search as search_routes
+    from mvp.search.result_cache import result_cache
+    from mvp.storage.database import create_async_sqlite_engine, get_async_session
+
+    path, collection_id = w.database
+    async_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}")
+    target = PhotoProfile(**w.profile_dict(0))
+
+    async def parse_prompt(prompt: str) -> PhotoProfile:
+        return target
+
+    async def session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    search_routes.parser.parse_prompt = parse_prompt
+    app = FastAPI()
+    app.include_router(search_routes.router, prefix="/api")
+    app.dependency_overrides[get_async_session] = session_override
+    client = TestClient(app)
+    body = {"prompt": "benchmark", "collection_id": str(collection_id), "top_k": 20}
+
+    def run():
+        result_cache.clear()  # Time the full fetch + rank, not a cache hit
+        response = client.post("/api/search/text", json=body)
+        response.raise_for_status()
+        return response
+    return run, min(w.n, w.db_limit)
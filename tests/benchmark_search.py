@@ -1,53 +1,200 @@
-import time
-import random
-import sys
+"""
+Benchmark suite for the search hot paths, with baseline regression gating.
+
+    python -m tests.benchmark_search                       # 10k and 100k, all cases
+    python -m tests.benchmark_search --sizes 10k,100k,1m --out bench.json
+    python -m tests.benchmark_search --save-baseline       # record this machine's baseline
+    python -m tests.benchmark_search --baseline tests/benchmark_baseline.json --tolerance 0.2
+
+Each case runs once to warm up, then `--repeat` times; the tracked metric is
+the median wall time. With a baseline, the run fails (exit code 1) when a
+case is more than `tolerance` slower than its baseline median, and the
+difference is more than `--min-delta` seconds, so sub-millisecond noise
+cannot fail it. Baselines are machine-specific, so none is committed:
+tests/benchmark_baseline.json does not exist until `--save-baseline` has
+been run on the machine that gates.
+
+Cases and synthetic workloads live in tests/benchmark_cases.py.
+"""
+import argparse
+import gc
+import json
 import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from typing import List
-from mvp.schema.models import PhotoProfile, BasicAttributesModel, AttributeScore
-from mvp.schema.attributes import Gender, AgeGroup, Ethnicity, Height, BodyType
-from mvp.search.ranker import Ranker
-
-def generate_random_profile(id_str: str) -> PhotoProfile:
-    # Minimal generation for speed test
-    basic = BasicAttributesModel(
-        gender=AttributeScore(value=random.choice(list(Gender)), confidence=0.9),
-        age_group=AttributeScore(value=random.choice(list(AgeGroup)), confidence=0.8),
-        ethnicity=AttributeScore(value=random.choice(list(Ethnicity)), confidence=0.9),
-        height=AttributeScore(value=random.choice(list(Height)), confidence=0.7),
-        body_type=AttributeScore(value=random.choice(list(BodyType)), confidence=0.6)
-    )
-    return PhotoProfile(
-        id=id_str,
-        image_path=f"/tmp/{id_str}.jpg",
-        basic=basic
+import numpy as np
+
+from tests.benchmark_cases import CASES, FIXED_SIZE_CASES, Workload
+
+DEFAULT_BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+DEFAULT_SIZES = "10k,100k"
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def size_label(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def time_case(run, repeat: int) -> List[float]:
+    run()  # Warm-up: imports, caches, lazy compilation
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def environment() -> Dict[str, object]:
+    from mvp.search.kernel import cpu_count, numba
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": getattr(numba, "__version__", None),
+        "platform": platform.platform(),
+        "cpus": cpu_count(),
+    }
+
+
+def run_suite(
+    sizes: Iterable[int],
+    cases: Optional[Iterable[str]] = None,
+    repeat: int = 5,
+    seed: int = 0,
+    object_limit: int = 100_000,
+    db_limit: int = 100_000,
+    log=print,
+) -> Dict[str, object]:
+    """Run the selected cases at every size; returns the JSON-ready report."""
+    names = list(cases or CASES)
+    unknown = set(names) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases: {sorted(unknown)}")
+
+    results: Dict[str, dict] = {}
+    skipped: Dict[str, str] = {}
+    sizes = sorted(set(sizes))
+    for n in sizes:
+        workload = Workload(n, seed=seed, object_limit=object_limit, db_limit=db_limit)
+        try:
+            for name in names:
+                if name in FIXED_SIZE_CASES and n != sizes[0]:
+                    continue
+                key = name if name in FIXED_SIZE_CASES else f"{name}@{size_label(n)}"
+                prepared = CASES[name](workload)
+                if isinstance(prepared, str):
+                    skipped[key] = prepared
+                    log(f"{key:<28} skipped: {prepared}")
+                    continue
+                run, items = prepared
+                times = time_case(run, repeat)
+                median = statistics.median(times)
+                results[key] = {
+                    "median_s": median,
+                    "min_s": min(times),
+                    "max_s": max(times),
+                    "items": items,
+                    "items_per_s": items / median if median > 0 else None,
+                    "runs": times,
+                }
+                log(f"{key:<28} {median * 1000:10.2f} ms  ({items:,} items, {items / median:,.0f}/s)")
+        finally:
+            workload.close()
+
+    return {
+        "environment": environment(),
+        "config": {"sizes": sizes, "repeat": repeat, "seed": seed, "object_limit": object_limit, "db_limit": db_limit},
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(report: Dict[str, object], baseline: Dict[str, object], tolerance: float = 0.25, min_delta: float = 0.001) -> List[dict]:
+    """
+    Per-case comparison of median times against a baseline report. A case regresses
+    when it is slower by more than `tolerance` (relative) and `min_delta` seconds.
+    """
+    rows = []
+    for key, current in report["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            continue
+        ratio = current["median_s"] / base["median_s"] if base["median_s"] > 0 else float("inf")
+        rows.append({
+            "case": key,
+            "baseline_s": base["median_s"],
+            "current_s": current["median_s"],
+            "ratio": ratio,
+            "regressed": ratio > 1.0 + tolerance and current["median_s"] - base["median_s"] > min_delta,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmark_search", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Collection sizes, e.g. 10k,100k,1m")
+    parser.add_argument("--cases", default="", help=f"Comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--object-limit", type=int, default=100_000, help="Cap for cases that need PhotoProfile objects")
+    parser.add_argument("--db-limit", type=int, default=100_000, help="Cap for cases that need a populated database")
+    parser.add_argument("--out", help="Write the JSON report here")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline report to compare against (if it exists)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per case")
+    parser.add_argument("--min-delta", type=float, default=0.001, help="Ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        [parse_size(s) for s in args.sizes.split(",") if s],
+        [c for c in args.cases.split(",") if c] or None,
+        repeat=args.repeat, seed=args.seed, object_limit=args.object_limit, db_limit=args.db_limit,
     )
 
-def benchmark():
-    print("Generating 10,000 candidate profiles...")
-    candidates = [generate_random_profile(str(i)) for i in range(10000)]
-    target = generate_random_profile("target")
-    ranker = Ranker()
-    
-    print("Starting ranking...")
-    start_time = time.time()
-    
-    # Simulate search
-    scores = []
-    for cand in candidates:
-        s = ranker.score_candidate(target, cand)
-        scores.append((cand.id, s))
-        
-    end_time = time.time()
-    duration = end_time - start_time
-    
-    print(f"Ranked 10,000 profiles in {duration:.4f} seconds.")
-    print(f"Speed: {10000/duration:.2f} profiles/sec")
-    
-    # Sort top 5 just to use the result
-    scores.sort(key=lambda x: x[1], reverse=True)
-    print("Top 5 matches:", scores[:5])
+    baseline_path = Path(args.baseline)
+    exit_code = 0
+    if baseline_path.exists() and not args.save_baseline:
+        rows = compare(report, json.loads(baseline_path.read_text()), args.tolerance, args.min_delta)
+        report["comparison"] = {"baseline": str(baseline_path), "tolerance": args.tolerance, "cases": rows}
+        print(f"\nAgainst {baseline_path} (tolerance {args.tolerance:.0%}):")
+        for row in rows:
+            flag = "REGRESSED" if row["regressed"] else ""
+            print(f"  {row['case']:<28} {row['baseline_s'] * 1000:10.2f} -> {row['current_s'] * 1000:10.2f} ms  x{row['ratio']:.2f} {flag}")
+        if any(row["regressed"] for row in rows):
+            exit_code = 1
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {baseline_path}")
+    return exit_code
+
 
 if __name__ == "__main__":
-    benchmark()
+    sys.exit(main())
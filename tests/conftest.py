@@ -0,0 +1,18 @@
+import pytest
+
+from mvp.storage.database import create_sqlite_engine, run_migrations
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Engine on a fresh SQLite file in tmp_path, migrated to head."""
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_db_url(db_engine) -> str:
+    """aiosqlite URL of the same database, for create_async_sqlite_engine."""
+    return f"sqlite+aiosqlite:///{db_engine.url.database}"
@@ -0,0 +1,355 @@
+"""
+Load-test driver: concurrent /api/search uploads, /api/search/text queries and
+WebSocket-tracked searches against a running server.
+
+    MOCK_VLM_ENABLED=true MOCK_VLM_LATENCY_MS=500 uvicorn mvp.api.main:app --workers 2 &
+    python -m tests.load_test --url http://localhost:8000
+    python -m tests.load_test --mix text=3,upload=1,ws=1 --concurrency 32 --duration 60 --out load.json
+
+With MOCK_VLM_ENABLED the server answers from the mock VLM provider
+(mvp/providers/mock_provider.py; latency, error and 429 knobs are MOCK_VLM_*),
+so runs are offline and repeatable.
+
+Scenarios:
+  upload  POST /api/search with a freshly generated image (never a cache hit)
+  text    POST /api/search/text
+  ws      open /ws/search/{session}, POST /api/search/text for that session and
+          wait for its "completed" update; also records time to the first update
+
+Reports per-scenario throughput and p50/p95/p99 latency, and the lag of the
+driver's own event loop: if that is high, the driver was the bottleneck. When
+the server runs with OBS_LOOP_MONITOR=true, the report also has the server's
+event-loop lag and the blocking calls seen during the run (from /api/metrics).
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import numpy as np
+from PIL import Image
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+Scenario = Callable[["LoadContext"], Awaitable[Optional[Dict[str, float]]]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+DEFAULT_MIX = "text=2,upload=1,ws=1"
+PROMPTS = [
+    "young woman with long blonde hair and glasses",
+    "tall man with a beard and short dark hair",
+    "middle-aged woman with curly red hair",
+    "older man, bald, wearing a suit",
+    "teenager with freckles and a ponytail",
+    "athletic man with tattoos and a shaved head",
+]
+
+
+def scenario(name: str):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+class ScenarioError(Exception):
+    """A scenario failed without an HTTP status (e.g. an "error" progress update)."""
+
+
+class LoadContext:
+    def __init__(self, client: httpx.AsyncClient, collection_id: str, ws_url: Optional[str] = None, seed: int = 0, timeout: float = 60.0):
+        self.client = client
+        self.collection_id = collection_id
+        self.ws_url = ws_url
+        self.seed = seed
+        self.timeout = timeout
+        self.counter = itertools.count()
+
+    def prompt(self, n: int) -> str:
+        # The suffix keeps prompts distinct, so rankings are not served from the result cache
+        return f"{PROMPTS[n % len(PROMPTS)]} #{n}"
+
+
+def make_image(seed: int, n: int) -> bytes:
+    """A small JPEG of smooth noise, different for every (seed, n)."""
+    rng = np.random.default_rng([seed, n])
+    small = rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(small).resize((128, 128), Image.Resampling.BILINEAR).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+# --- Scenarios ---
+
+@scenario("upload")
+async def upload(ctx: LoadContext):
+    n = next(ctx.counter)
+    files = [("positives", (f"load_{ctx.seed}_{n}.jpg", make_image(ctx.seed, n), "image/jpeg"))]
+    response = await ctx.client.post("/api/search", files=files)
+    response.raise_for_status()
+
+
+@scenario("text")
+async def text(ctx: LoadContext):
+    n = next(ctx.counter)
+    body = {"prompt": ctx.prompt(n), "collection_id": ctx.collection_id, "top_k": 20}
+    response = await ctx.client.post("/api/search/text", json=body)
+    response.raise_for_status()
+
+
+@scenario("ws")
+async def ws(ctx: LoadContext):
+    n = next(ctx.counter)
+    session_id = str(uuid4())
+    started = time.perf_counter()
+    first_update = None
+    async with websockets.connect(f"{ctx.ws_url}/ws/search/{session_id}", max_size=None) as socket:
+        body = {"prompt": ctx.prompt(n), "collection_id": ctx.collection_id, "top_k": 20, "session_id": session_id}
+        post = asyncio.create_task(ctx.client.post("/api/search/text", json=body))
+        try:
+            while True:
+                message = json.loads(await asyncio.wait_for(socket.recv(), ctx.timeout))
+                if first_update is None:
+                    first_update = time.perf_counter() - started
+                if message.get("stage") == "error":
+                    raise ScenarioError(message.get("message", "error update"))
+                if message.get("stage") == "completed":
+                    break
+        finally:
+            response = await post
+        response.raise_for_status()
+    return {"ws_first_update": first_update}
+
+
+# --- Driver ---
+
+async def measure_loop_lag(samples: List[float], interval: float = 0.05):
+    """How late a sleep wakes up: time the loop spent on other callbacks."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(loop.time() - start - interval, 0.0))
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ms = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+    }
+
+
+def error_label(e: Exception) -> str:
+    if isinstance(e, httpx.HTTPStatusError):
+        return str(e.response.status_code)
+    return type(e).__name__
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {sorted(unknown)} (expected {', '.join(SCENARIOS)})")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+async def run_load(
+    ctx: LoadContext,
+    mix: Dict[str, float],
+    concurrency: int = 8,
+    duration: Optional[float] = 30.0,
+    requests: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    Run `concurrency` workers, each picking scenarios by weight, until `duration`
+    seconds have passed or `requests` scenarios have started. Returns the report.
+    """
+    if "ws" in mix and (ctx.ws_url is None or websockets is None):
+        raise ValueError("The ws scenario needs a server URL and the websockets package")
+    names, weights = list(mix), list(mix.values())
+    rng = random.Random(ctx.seed)
+    budget = itertools.count() if requests else None
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    extras: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, Counter] = defaultdict(Counter)
+    lag: List[float] = []
+
+    started = time.perf_counter()
+    deadline = started + duration if duration else float("inf")
+
+    async def worker():
+        while time.perf_counter() < deadline and (budget is None or next(budget) < requests):
+            name = rng.choices(names, weights)[0]
+            begin = time.perf_counter()
+            try:
+                extra = await asyncio.wait_for(SCENARIOS[name](ctx), ctx.timeout)
+            except Exception as e:
+                errors[name][error_label(e)] += 1
+                continue
+            latencies[name].append(time.perf_counter() - begin)
+            for key, value in (extra or {}).items():
+                if value is not None:
+                    extras[key].append(value)
+
+    probe = asyncio.create_task(measure_loop_lag(lag))
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        probe.cancel()
+    elapsed = time.perf_counter() - started
+
+    scenarios = {}
+    for name in names:
+        ok, failed = len(latencies[name]), sum(errors[name].values())
+        scenarios[name] = {
+            "ok": ok,
+            "failed": failed,
+            "errors": dict(errors[name]),
+            "throughput_rps": ok / elapsed,
+            "latency": summarize(latencies[name]),
+        }
+    return {
+        "config": {"mix": mix, "concurrency": concurrency, "duration": duration, "requests": requests, "seed": ctx.seed},
+        "elapsed_s": elapsed,
+        "throughput_rps": sum(s["ok"] for s in scenarios.values()) / elapsed,
+        "scenarios": scenarios,
+        "extras": {key: summarize(values) for key, values in extras.items()},
+        "loop_lag": summarize(lag),
+    }
+
+
+def print_report(report: Dict[str, object]):
+    print(f"\n{report['elapsed_s']:.1f}s, {report['throughput_rps']:.1f} req/s overall")
+    print(f"{'scenario':<18} {'ok':>6} {'failed':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [(name, s["ok"], s["failed"], s["throughput_rps"], s["latency"]) for name, s in report["scenarios"].items()]
+    rows += [(name, s["count"], 0, None, s) for name, s in report["extras"].items()]
+    for name, ok, failed, rps, latency in rows:
+        cells = [f"{latency.get(k, 0):9.1f}" for k in ("p50_ms", "p95_ms", "p99_ms")] if latency["count"] else ["        -"] * 3
+        print(f"{name:<18} {ok:>6} {failed:>6} {(f'{rps:8.1f}' if rps is not None else '       -')} {' '.join(cells)}")
+    for name, s in report["scenarios"].items():
+        if s["errors"]:
+            print(f"  {name} errors: {s['errors']}")
+    lag = report["loop_lag"]
+    if lag["count"]:
+        print(f"driver event-loop lag: p50 {lag['p50_ms']:.1f} ms, p99 {lag['p99_ms']:.1f} ms, max {lag['max_ms']:.1f} ms")
+    server = report.get("server_loop")
+    if server:
+        print(f"server event-loop lag: mean {server['mean_lag_ms']:.1f} ms over {server['lag_probes']} probes")
+        for site, n in server["blocking_calls"].items():
+            print(f"  blocked {n}x at {site}")
+
+
+_SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse_loop_metrics(text: str) -> Dict[str, object]:
+    """Loop-monitor series from a /api/metrics scrape."""
+    lag = {"count": 0.0, "sum": 0.0}
+    blocking: Dict[str, float] = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        if name == "event_loop_lag_seconds_count":
+            lag["count"] = float(value)
+        elif name == "event_loop_lag_seconds_sum":
+            lag["sum"] = float(value)
+        elif name == "event_loop_blocking_calls_total":
+            site = re.search(r'site="((?:[^"\\]|\\.)*)"', labels or "")
+            blocking[site.group(1) if site else ""] = float(value)
+    return {"lag": lag, "blocking": blocking}
+
+
+def server_loop_report(before: Dict[str, object], after: Dict[str, object]) -> Optional[Dict[str, object]]:
+    """Server event-loop lag and blocking calls between two scrapes (None without the loop monitor)."""
+    probes = after["lag"]["count"] - before["lag"]["count"]
+    if probes <= 0:
+        return None
+    blocking = {site: n - before["blocking"].get(site, 0) for site, n in after["blocking"].items()}
+    return {
+        "lag_probes": int(probes),
+        "mean_lag_ms": (after["lag"]["sum"] - before["lag"]["sum"]) / probes * 1000,
+        "blocking_calls": {site: int(n) for site, n in sorted(blocking.items(), key=lambda kv: -kv[1]) if n > 0},
+    }
+
+
+async def scrape_loop_metrics(client: httpx.AsyncClient) -> Dict[str, object]:
+    response = await client.get("/api/metrics")
+    response.raise_for_status()
+    return parse_loop_metrics(response.text)
+
+
+async def resolve_collection(client: httpx.AsyncClient) -> str:
+    response = await client.get("/api/collections")
+    response.raise_for_status()
+    collections = response.json()
+    if not collections:
+        raise SystemExit("No collections on the server; pass --collection-id")
+    return collections[0]["id"]
+
+
+async def main_async(args) -> Dict[str, object]:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        collection_id = args.collection_id or await resolve_collection(client)
+        ws_url = "ws" + args.url[len("http"):] if args.url.startswith("http") else args.url
+        ctx = LoadContext(client, collection_id, ws_url=ws_url, seed=args.seed, timeout=args.timeout)
+        before = await scrape_loop_metrics(client)
+        report = await run_load(ctx, mix, args.concurrency, args.duration or None, args.requests or None)
+        report["server_loop"] = server_loop_report(before, await scrape_loop_metrics(client))
+        return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.load_test", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--collection-id", help="Collection to search (default: the first one listed)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights, e.g. {DEFAULT_MIX}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds (0 = until --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many scenarios (0 = until --duration)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-scenario timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
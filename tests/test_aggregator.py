@@ -0,0 +1,45 @@
+import numpy as np
+
+from mvp.search.aggregator import AggregationState, ProfileAggregator
+from mvp.schema.models import PhotoProfile
+
+def _profile(hair: str, conf: float = 0.9, gender: str = None) -> PhotoProfile:
+    data = {"hair": {"color": {"value": hair, "confidence": conf}}}
+    if gender:
+        data["basic"] = {"gender": {"value": gender, "confidence": 0.8}}
+    return PhotoProfile(**data)
+
+def test_incremental_state_matches_full_rebuild():
+    positives = [_profile("red", 0.9, "female"), _profile("blonde", 0.6), _profile("red", 0.5)]
+    negatives = [_profile("red", 0.9, "male")]
+
+    agg = AggregationState()
+    keys = [agg.add_positive(p) for p in positives]
+    neg_key = agg.add_negative(negatives[0])
+    assert agg.target_profile() == ProfileAggregator().build_target_profile(positives, negatives)
+    # 0.9 + 0.5 - 0.72 red vs 0.6 blonde
+    assert agg.target_profile().hair.color.value.value == "red"
+
+    # Removing an example undoes exactly its votes
+    agg.remove(keys[0])
+    assert agg.target_profile().hair.color.value.value == "blonde"
+    assert agg.target_profile().basic.gender.value.value == "male"  # Only seen in the negative
+    agg.remove(neg_key)
+    assert agg.target_profile() == ProfileAggregator().build_target_profile(positives[1:], [])
+    assert len(agg) == 2 and not agg.remove(neg_key)
+
+def test_target_distribution_and_sessions():
+    agg = AggregationState()
+    agg.add_positive(_profile("red", 0.6))
+    agg.add_positive(_profile("black", 0.2))
+    dist = agg.target_distribution()
+    assert set(dist) == {"hair.color"}
+    assert np.isclose(dist["hair.color"].sum(), 1.0)
+    assert np.isclose(dist["hair.color"].max(), 0.75)
+
+    aggregator = ProfileAggregator()
+    state = aggregator.session_state("s1")
+    state.add_positive(_profile("red"), key="a")
+    assert aggregator.session_state("s1") is state and "a" in state
+    aggregator.drop_session("s1")
+    assert len(aggregator.session_state("s1")) == 0
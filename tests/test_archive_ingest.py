@@ -0,0 +1,66 @@
+import asyncio
+import io
+import zipfile
+from uuid import UUID
+import numpy as np
+from PIL import Image
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select
+
+import mvp.storage.archive_ingest as archive_ingest
+from mvp.core.hash_index import hash_indexes
+from mvp.storage.archive_ingest import IngestJob, run_archive_ingest
+from mvp.storage.models import PhotoCollection, StoredPhoto
+
+def _jpeg(seed: int, size: int = 128) -> bytes:
+    arr = np.random.RandomState(seed).randint(0, 255, (16, 16, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).resize((size, size)).save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+def test_archive_ingest_dedupes_and_bulk_inserts(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(archive_ingest, "engine", engine)
+    monkeypatch.setattr(archive_ingest, "async_engine", create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"))
+    monkeypatch.setattr(archive_ingest.settings.jobs, "auto_annotate_uploads", False)
+    monkeypatch.chdir(tmp_path)
+    
+    with Session(engine) as session:
+        col = PhotoCollection(user_id=UUID(int=0), name="test")
+        session.add(col)
+        session.commit()
+        session.refresh(col)
+        collection_id = col.id
+    
+    zip_path = tmp_path / "upload.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("a.jpg", _jpeg(1))
+        zf.writestr("nested/b.jpg", _jpeg(2))
+        zf.writestr("a_small.jpg", _jpeg(1, size=96))  # Resized copy of a.jpg
+        zf.writestr("broken.jpg", b"not an image")
+        zf.writestr("notes.txt", b"ignored")
+    
+    events = []
+    async def progress(session_id, data):
+        events.append(data)
+    
+    job = IngestJob(collection_id=collection_id, filename="upload.zip")
+    try:
+        asyncio.run(run_archive_ingest(job, zip_path, progress, "sess"))
+    finally:
+        archive_ingest.shutdown_process_pool()
+        hash_indexes.invalidate(collection_id)
+    
+    assert job.status == "completed", job.message
+    assert (job.total, job.added, job.duplicates, job.failed) == (4, 2, 1, 1)
+    assert events[-1]["stage"] == "completed"
+    assert not zip_path.exists()
+    
+    with Session(engine) as session:
+        photos = session.exec(select(StoredPhoto)).all()
+        assert len(photos) == 2
+        assert all(p.phash and len(p.phash) == 16 for p in photos)
+        assert session.get(PhotoCollection, collection_id).photo_count == 2
+    
+    assert len(list((tmp_path / "data" / "uploads" / str(collection_id) / "thumbs").iterdir())) == 2
@@ -0,0 +1,43 @@
+import asyncio
+from uuid import uuid4
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.storage.async_store import insert_photos, save_search_session
+from mvp.storage.attribute_store import load_profiles_async
+from mvp.storage.database import create_async_sqlite_engine
+from mvp.storage.models import PhotoCollection, SearchSession
+
+PROFILE = {"basic": {"gender": {"value": "female", "confidence": 0.9}}}
+
+def test_async_insert_scan_and_history(db_engine, async_db_url):
+    with Session(db_engine) as session:
+        collection = PhotoCollection(name="c", user_id=uuid4())
+        session.add(collection)
+        session.commit()
+        collection_id, user_id = collection.id, collection.user_id
+
+    rows = [
+        {"id": uuid4(), "collection_id": collection_id, "image_path": "a.jpg", "profile": PROFILE},
+        {"id": uuid4(), "collection_id": collection_id, "image_path": "b.jpg", "profile": {}},
+    ]
+
+    async def scenario():
+        async_engine = create_async_sqlite_engine(async_db_url)
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await insert_photos(session, collection_id, rows)
+
+            profiles = await load_profiles_async(session, collection_id, {"basic.gender": "female"})
+            assert [p.image_path for p in profiles] == ["a.jpg"]
+
+            sess_id = uuid4()
+            assert await save_search_session(session, sess_id, user_id, collection_id, ["prompt"], results=[{"id": "x", "score": 1.0}])
+            assert not await save_search_session(session, sess_id, user_id, collection_id, ["again"])
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
+
+    with Session(db_engine) as session:
+        assert session.get(PhotoCollection, collection_id).photo_count == 2
+        [history] = session.exec(select(SearchSession)).all()
+        assert history.positives == ["prompt"] and history.completed_at is not None
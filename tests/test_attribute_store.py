@@ -0,0 +1,81 @@
+from datetime import datetime
+from uuid import uuid4
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from mvp.schema.attribute_codes import encode_profile, decode_profile
+from mvp.schema.models import PhotoProfile
+from mvp.storage.attribute_store import load_profiles, sync_photo_attributes
+from mvp.schema import attribute_codes
+from mvp.storage.database import check_attribute_codes, create_sqlite_engine, run_migrations
+from mvp.storage.models import PhotoCollection, StoredPhoto
+
+def _profile(gender: str, age: str, hair: str) -> dict:
+    return {
+        "basic": {"gender": {"value": gender, "confidence": 0.9}, "age_group": {"value": age, "confidence": 0.7}},
+        "hair": {"color": {"value": hair, "confidence": 0.8}},
+    }
+
+def test_encode_decode_roundtrip():
+    profile = PhotoProfile(**_profile("female", "25-34", "blonde"))
+    row = encode_profile(profile)
+    assert row == encode_profile(profile.model_dump(mode="json"))
+    assert row["basic_gender"] == 1 and row["basic_gender_conf"] == 0.9
+    assert row["face_nose"] is None
+
+    decoded = decode_profile(row, id="p1", image_path="a.jpg")
+    assert decoded.id == "p1"
+    assert decoded.basic.gender.value.value == "female"
+    assert decoded.hair.color.confidence == 0.8
+    assert decoded.face.nose is None
+
+def test_load_profiles_pushes_filters_into_sql(db_engine):
+    with Session(db_engine) as session:
+        collection = PhotoCollection(name="c", user_id=uuid4())
+        session.add(collection)
+        for i, (g, a) in enumerate([("female", "25-34"), ("male", "25-34"), ("female", "45-54")]):
+            photo = StoredPhoto(collection_id=collection.id, image_path=f"{i}.jpg", profile=_profile(g, a, "black"))
+            session.add(photo)
+            sync_photo_attributes(session, photo)
+        # Un-annotated photos have no attribute row
+        session.add(StoredPhoto(collection_id=collection.id, image_path="empty.jpg", profile={}))
+        session.commit()
+
+        assert len(load_profiles(session, collection.id)) == 3
+
+        female = load_profiles(session, collection.id, {"basic.gender": "female"})
+        assert sorted(p.image_path for p in female) == ["0.jpg", "2.jpg"]
+
+        young = load_profiles(session, collection.id, {"basic.gender": "female", "basic.age_group": ["18-24", "25-34"]})
+        assert [p.image_path for p in young] == ["0.jpg"]
+
+def test_migration_backfills_existing_profiles(tmp_path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    run_migrations(engine, "0003")
+
+    # Rows written before the attribute table existed (only columns of that schema)
+    with Session(engine) as session:
+        collection = PhotoCollection(name="c", user_id=uuid4())
+        session.add(collection)
+        session.commit()
+        collection_id, photo_id = collection.id, uuid4()
+        session.execute(insert(StoredPhoto.__table__).values(
+            id=photo_id, collection_id=collection_id, image_path="x.jpg",
+            profile=_profile("male", "55+", "grey"), created_at=datetime.utcnow(),
+        ))
+        session.commit()
+
+    run_migrations(engine)
+
+    with Session(engine) as session:
+        [profile] = load_profiles(session, collection_id)
+    assert profile.id == str(photo_id)
+    assert profile.basic.age_group.value.value == "55+"
+
+def test_startup_refuses_codes_from_other_enums(db_engine, monkeypatch):
+    check_attribute_codes(db_engine)  # Migrations recorded the current code tables
+
+    monkeypatch.setattr(attribute_codes, "schema_fingerprint", lambda: "0" * 16)  # e.g. an enum gained a member
+    with pytest.raises(RuntimeError, match="re-codes photoattributes"):
+        check_attribute_codes(db_engine)
@@ -0,0 +1,32 @@
+import json
+
+from tests.benchmark_search import compare, main, parse_size, run_suite, size_label
+
+def _report(**medians):
+    return {"results": {k: {"median_s": v} for k, v in medians.items()}}
+
+def test_sizes():
+    assert [parse_size(s) for s in ("10k", "100K", "1m", "2500")] == [10_000, 100_000, 1_000_000, 2_500]
+    assert [size_label(n) for n in (10_000, 1_000_000, 2_500)] == ["10k", "1m", "2500"]
+
+def test_compare_flags_only_real_regressions():
+    baseline = _report(**{"score@10k": 0.010, "top_k@10k": 0.0001, "filter@10k": 0.020})
+    current = _report(**{"score@10k": 0.015, "top_k@10k": 0.0003, "filter@10k": 0.021, "new@10k": 1.0})
+    rows = {r["case"]: r for r in compare(current, baseline, tolerance=0.25, min_delta=0.001)}
+    assert rows["score@10k"]["regressed"]
+    assert not rows["top_k@10k"]["regressed"]  # 3x slower, but below min_delta
+    assert not rows["filter@10k"]["regressed"]
+    assert "new@10k" not in rows
+
+def test_suite_runs_and_gates(tmp_path):
+    report = run_suite([300], ["score", "top_k", "filter", "aggregate"], repeat=1, log=lambda *_: None)
+    assert set(report["results"]) == {"score@300", "top_k@300", "filter@300", "aggregate"}
+    assert report["results"]["score@300"]["items"] == 300
+
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "300", "--cases", "top_k", "--repeat", "1", "--baseline", str(baseline)]
+    assert main(args + ["--save-baseline"]) == 0
+    saved = json.loads(baseline.read_text())
+    saved["results"]["top_k@300"]["median_s"] = 1e-9  # Make the current run look much slower
+    baseline.write_text(json.dumps(saved))
+    assert main(args + ["--min-delta", "0"]) == 1
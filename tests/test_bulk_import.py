@@ -0,0 +1,46 @@
+from uuid import uuid4
+from sqlmodel import Session, select
+
+from mvp.storage.attribute_store import load_profiles
+from mvp.storage.bulk_import import bulk_import_photos, count_photos
+from mvp.storage.models import PhotoCollection, StoredPhoto
+
+def _profile(gender: str) -> dict:
+    return {"basic": {"gender": {"value": gender, "confidence": 0.9}}}
+
+def test_bulk_import_inserts_in_chunks_and_upserts(db_engine):
+    with Session(db_engine) as session:
+        collection = PhotoCollection(name="c", user_id=uuid4())
+        session.add(collection)
+        session.commit()
+        collection_id = collection.id
+
+    rows = [{"image_path": f"{i}.jpg", "profile": _profile("male")} for i in range(25)]
+    rows.append({"image_path": "3.jpg", "profile": _profile("male")})  # Duplicate within the input
+    stats = bulk_import_photos(db_engine, collection_id, rows, chunk_size=7)
+    assert (stats.inserted, stats.updated) == (25, 1)
+
+    with db_engine.connect() as conn:
+        assert count_photos(conn) == 25
+        assert count_photos(conn, uuid4()) == 0
+
+    # Re-import updates profiles by path instead of duplicating rows
+    stats = bulk_import_photos(db_engine, collection_id, [{"image_path": "0.jpg", "profile": _profile("female")}, {"image_path": "new.jpg", "profile": {}}])
+    assert (stats.inserted, stats.updated) == (1, 1)
+
+    with Session(db_engine) as session:
+        assert session.get(PhotoCollection, collection_id).photo_count == 26
+        assert len(session.exec(select(StoredPhoto)).all()) == 26
+        female = load_profiles(session, collection_id, {"basic.gender": "female"})
+        assert [p.image_path for p in female] == ["0.jpg"]
+
+    # The same key twice in one chunk: the last row wins
+    rows = [{"image_path": "dup.jpg", "profile": _profile("male")}, {"image_path": "dup.jpg", "profile": _profile("female")}]
+    stats = bulk_import_photos(db_engine, collection_id, rows)
+    assert (stats.inserted, stats.updated) == (1, 1)
+    with Session(db_engine) as session:
+        female = load_profiles(session, collection_id, {"basic.gender": "female"})
+        assert sorted(p.image_path for p in female) == ["0.jpg", "dup.jpg"]
+
+    stats = bulk_import_photos(db_engine, collection_id, [{"image_path": "1.jpg", "profile": {}}], update_existing=False)
+    assert (stats.inserted, stats.updated, stats.skipped) == (0, 0, 1)
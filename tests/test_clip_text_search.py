@@ -0,0 +1,64 @@
+import asyncio
+from uuid import uuid4
+import numpy as np
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.api.routes import search as search_routes
+from mvp.api.routes.search import TextSearchRequest, _clip_search
+from mvp.core.state import state
+from mvp.schema.models import PhotoProfile
+from mvp.search.ranker import Ranker
+from mvp.storage.async_store import insert_photos
+from mvp.storage.database import create_async_sqlite_engine
+from mvp.storage.models import PhotoCollection
+
+class TextEncoder:
+    model = object()
+
+    def encode_text(self, text: str):
+        return [1.0, 0.0, 0.0]
+
+def _photo(collection_id, name: str, hair: str, embedding):
+    return {
+        "id": uuid4(), "collection_id": collection_id, "image_path": f"/data/{name}.jpg",
+        "profile": {"hair": {"color": {"value": hair, "confidence": 0.9}}},
+        "embedding": np.asarray(embedding, dtype=np.float32).tobytes(),
+    }
+
+def test_clip_mode_ranks_by_text_embedding_and_blends_attributes(db_engine, async_db_url, monkeypatch):
+    with Session(db_engine) as session:
+        collection = PhotoCollection(name="c", user_id=uuid4())
+        session.add(collection)
+        session.commit()
+        collection_id = collection.id
+    rows = [
+        _photo(collection_id, "near_red", "red", [1.0, 0.0, 0.0]),
+        _photo(collection_id, "close_black", "black", [0.9, 0.2, 0.0]),
+        _photo(collection_id, "far_black", "black", [0.0, 0.0, 1.0]),
+    ]
+
+    async def parse_prompt(prompt: str):
+        return PhotoProfile(hair={"color": {"value": "black", "confidence": 0.9}})
+
+    monkeypatch.setattr(state, "embedder", TextEncoder())
+    monkeypatch.setattr(search_routes.parser, "parse_prompt", parse_prompt)
+
+    async def scenario():
+        async_engine = create_async_sqlite_engine(async_db_url)
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await insert_photos(session, collection_id, rows)
+
+            request = TextSearchRequest(prompt="a person", collection_id=collection_id, mode="clip", top_k=3)
+            clip_only = await _clip_search(session, request, Ranker(), Ranker.DEFAULT_WEIGHTS)
+
+            request.blend_attributes = True
+            blended = await _clip_search(session, request, Ranker(), Ranker.DEFAULT_WEIGHTS)
+        await async_engine.dispose()
+        return clip_only, blended
+
+    clip_only, blended = asyncio.run(scenario())
+    assert [r.profile.image_path for r in clip_only.results] == ["/images/near_red.jpg", "/images/close_black.jpg", "/images/far_black.jpg"]
+    assert clip_only.target_profile is None
+    assert blended.results[0].profile.image_path == "/images/close_black.jpg"
+    assert blended.target_profile.hair.color.value.value == "black"
@@ -0,0 +1,95 @@
+import asyncio
+import base64
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.api.embeddings import EmbeddingFormatMiddleware
+from mvp.schema.embedding import to_array, to_bytes
+from mvp.schema.models import PhotoProfile
+from mvp.storage.async_store import insert_photos
+from mvp.storage.attribute_store import load_embeddings_async
+from mvp.storage.database import create_async_sqlite_engine
+from mvp.storage.db import PhotoDatabase
+from mvp.storage.models import PhotoCollection
+
+def test_profile_embedding_is_a_packed_array():
+    blob = np.arange(4, dtype=np.float32).tobytes()
+    profile = PhotoProfile(id="a", embedding=blob)
+    assert profile.embedding.dtype == np.float32 and profile.embedding.tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert not profile.embedding.flags.owndata  # A view of the bytes, not a copy
+    assert PhotoProfile(embedding=[1, 2]).embedding.dtype == np.float32  # Lists still validate
+    assert profile.model_dump()["embedding"] is profile.embedding
+    with pytest.raises(ValidationError):
+        PhotoProfile(embedding={"dtype": "int8", "base64": ""})
+
+def test_profiles_compare_by_value():
+    a, b = PhotoProfile(id="a", embedding=[1, 2]), PhotoProfile(id="a", embedding=np.array([1, 2], dtype=np.float32))
+    assert a == b and a in [b]
+    assert a != PhotoProfile(id="a", embedding=[1, 3])
+    assert a != PhotoProfile(id="a") and PhotoProfile(id="a") == PhotoProfile(id="a")
+    assert a != PhotoProfile(id="b", embedding=[1, 2])
+
+def test_json_embeddings_are_opt_in():
+    profile = PhotoProfile(id="a", embedding=np.array([0.5, -1.0], dtype=np.float16))
+    assert profile.model_dump(mode="json")["embedding"] is None
+
+    encoded = profile.model_dump(mode="json", context={"embeddings": "base64"})["embedding"]
+    assert encoded == {"dtype": "float16", "base64": base64.b64encode(profile.embedding.tobytes()).decode()}
+    restored = PhotoProfile(**{"id": "a", "embedding": encoded}).embedding
+    assert restored.dtype == np.float16 and restored.tolist() == [0.5, -1.0]
+    assert profile.model_dump(mode="json", context={"embeddings": "list"})["embedding"] == [0.5, -1.0]
+
+def test_api_edge_format_per_request():
+    app = FastAPI()
+
+    @app.get("/profile")
+    async def get_profile() -> PhotoProfile:
+        return PhotoProfile(id="a", embedding=[1.0, 2.0])
+
+    app.add_middleware(EmbeddingFormatMiddleware)
+    client = TestClient(app)
+    assert client.get("/profile").json()["embedding"] is None
+    assert client.get("/profile?embeddings=list").json()["embedding"] == [1.0, 2.0]
+    encoded = client.get("/profile", headers={"X-Embeddings": "base64"}).json()["embedding"]
+    assert to_array(encoded).tolist() == [1.0, 2.0]
+    assert client.get("/profile?embeddings=xml").status_code == 400
+
+def test_json_database_keeps_embeddings(tmp_path):
+    db = PhotoDatabase(str(tmp_path / "db.json"))
+    db.add_profile(PhotoProfile(id="a", embedding=[0.25, 0.75]))
+    assert '"base64"' in (tmp_path / "db.json").read_text()
+    assert PhotoDatabase(str(tmp_path / "db.json")).get_profile("a").embedding.tolist() == [0.25, 0.75]
+
+def test_float16_blobs_load_as_float32(db_engine, async_db_url):
+    with Session(db_engine) as session:
+        collection = PhotoCollection(name="c", user_id=uuid4())
+        session.add(collection)
+        session.commit()
+        collection_id = collection.id
+
+    vectors = {"float32": [1.0, 0.0, 0.5], "float16": [0.0, 1.0, 0.5], None: [0.5, 0.5, 0.0]}  # None: rows before 0006
+    rows = [{
+        "id": uuid4(), "collection_id": collection_id, "image_path": f"/data/{dtype}.jpg", "profile": {},
+        "embedding": to_bytes(vector, dtype or "float32"), "embedding_dtype": dtype,
+    } for dtype, vector in vectors.items()]
+    assert len(rows[1]["embedding"]) == 6  # Half the bytes
+
+    async def scenario():
+        async_engine = create_async_sqlite_engine(async_db_url)
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await insert_photos(session, collection_id, rows)
+            loaded = await load_embeddings_async(session, collection_id)
+        await async_engine.dispose()
+        return loaded
+
+    ids, embeddings = asyncio.run(scenario())
+    assert embeddings.dtype == np.float32 and embeddings.shape == (3, 3)
+    by_id = dict(zip(ids, embeddings.tolist()))
+    assert [by_id[str(r["id"])] for r in rows] == list(vectors.values())
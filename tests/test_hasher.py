@@ -0,0 +1,49 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from mvp.core.hasher import ImageHasher
+from mvp.core.hash_index import BKTree, CollectionHashIndex
+
+def test_dhash_matches_hex_format():
+    img = Image.fromarray(np.random.RandomState(0).randint(0, 255, (64, 64, 3), dtype=np.uint8))
+    value = ImageHasher._dhash(img)
+    hex_value = ImageHasher.hash_to_hex(value)
+    
+    assert len(hex_value) == 16
+    assert ImageHasher.hex_to_hash(hex_value) == value
+
+def test_dhash_resized_copy_is_near_duplicate():
+    base = Image.fromarray(np.random.RandomState(1).randint(0, 255, (32, 32, 3), dtype=np.uint8)).resize((256, 256))
+    resized = base.resize((128, 128))
+    other = Image.fromarray(np.random.RandomState(2).randint(0, 255, (32, 32, 3), dtype=np.uint8)).resize((256, 256))
+    
+    h_base = ImageHasher._dhash(base)
+    assert ImageHasher.hamming_distance(h_base, ImageHasher._dhash(resized)) <= 6
+    assert ImageHasher.hamming_distance(h_base, ImageHasher._dhash(other)) > 6
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(42)
+    hashes = [rng.getrandbits(64) for _ in range(2000)]
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, i)
+    
+    assert len(tree) == len(hashes)
+    
+    for _ in range(20):
+        # Query near a stored hash by flipping a few bits
+        query = hashes[rng.randrange(len(hashes))] ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64))
+        expected = {i for i, h in enumerate(hashes) if (h ^ query).bit_count() <= 8}
+        found = {i for i, _ in tree.find(query, 8)}
+        assert found == expected
+        assert tree.find_first(query, 8) is not None
+    
+    assert tree.find(hashes[0], 0) == [(0, 0)]
+
+def test_claim_accepts_one_of_concurrent_near_duplicates():
+    index, tree = CollectionHashIndex(), BKTree()
+    value = random.Random(7).getrandbits(64)
+    with ThreadPoolExecutor(8) as pool:
+        matches = list(pool.map(lambda i: index.claim(tree, value ^ (1 << (i % 4)), 6, i), range(64)))
+    assert sum(m is None for m in matches) == 1 and len(tree) == 1
@@ -0,0 +1,65 @@
+import numpy as np
+
+from mvp.schema.models import PhotoProfile
+from mvp.search.ranker import Ranker
+from mvp.search.vector_index import VectorIndex, fuse_scores, hybrid_rank, profile_embeddings, query_vector
+from mvp.search.vectorized import ProfileMatrix, SoftTarget
+
+def _clustered(n: int, dim: int = 32, clusters: int = 40, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+def test_exact_index_skips_missing_embeddings():
+    embeddings = _clustered(50)
+    embeddings[[3, 7]] = np.nan
+    index = VectorIndex(embeddings)
+    assert index.exact and len(index) == 48
+
+    rows, sims = index.search(embeddings[10], 50)
+    assert rows[0] == 10 and np.isclose(sims[0], 1.0)
+    assert 3 not in rows and 7 not in rows
+    assert list(sims) == sorted(sims, reverse=True)
+
+def test_ivf_recall_against_exact(monkeypatch):
+    from mvp.core.config import settings
+    embeddings = _clustered(6_000)
+    exact = VectorIndex(embeddings)
+    monkeypatch.setattr(settings.search, "ann_min_size", 1_000)
+    ivf = VectorIndex(embeddings, nprobe=10)
+    assert exact.exact and not ivf.exact
+    assert VectorIndex(embeddings, exact=True).exact
+
+    recalls = []
+    for q in _clustered(20, seed=2):
+        expected = set(exact.search(q, 20)[0])
+        recalls.append(len(expected & set(ivf.search(q, 20)[0])) / 20)
+    assert np.mean(recalls) >= 0.9
+
+def test_query_vector_moves_away_from_negatives():
+    q = query_vector([[1.0, 0.0], [1.0, 0.2]], [[0.0, 1.0]])
+    assert np.isclose(np.linalg.norm(q), 1.0) and q[1] < 0
+    assert query_vector([]) is None
+
+def test_fusion_methods():
+    attributes = np.array([0.9, 0.5, 0.1], dtype=np.float32)
+    sims = np.array([-1.0, 1.0, 0.0], dtype=np.float32)
+    assert np.allclose(fuse_scores(attributes, sims, 1.0, "linear"), attributes)
+    assert np.allclose(fuse_scores(attributes, sims, 0.0, "linear"), [0.0, 1.0, 0.5])
+    rrf = fuse_scores(attributes, sims, 0.5, "rrf")
+    assert rrf[1] > rrf[0] > rrf[2]
+
+def test_hybrid_rank_reranks_nearest_by_attributes():
+    def profile(hair: str, embedding):
+        return PhotoProfile(hair={"color": {"value": hair, "confidence": 0.9}}, embedding=embedding)
+
+    profiles = [
+        profile("black", [1.0, 0.0, 0.0]),
+        profile("red", [0.99, 0.1, 0.0]),
+        profile("red", [0.0, 0.0, 1.0]),  # Right hair, but far in embedding space
+        profile("red", None),
+    ]
+    index = VectorIndex(profile_embeddings(profiles))
+    target = SoftTarget.from_profile(profile("red", None))
+    ranking = hybrid_rank(Ranker(), target, ProfileMatrix.from_profiles(profiles), index, query_vector([[1.0, 0.0, 0.0]]), k=3, m=2)
+    assert [row for row, _ in ranking] == [1, 0]
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta
+from uuid import UUID
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from mvp.annotator.annotation_worker import AnnotationWorker, annotation_progress, enqueue_collection_annotation
+from mvp.providers.base import VLMResponse
+from mvp.schema.models import PhotoProfile
+from mvp.storage.job_queue import JobQueue
+from mvp.storage.models import Job, PhotoCollection, StoredPhoto
+
+def _queue(tmp_path) -> JobQueue:
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine)
+    return JobQueue(engine, retry_backoff_seconds=10.0)
+
+def test_claim_respects_priority_and_lease(tmp_path):
+    queue = _queue(tmp_path)
+    low = queue.enqueue("k", {"n": 1}, priority=0)
+    high = queue.enqueue("k", {"n": 2}, priority=10)
+    
+    jobs = queue.claim("k", "w1", limit=1, lease_seconds=60)
+    assert [j.id for j in jobs] == [high]
+    
+    # Leased job is not handed out twice
+    jobs = queue.claim("k", "w2", limit=5, lease_seconds=60)
+    assert [j.id for j in jobs] == [low]
+    assert queue.claim("k", "w3", limit=5) == []
+    
+    # Expired lease becomes claimable again (simulated restart)
+    with Session(queue.engine) as session:
+        job = session.get(Job, low)
+        job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.add(job)
+        session.commit()
+    reclaimed = queue.claim("k", "w4", limit=5)
+    assert [j.id for j in reclaimed] == [low]
+    assert reclaimed[0].attempts == 2
+    
+    # Stale owner can no longer complete it
+    assert not queue.complete(jobs[0])
+    assert queue.complete(reclaimed[0])
+
+def test_fail_backs_off_then_gives_up(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue("k", {}, max_attempts=2)
+    
+    job = queue.claim("k", "w")[0]
+    queue.fail(job, "boom")
+    assert queue.claim("k", "w") == []  # Backoff delays the retry
+    
+    with Session(queue.engine) as session:
+        stored = session.exec(select(Job)).one()
+        assert stored.status == "queued"
+        assert stored.run_after > datetime.utcnow() + timedelta(seconds=5)
+        stored.run_after = datetime.utcnow()
+        session.add(stored)
+        session.commit()
+    
+    job = queue.claim("k", "w")[0]
+    queue.fail(job, "boom again")
+    assert queue.counts("k")["failed"] == 1
+    assert queue.retry_failed("k") == 1
+
+class FakeRegistry:
+    def __init__(self):
+        self.calls = 0
+    
+    async def analyze_image(self, image_path, system_prompt, **kwargs):
+        self.calls += 1
+        if "bad" in image_path:
+            raise RuntimeError("provider error")
+        data = {"basic": {"gender": {"value": "female", "confidence": 0.9}}}
+        return VLMResponse(raw_text="", profile=PhotoProfile(**data), provider="fake", model="fake")
+
+def test_annotation_worker_fills_profiles(tmp_path):
+    queue = _queue(tmp_path)
+    with Session(queue.engine) as session:
+        col = PhotoCollection(user_id=UUID(int=0), name="c")
+        session.add(col)
+        session.commit()
+        session.refresh(col)
+        collection_id = col.id
+        for path in ["a.jpg", "b.jpg", "bad.jpg"]:
+            session.add(StoredPhoto(collection_id=collection_id, image_path=str(tmp_path / path), profile={}))
+        session.add(StoredPhoto(collection_id=collection_id, image_path="done.jpg", profile={"basic": {}}))
+        session.commit()
+    
+    assert enqueue_collection_annotation(collection_id, queue=queue) == 3
+    assert enqueue_collection_annotation(collection_id, queue=queue) == 0  # Already queued
+    
+    worker = AnnotationWorker(queue=queue, registry=FakeRegistry(), concurrency=2)
+    asyncio.run(worker.run_until_empty())
+    
+    progress = annotation_progress(collection_id, queue=queue)
+    assert progress["done"] == 2
+    assert progress["queued"] == 1  # bad.jpg waits for retry
+    
+    with Session(queue.engine) as session:
+        photos = {p.image_path.split("/")[-1]: p for p in session.exec(select(StoredPhoto)).all()}
+        assert photos["a.jpg"].profile["basic"]["gender"]["value"] == "female"
+        assert photos["bad.jpg"].profile == {}
+
+class SlowRegistry(FakeRegistry):
+    async def analyze_image(self, image_path, system_prompt, **kwargs):
+        await asyncio.sleep(0.2)
+        return await super().analyze_image(image_path, system_prompt, **kwargs)
+
+def test_annotation_worker_finishes_in_flight_jobs_on_stop(tmp_path):
+    queue = _queue(tmp_path)
+    with Session(queue.engine) as session:
+        col = PhotoCollection(user_id=UUID(int=0), name="c")
+        session.add(col)
+        session.commit()
+        session.refresh(col)
+        session.add(StoredPhoto(collection_id=col.id, image_path=str(tmp_path / "a.jpg"), profile={}))
+        session.commit()
+        collection_id = col.id
+    enqueue_collection_annotation(collection_id, queue=queue)
+
+    async def scenario():
+        worker = AnnotationWorker(queue=queue, registry=SlowRegistry(), poll_interval=0.01)
+        task = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.1)  # Job claimed, VLM call in flight
+        worker.stop()
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(scenario())
+    assert annotation_progress(collection_id, queue=queue)["done"] == 1
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from mvp.core.config import PROJECT_ROOT
+from mvp.core.loop_monitor import BLOCKING_CALLS, EVENT_LOOP_LAG, LoopMonitor, blocking_site
+from mvp.core.metrics import metrics
+
+def blocking_handler():
+    time.sleep(0.3)  # A sync call inside async code
+
+def test_blocking_call_is_attributed_with_stack():
+    async def run():
+        monitor = LoopMonitor(interval=0.02, block_threshold=0.1, keep=10)
+        monitor.start()
+        before = EVENT_LOOP_LAG.count()
+        await asyncio.sleep(0.1)
+        blocking_handler()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return monitor, before
+
+    monitor, before = asyncio.run(run())
+    assert not monitor.running
+    assert EVENT_LOOP_LAG.count() > before
+    assert monitor.max_lag >= 0.2
+
+    (report,) = monitor.recent
+    assert report["site"].startswith("tests/test_loop_monitor.py:") and report["site"].endswith("blocking_handler")
+    assert any("blocking_handler" in line for line in report["stack"])
+    assert 0.2 <= report["blocked_s"] < 0.5
+    assert BLOCKING_CALLS.value(site=report["site"]) >= 1
+    assert "event_loop_blocking_calls_total{site=" in metrics.render()
+    assert monitor.snapshot()["blocks"][0] is report
+
+def test_idle_loop_reports_no_blocks():
+    async def run():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        return monitor
+    assert not asyncio.run(run()).recent
+
+def test_blocking_site_prefers_project_frames():
+    import traceback
+    stack = traceback.StackSummary.from_list([
+        (str(PROJECT_ROOT / "mvp/api/main.py"), 393, "analyze_upload", ""),
+        ("/usr/lib/python3/site-packages/openai/_base_client.py", 10, "request", ""),
+    ])
+    assert blocking_site(stack) == "mvp/api/main.py:393 analyze_upload"
+    assert blocking_site(traceback.StackSummary()) == "unattributed"
+
+def test_load_driver_reads_server_loop_metrics():
+    from tests.load_test import parse_loop_metrics, server_loop_report
+    before = parse_loop_metrics(metrics.render())
+    EVENT_LOOP_LAG.observe(0.004)
+    EVENT_LOOP_LAG.observe(0.006)
+    BLOCKING_CALLS.inc(site='mvp/api/main.py:393 analyze_upload')
+    report = server_loop_report(before, parse_loop_metrics(metrics.render()))
+    assert report["lag_probes"] == 2 and abs(report["mean_lag_ms"] - 5.0) < 1e-6
+    assert report["blocking_calls"] == {"mvp/api/main.py:393 analyze_upload": 1}
+    assert server_loop_report(before, before) is None
@@ -0,0 +1,59 @@
+import io
+import json
+
+import pytest
+
+from mvp.core.log import configure_logging, get_logger, shutdown_logging
+from mvp.core.metrics import CACHE_REQUESTS, STAGE_ERRORS, STAGE_SECONDS, MetricsRegistry, metrics, stage
+from mvp.search.result_cache import ResultCache
+
+def test_histogram_and_counter_render_prometheus_text():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0))
+    calls = registry.counter("demo_total", "Demo calls", ["outcome"])
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage="rank")
+    calls.inc(outcome="hit")
+    calls.inc(2, outcome="hit")
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="rank",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="rank",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="rank",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="rank"} 3' in text
+    assert 'demo_total{outcome="hit"} 3' in text
+    with pytest.raises(ValueError):
+        calls.inc(stage="rank")
+
+def test_stage_times_and_counts_errors():
+    before = STAGE_SECONDS.count(stage="test_stage")
+    with stage("test_stage"):
+        pass
+    with pytest.raises(RuntimeError):
+        with stage("test_stage"):
+            raise RuntimeError("boom")
+    assert STAGE_SECONDS.count(stage="test_stage") == before + 2
+    assert STAGE_ERRORS.value(stage="test_stage") >= 1
+    assert 'search_stage_seconds_count{stage="test_stage"}' in metrics.render()
+
+def test_result_cache_counts_hits_and_misses():
+    cache = ResultCache(max_entries=4)
+    hits, misses = CACHE_REQUESTS.value(cache="results", outcome="hit"), CACHE_REQUESTS.value(cache="results", outcome="miss")
+    assert cache.get("k") is None
+    cache.put("k", "c", [("a", 1.0)])
+    assert cache.get("k") == [("a", 1.0)]
+    assert CACHE_REQUESTS.value(cache="results", outcome="hit") == hits + 1
+    assert CACHE_REQUESTS.value(cache="results", outcome="miss") == misses + 1
+
+def test_json_logs_carry_extra_fields():
+    stream = io.StringIO()
+    configure_logging(level="DEBUG", fmt="json", stream=stream)
+    try:
+        get_logger("mvp.tests").info("upload analyzed", extra={"upload": "a.jpg", "bytes": 10})
+    finally:
+        shutdown_logging()
+    entry = json.loads(stream.getvalue().splitlines()[-1])
+    assert entry["msg"] == "upload analyzed"
+    assert entry["level"] == "info" and entry["logger"] == "mvp.tests"
+    assert entry["upload"] == "a.jpg" and entry["bytes"] == 10
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.core.config import MockVLMConfig, Settings
+from mvp.providers import mock_provider, registry as registry_module
+from mvp.providers.mock_provider import MockBehaviour, MockProvider, MockProviderError, MockRateLimitError, MockVLMClient
+from mvp.providers.registry import ProviderRegistry
+from tests.benchmark_cases import Workload
+from tests.load_test import LoadContext, make_image, parse_mix, run_load
+
+def _config(**kwargs) -> MockVLMConfig:
+    return MockVLMConfig(**{"latency_ms": 0.0, **kwargs})
+
+def test_profiles_are_deterministic(tmp_path):
+    a, b = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    a.write_bytes(make_image(0, 1))
+    b.write_bytes(make_image(0, 1))  # Same bytes, different name
+
+    async def run():
+        provider = MockProvider(config=_config())
+        first, second = await provider.analyze_image(str(a), "sys"), await provider.analyze_image(str(b), "sys")
+        assert first.profile.model_dump(exclude={"image_path"}) == second.profile.model_dump(exclude={"image_path"})
+        assert first.provider == "mock" and first.tokens_used > 0
+        assert await provider.generate_text("red hair") == await provider.generate_text("red hair")
+        assert await provider.generate_text("red hair") != await provider.generate_text("bald")
+    asyncio.run(run())
+
+    other_seed = MockBehaviour(_config(seed=1))
+    assert other_seed.profile_data("red hair") != MockBehaviour(_config()).profile_data("red hair")
+
+def test_latency_distributions():
+    assert MockBehaviour(_config(latency_distribution="fixed", latency_ms=200)).sample_latency() == 0.2
+    for distribution in ("uniform", "exponential", "lognormal"):
+        behaviour = MockBehaviour(_config(latency_distribution=distribution, latency_ms=100, latency_spread=0.5))
+        samples = [behaviour.sample_latency() for _ in range(2000)]
+        assert min(samples) >= 0
+        center = sum(samples) / len(samples) if distribution == "exponential" else sorted(samples)[1000]
+        assert 0.09 < center < 0.11
+        assert [MockBehaviour(behaviour.config).sample_latency() for _ in range(3)] == [MockBehaviour(behaviour.config).sample_latency() for _ in range(3)]
+    with pytest.raises(ValueError):
+        MockBehaviour(_config(latency_distribution="pareto"))
+
+def test_error_and_rate_limit_rates():
+    behaviour = MockBehaviour(_config(error_rate=0.2, rate_limit_rate=0.1, seed=3))
+    outcomes = [type(behaviour.plan()[1]) for _ in range(5000)]
+    assert 0.17 < outcomes.count(MockProviderError) / 5000 < 0.23
+    assert 0.08 < outcomes.count(MockRateLimitError) / 5000 < 0.12
+
+def test_quota_answers_429_with_retry_after():
+    behaviour = MockBehaviour(_config(quota_rpm=3))
+    assert [behaviour.plan()[1] for _ in range(3)] == [None] * 3
+    error = behaviour.plan()[1]
+    assert isinstance(error, MockRateLimitError) and error.status_code == 429
+    assert 59 < error.retry_after <= 60
+
+def test_sync_client_retries_and_blocks():
+    client = MockVLMClient(_config(latency_distribution="fixed", latency_ms=20, error_rate=1.0))
+    started = time.perf_counter()
+    with pytest.raises(MockProviderError):
+        client.analyze_image("x.jpg", "sys", retries=2)
+    assert time.perf_counter() - started >= 0.04
+    assert json.loads(MockVLMClient(_config()).analyze_image("x.jpg", "sys"))["image_path"] == "x.jpg"
+
+def test_registry_uses_mock_when_enabled(monkeypatch):
+    config = _config(enabled=True, latency_ms=1.0)
+    monkeypatch.setattr(registry_module, "settings", Settings(mock_vlm=config))
+    monkeypatch.setattr(mock_provider, "settings", Settings(mock_vlm=config))
+    registry = ProviderRegistry()
+    assert isinstance(registry.get_provider("mock"), MockProvider)
+    assert registry._get_provider_order()[0] == "mock"
+    response = asyncio.run(registry.analyze_image("x.jpg", "sys"))
+    assert response.provider == "mock" and registry.get_stats()["mock"]["successes"] == 1
+
+def test_load_driver_against_text_search(monkeypatch, tmp_path):
+    from mvp.api.routes import search as search_routes
+    from mvp.storage.database import create_async_sqlite_engine, get_async_session
+
+    config = _config(enabled=True, latency_distribution="fixed", latency_ms=5.0)
+    monkeypatch.setattr(registry_module, "settings", Settings(mock_vlm=config))
+    monkeypatch.setattr(mock_provider, "settings", Settings(mock_vlm=config))
+    monkeypatch.setattr(search_routes.parser, "registry", ProviderRegistry())
+
+    workload = Workload(50, tmp_dir=tmp_path)
+    path, collection_id = workload.database
+    async_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}")
+
+    async def session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(search_routes.router, prefix="/api")
+    app.dependency_overrides[get_async_session] = session_override
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            ctx = LoadContext(client, str(collection_id))
+            with pytest.raises(ValueError):
+                await run_load(ctx, parse_mix("ws=1"), requests=1)  # No server URL to open sockets on
+            try:
+                return await run_load(ctx, parse_mix("text=1"), concurrency=4, duration=None, requests=8)
+            finally:
+                await async_engine.dispose()
+    report = asyncio.run(run())
+
+    text = report["scenarios"]["text"]
+    assert text["ok"] == 8 and text["failed"] == 0
+    assert text["latency"]["p50_ms"] >= 5.0 and text["latency"]["p99_ms"] >= text["latency"]["p50_ms"]
+    assert report["throughput_rps"] > 0 and report["loop_lag"]["count"] >= 0
+    with pytest.raises(ValueError):
+        parse_mix("text=1,nope=2")
@@ -0,0 +1,66 @@
+import asyncio
+import importlib.util
+import sys
+import tempfile
+from pathlib import Path
+
+from mvp.api import progress_bus
+from mvp.api.progress_bus import UnixSocketBus, make_bus, LocalBus
+from mvp.core.config import settings
+from mvp.api.websocket import ConnectionManager
+from tests.test_progress_publisher import FakeSocket
+
+async def _until(condition, timeout: float = 2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_make_bus():
+    assert isinstance(make_bus("local"), LocalBus)
+    assert isinstance(make_bus("unix"), UnixSocketBus)
+
+def test_bus_module_loads_without_fcntl(monkeypatch):
+    monkeypatch.setitem(sys.modules, "fcntl", None)  # As on Windows
+    spec = importlib.util.spec_from_file_location("progress_bus_copy", progress_bus.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    monkeypatch.setattr(settings.api, "workers", 4)
+    monkeypatch.setattr(module.os, "name", "nt")
+    assert isinstance(module.make_bus("auto"), module.LocalBus)
+
+def test_updates_reach_sockets_in_other_workers():
+    async def run(path: str):
+        a, b, c = ConnectionManager(max_rate_hz=100), ConnectionManager(max_rate_hz=100), ConnectionManager(max_rate_hz=100)
+        for manager in (a, b, c):
+            await manager.start(UnixSocketBus(path))
+        assert a.bus.is_broker and not b.bus.is_broker
+
+        on_b, on_c = FakeSocket(), FakeSocket()
+        b.register(on_b, "s1")
+        c.register(on_c, "s2")
+        await _until(lambda: a.is_connected("s1") and c.is_connected("s1") and b.is_connected("s2"))
+
+        await a.send_update("s1", {"stage": "ranking", "message": "from broker"})
+        await c.send_update("s1", {"stage": "ranking", "message": "from worker"})
+        await b.send_update("s2", {"stage": "completed", "results_count": 1})
+        await _until(lambda: len(on_b.sent) == 2 and len(on_c.sent) == 1)
+        assert {m["message"] for m in on_b.sent} == {"from broker", "from worker"}
+
+        # The broker's worker exits: another worker takes over
+        await a.close()
+        await _until(lambda: b.bus.is_broker or c.bus.is_broker)
+        await _until(lambda: b.is_connected("s2") and c.is_connected("s1"))
+        await b.send_update("s2", {"stage": "completed", "results_count": 2})
+        await _until(lambda: len(on_c.sent) == 2)
+
+        b.disconnect("s1", on_b)
+        await _until(lambda: not c.is_connected("s1"))
+        for manager in (b, c):
+            await manager.close()
+
+    # Unix socket paths are limited to ~100 bytes, so keep it short
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+        asyncio.run(run(str(Path(tmp) / "bus.sock")))
@@ -0,0 +1,67 @@
+import asyncio
+
+from mvp.api.websocket import ConnectionManager, coalesce_key
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay, self.fail = delay, fail
+        self.sent = []
+
+    async def send_json(self, data):
+        if self.fail:
+            raise RuntimeError("closed")
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+def test_coalesce_key():
+    assert coalesce_key({"stage": "ranking", "progress": 0.4}) == ("progress", "ranking")
+    assert coalesce_key({"stage": "partial_results", "progress": 0.2, "final": False, "results": []}) == ("progress", "partial_results")
+    assert coalesce_key({"stage": "ranking", "progress": 1.0, "status": "completed"}) is None
+    assert coalesce_key({"stage": "results", "final": True, "results": []}) is None
+    assert coalesce_key({"stage": "error", "message": "boom"}) is None
+
+def test_ticks_are_rate_limited_and_coalesced():
+    async def run():
+        manager = ConnectionManager(max_rate_hz=20)
+        ws = FakeSocket()
+        manager.register(ws, "s")
+        for i in range(1000):
+            await manager.send_update("s", {"stage": "ranking", "progress": i / 1000})
+            if i % 100 == 0:
+                await asyncio.sleep(0.01)
+        await manager.send_update("s", {"stage": "ranking", "progress": 1.0, "status": "completed"})
+        await manager.send_update("s", {"stage": "completed", "progress": 1.0, "results_count": 3})
+        await manager.flush("s")
+        await manager.close()
+        return ws.sent
+
+    sent = asyncio.run(run())
+    assert len(sent) < 10
+    # Must-deliver updates arrive last and in order; ticks only ever move forward
+    assert sent[-2:] == [{"stage": "ranking", "progress": 1.0, "status": "completed"}, {"stage": "completed", "progress": 1.0, "results_count": 3}]
+    ticks = [m["progress"] for m in sent[:-2]]
+    assert ticks == sorted(ticks)
+
+def test_fan_out_and_slow_clients_do_not_block():
+    async def run():
+        manager = ConnectionManager(max_rate_hz=100)
+        fast, slow, broken = FakeSocket(), FakeSocket(delay=0.02), FakeSocket(fail=True)
+        for ws in (fast, slow, broken):
+            manager.register(ws, "s")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for i in range(20):
+            await manager.send_update("s", {"stage": "analyzing", "message": f"step {i}"})
+        elapsed = loop.time() - started
+
+        await manager.flush("s")
+        connected = set(manager.active_connections["s"])
+        await manager.close()
+        return elapsed, fast.sent, slow.sent, connected, broken
+
+    elapsed, fast_sent, slow_sent, connected, broken = asyncio.run(run())
+    assert elapsed < 0.05
+    assert [m["message"] for m in fast_sent] == [f"step {i}" for i in range(20)]
+    assert slow_sent == fast_sent
+    assert broken not in connected and len(connected) == 2
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mvp.api.routes.profiles import router as profiles_router
+from mvp.core import profiling
+from mvp.core.config import settings
+from mvp.core.profiling import AWAITING, ProfilingMiddleware, list_profiles
+
+def busy_ranking(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def _client(monkeypatch, tmp_path) -> TestClient:
+    monkeypatch.setattr(settings.observability, "profiling_dir", str(tmp_path))
+    monkeypatch.setattr(settings.observability, "profiling_keep", 2)
+    app = FastAPI()
+
+    @app.post("/api/search/text")
+    async def search():
+        await asyncio.sleep(0.05)
+        busy_ranking(0.1)
+        return {"results": []}
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.include_router(profiles_router, prefix="/api")
+    app.add_middleware(ProfilingMiddleware, paths=["/api/search"], interval=0.002)
+    return TestClient(app)
+
+def test_flagged_request_is_profiled(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path)
+    assert "x-profile-id" not in client.post("/api/search/text").headers
+    assert "x-profile-id" not in client.get("/api/health?profile=1").headers  # Not a profiled path
+    assert not list(tmp_path.iterdir())
+
+    response = client.post("/api/search/text", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    folded = (tmp_path / f"{profile_id}.collapsed.txt").read_text().splitlines()
+    counts = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in folded}
+    busy = sum(n for stack, n in counts.items() if "busy_ranking (tests/test_request_profiling.py" in stack)
+    assert 80_000 < busy < 150_000  # Microseconds in the 100 ms busy loop
+    assert 30_000 < counts.get(AWAITING, 0) < 100_000  # The 50 ms sleep
+    assert all(not stack.startswith("run_forever") for stack in counts)  # Trimmed at the middleware
+
+    document = json.loads((tmp_path / f"{profile_id}.speedscope.json").read_text())
+    assert document["name"].startswith("POST /api/search/text -> 200")
+    samples = document["profiles"][0]
+    assert len(samples["samples"]) == len(samples["weights"]) and samples["endValue"] > 0.1
+
+def test_admin_endpoint_lists_and_serves_profiles(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path)
+    ids = [client.post("/api/search/text?profile=1").headers["x-profile-id"] for _ in range(3)]
+
+    listed = client.get("/api/admin/profiles").json()["profiles"]
+    assert len(listed) == 2 and ids[0] not in {p["id"] for p in listed}  # Pruned to profiling_keep
+    assert listed == list_profiles()
+
+    name = listed[0]["files"][0]
+    assert client.get(f"/api/admin/profiles/{name}").status_code == 200
+    assert client.get("/api/admin/profiles/..%2F..%2Fetc%2Fpasswd").status_code == 404
+    assert profiling.profile_file("../x.collapsed.txt") is None
@@ -0,0 +1,76 @@
+from uuid import uuid4
+import numpy as np
+from sqlmodel import Session
+
+from mvp.schema.models import PhotoProfile
+from mvp.search.result_cache import ResultCache, fingerprint, result_cache
+from mvp.search.vector_index import CollectionIndexes, VectorIndex
+from mvp.storage.attribute_store import sync_photo_attributes
+from mvp.storage.models import PhotoCollection, StoredPhoto
+
+def _profile(hair: str, image_path: str = "a.jpg") -> PhotoProfile:
+    return PhotoProfile(
+        id=image_path,
+        image_path=image_path,
+        basic={"gender": {"value": "female", "confidence": 0.9}},
+        hair={"color": {"value": hair, "confidence": 0.8}},
+    )
+
+def test_fingerprint_ignores_identity_and_key_order():
+    a = fingerprint(_profile("black", "a.jpg"), "c1", 0, filters={"basic.gender": "female", "hair.color": ["black"]})
+    b = fingerprint(_profile("black", "b.jpg"), "c1", 0, filters={"hair.color": ["black"], "basic.gender": "female"})
+    assert a == b
+    assert a != fingerprint(_profile("blonde"), "c1", 0)
+    assert fingerprint(_profile("black"), "c1", 0) != fingerprint(_profile("black"), "c1", 1)
+    assert fingerprint(_profile("black"), "c1", 0) != fingerprint(_profile("black"), "c2", 0)
+
+def test_lru_eviction_and_top_n():
+    cache = ResultCache(max_entries=2, top_n=3)
+    cache.put("a", "c", [(i, 1.0) for i in range(10)])
+    cache.put("b", "c", [])
+    assert len(cache.get("a")) == 3  # "a" is now most recently used
+    cache.put("c", "c", [])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1}
+
+def test_disabled_caches_keep_nothing():
+    # What several API workers get: per-process versions cannot be invalidated across workers
+    cache = ResultCache(max_entries=0)
+    cache.put("a", "c", [("x", 1.0)])
+    assert cache.get("a") is None and len(cache) == 0
+    indexes = CollectionIndexes(max_collections=0)
+    indexes.put("c", 0, ["x"], VectorIndex(np.ones((1, 2), dtype=np.float32)))
+    assert indexes.get("c", 0) is None
+
+def test_bump_invalidates_only_that_collection():
+    cache = ResultCache()
+    target = _profile("black")
+    k1, k2 = cache.key(target, "c1"), cache.key(target, "c2")
+    cache.put(k1, "c1", [("x", 0.5)])
+    cache.put(k2, "c2", [("y", 0.5)])
+
+    cache.bump("c1")
+    assert cache.get(k1) is None
+    assert cache.key(target, "c1") != k1
+    assert cache.get(k2) == [("y", 0.5)]
+
+def test_committed_attribute_sync_bumps_collection(db_engine):
+    with Session(db_engine) as session:
+        collection = PhotoCollection(name="c", user_id=uuid4())
+        session.add(collection)
+        session.commit()
+        collection_id = collection.id
+
+        before = result_cache.version(collection_id)
+        photo = StoredPhoto(collection_id=collection_id, image_path="x.jpg", profile={})
+        session.add(photo)
+        sync_photo_attributes(session, photo)
+        session.rollback()
+        assert result_cache.version(collection_id) == before
+
+        photo = StoredPhoto(collection_id=collection_id, image_path="x.jpg", profile={})
+        session.add(photo)
+        sync_photo_attributes(session, photo)
+        session.commit()
+        assert result_cache.version(collection_id) == before + 1
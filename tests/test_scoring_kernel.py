@@ -0,0 +1,41 @@
+import numpy as np
+
+from mvp.schema.models import PhotoProfile
+from mvp.search import kernel
+from mvp.search.kernel import auto_tune, score_parallel
+from mvp.search.vectorized import MAX_MEMBERS, N_FIELDS, ProfileMatrix, SoftTarget, score_compiled
+from mvp.search.ranker import Ranker
+
+def _random_matrix(n: int) -> ProfileMatrix:
+    rng = np.random.default_rng(3)
+    codes = rng.integers(-1, 4, size=(n, N_FIELDS)).astype(np.int16)
+    confidences = rng.uniform(0.3, 1.0, size=(n, N_FIELDS)).astype(np.float32)
+    return ProfileMatrix(codes, confidences)
+
+def _table():
+    target = PhotoProfile(
+        basic={"gender": {"value": "female", "confidence": 0.9}, "age_group": {"value": "25-34", "confidence": 0.8}},
+        hair={"color": {"value": "red", "confidence": 0.7}},
+    )
+    negative = PhotoProfile(hair={"color": {"value": "black", "confidence": 0.9}})
+    table = SoftTarget.from_profile(target, negative).compile(Ranker.DEFAULT_WEIGHTS)
+    assert table.shape == (N_FIELDS, MAX_MEMBERS, 4)
+    return table
+
+def test_chunked_threads_match_single_pass(monkeypatch):
+    monkeypatch.setattr(kernel, "numba", None)
+    matrix, table = _random_matrix(5003), _table()
+    expected = score_compiled(table, matrix)
+    for threads, chunk_size in [(4, 700), (3, 5003), (8, 1)]:
+        assert np.allclose(score_parallel(table, matrix, threads=threads, chunk_size=chunk_size), expected)
+
+def test_auto_tune(monkeypatch):
+    monkeypatch.setattr(kernel, "cpu_count", lambda: 16)
+    monkeypatch.setattr(kernel.settings.search, "score_threads", 0)
+    monkeypatch.setattr(kernel.settings.search, "score_min_rows_per_thread", 20_000)
+    monkeypatch.setattr(kernel.settings.search, "score_chunk_size", 65_536)
+
+    assert auto_tune(1_000) == (1, 1_000)  # Small collections stay single-threaded
+    assert auto_tune(100_000) == (5, 20_000)
+    assert auto_tune(10_000_000) == (16, 65_536)
+    assert auto_tune(100, threads=4) == (4, 25)
@@ -0,0 +1,84 @@
+import asyncio
+
+import numpy as np
+
+from mvp.schema.models import PhotoProfile
+from mvp.search.ranker import Ranker
+from mvp.search.sharded import ShardedRanker, merge_top_k
+from mvp.search.vectorized import ProfileMatrix, SoftTarget, top_k
+from mvp.storage.snapshot import ProfileSnapshot, write_snapshot
+
+HAIR = ["black", "dark_brown", "blonde", "red", "grey"]
+AGES = ["18-24", "25-34", "35-44", "45-54"]
+
+def _profiles(n: int):
+    rng = np.random.default_rng(7)
+    return [
+        PhotoProfile(
+            id=f"p{i}",
+            image_path=f"{i}.jpg",
+            basic={
+                "gender": {"value": ["male", "female"][i % 2], "confidence": 0.9},
+                "age_group": {"value": AGES[rng.integers(len(AGES))], "confidence": round(float(rng.uniform(0.5, 1)), 2)},
+            },
+            hair={"color": {"value": HAIR[rng.integers(len(HAIR))], "confidence": round(float(rng.uniform(0.5, 1)), 2)}},
+        )
+        for i in range(n)
+    ]
+
+def _expected(target: SoftTarget, matrix: ProfileMatrix, k: int):
+    scores = Ranker().score_collection(target, matrix)
+    return scores, top_k(scores, k)
+
+def test_merge_top_k():
+    parts = [(np.array([0, 1]), np.array([0.9, 0.2])), (np.array([5, 6]), np.array([0.5, 0.95]))]
+    assert merge_top_k(parts, 3) == [(6, 0.95), (0, 0.9), (5, 0.5)]
+    assert merge_top_k([], 3) == []
+
+def test_sharded_top_k_matches_single_process(tmp_path):
+    profiles = _profiles(301)
+    target = SoftTarget.from_profile(profiles[0], negative_target=profiles[3])
+    in_memory = ProfileMatrix.from_profiles(profiles)
+
+    write_snapshot(tmp_path / "profiles.snap", profiles)
+    snapshot = ProfileSnapshot(tmp_path / "profiles.snap")
+    mapped = ProfileMatrix.from_profiles(snapshot)
+
+    ranker = ShardedRanker(shards=3, workers=2)
+    try:
+        for matrix in (in_memory, mapped):
+            ranker.load(matrix)
+            scores, expected = _expected(target, matrix, 20)
+            ranking = ranker.score_top_k(target, Ranker.DEFAULT_WEIGHTS, 20)
+            # Ties may come back in a different order; the scores must not
+            assert np.allclose([s for _, s in ranking], scores[expected])
+            assert all(abs(scores[i] - s) < 1e-6 for i, s in ranking)
+    finally:
+        ranker.close()
+    # Views into the mapping must go before it can be closed
+    del mapped, matrix
+    snapshot.close()
+
+def test_reload_keeps_blocks_of_in_flight_searches():
+    profiles = _profiles(200)
+    target = SoftTarget.from_profile(profiles[0])
+    first, second = ProfileMatrix.from_profiles(profiles), ProfileMatrix.from_profiles(profiles[::-1])
+    ranker = ShardedRanker(shards=2, workers=2)
+
+    async def scenario():
+        ranker.load(first)
+        search = asyncio.create_task(ranker.score_top_k_async(target, Ranker.DEFAULT_WEIGHTS, 10))
+        await asyncio.sleep(0)  # Shard tasks submitted; spawned workers are still starting
+        ranker.load(second)  # e.g. db_matrix rebuilt by another request
+        [retired] = ranker._retired
+        assert retired.blocks  # Still linked for the running search
+        return await search, retired
+
+    try:
+        ranking, retired = asyncio.run(scenario())
+        scores, expected = _expected(target, first, 10)
+        assert np.allclose([s for _, s in ranking], scores[expected])
+        assert not ranker._retired and not retired.blocks  # Unlinked once its tasks finished
+        assert len(ranker.score_top_k(target, Ranker.DEFAULT_WEIGHTS, 10)) == 10
+    finally:
+        ranker.close()
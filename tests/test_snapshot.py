@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from mvp.schema.models import PhotoProfile
+from mvp.storage import snapshot as snapshot_module
+from mvp.storage.snapshot import ProfileSnapshot, write_snapshot
+
+def _profiles():
+    return [
+        PhotoProfile(id="a", image_path="data/raw/a.jpg", embedding=[0.5, -1.0, 2.0],
+                     basic={"gender": {"value": "female", "confidence": 0.85}},
+                     hair={"color": {"value": "red", "confidence": 0.6}}),
+        PhotoProfile(id="b", image_path="data/raw/ü.jpg",
+                     vibe={"style": {"value": "casual", "confidence": 0.9}}),
+        PhotoProfile(),
+    ]
+
+def test_snapshot_roundtrip(tmp_path):
+    path = tmp_path / "profiles.snap"
+    assert write_snapshot(path, _profiles()) == 3
+
+    snap = ProfileSnapshot(path)
+    assert len(snap) == 3
+    assert snap.codes.dtype == np.int8 and snap.confidences.dtype == np.float16
+
+    a, b, empty = snap[0], snap[1], snap[-1]
+    assert (a.id, a.image_path) == ("a", "data/raw/a.jpg")
+    assert a.basic.gender.value.value == "female" and a.basic.gender.confidence == 0.85
+    assert a.hair.color.confidence == 0.6
+    assert a.embedding.dtype == np.float32 and a.embedding.tolist() == [0.5, -1.0, 2.0]
+    assert b.image_path == "data/raw/ü.jpg" and b.embedding is None
+    assert b.vibe.style.value.value == "casual"
+    assert empty.id is None and empty.basic.gender is None
+    assert snap[0] is a  # decoded once
+    assert [p.id for p in snap] == ["a", "b", None]
+    snap.close()
+
+def test_snapshot_rejects_other_schema(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.snap"
+    write_snapshot(path, _profiles(), include_embeddings=False)
+    assert ProfileSnapshot(path).embeddings is None
+
+    monkeypatch.setattr(snapshot_module, "schema_hash", lambda: 0)
+    with pytest.raises(ValueError):
+        ProfileSnapshot(path)
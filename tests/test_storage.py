@@ -0,0 +1,33 @@
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+
+from mvp.storage.database import create_sqlite_engine, run_migrations
+
+def test_migrations_match_models(db_engine):
+    with db_engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), SQLModel.metadata) == []
+    
+    indexes = {ix["name"] for ix in inspect(db_engine).get_indexes("storedphoto")}
+    assert {"ix_storedphoto_collection_id", "ix_storedphoto_phash", "ix_storedphoto_image_path"} <= indexes
+
+def test_legacy_database_is_stamped_and_upgraded(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    legacy = create_sqlite_engine(url)
+    # Pre-migration databases were created with create_all() and had no indexes on storedphoto
+    with legacy.begin() as conn:
+        conn.execute(text("CREATE TABLE storedphoto (id CHAR(32) PRIMARY KEY, collection_id CHAR(32) NOT NULL, image_path VARCHAR NOT NULL, profile JSON, phash VARCHAR, embedding BLOB, created_at DATETIME NOT NULL)"))
+    
+    run_migrations(legacy)
+    
+    insp = inspect(legacy)
+    assert insp.has_table("job")
+    assert "ix_storedphoto_phash" in {ix["name"] for ix in insp.get_indexes("storedphoto")}
+
+def test_sqlite_pragmas_applied(tmp_path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
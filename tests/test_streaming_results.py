@@ -0,0 +1,39 @@
+import asyncio
+import numpy as np
+
+from mvp.search.streaming import TopKTracker, chunk_bounds, stream_scores
+from mvp.search.vectorized import score_compiled, top_k
+from tests.test_scoring_kernel import _random_matrix, _table
+
+def test_chunk_bounds_grow_geometrically():
+    assert chunk_bounds(100, first=10, largest=40) == [(0, 10), (10, 30), (30, 70), (70, 100)]
+    assert chunk_bounds(0, first=10) == []
+
+def test_tracker_reports_only_material_changes():
+    tracker = TopKTracker(2, min_change=0.05)
+    tracker.update(0, np.array([0.5, 0.1], dtype=np.float32))
+    assert tracker.changed()
+    assert not tracker.changed()
+
+    tracker.update(2, np.array([0.12], dtype=np.float32))  # New 2nd place, barely better
+    assert not tracker.changed()
+    tracker.update(3, np.array([0.9], dtype=np.float32))  # New best
+    assert tracker.changed()
+    assert tracker.snapshot() == [(3, 0.8999999761581421), (0, 0.5)]
+
+def test_stream_scores_previews_then_full_scores():
+    matrix, table = _random_matrix(20_000), _table()
+    snapshots = []
+
+    async def on_snapshot(snapshot, progress):
+        snapshots.append((progress, snapshot))
+
+    scores = asyncio.run(stream_scores(table, matrix, 5, on_snapshot, first_chunk=1_000))
+    assert np.allclose(scores, score_compiled(table, matrix))
+
+    assert snapshots and snapshots[0][0] == 0.05
+    assert all(a[0] < b[0] for a, b in zip(snapshots, snapshots[1:]))
+    # Every preview is the exact top-5 of the rows scored so far
+    for progress, snapshot in snapshots:
+        seen = scores[:int(progress * len(scores))]
+        assert np.allclose([s for _, s in snapshot], seen[top_k(seen, 5)])
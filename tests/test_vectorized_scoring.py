@@ -0,0 +1,49 @@
+import random
+import numpy as np
+
+from mvp.core.distance_matrices import MatrixRegistry
+from mvp.schema.attribute_codes import ATTRIBUTE_FIELDS
+from mvp.schema.attributes import HairColor
+from mvp.schema.models import PhotoProfile
+from mvp.search.aggregator import AggregationState
+from mvp.search.ranker import Ranker
+from mvp.search.vectorized import ProfileMatrix, SoftTarget, top_k
+
+def _random_profile(rng: random.Random, fill: float = 0.7) -> PhotoProfile:
+    data = {}
+    for f in ATTRIBUTE_FIELDS:
+        if rng.random() < fill:
+            data.setdefault(f.category, {})[f.field] = {"value": rng.choice(f.members).value, "confidence": round(rng.random(), 2)}
+    return PhotoProfile(**data)
+
+def _hair(color: str, conf: float = 0.9) -> PhotoProfile:
+    return PhotoProfile(hair={"color": {"value": color, "confidence": conf}})
+
+def test_compiled_matrix_matches_registry():
+    array = MatrixRegistry.get_array(HairColor)
+    matrix = MatrixRegistry.get_matrix(HairColor)
+    assert array[0, 1] == matrix["black"]["dark_brown"]
+    assert np.allclose(np.diag(array), 0.0)
+
+def test_hard_target_matches_score_candidate():
+    rng = random.Random(7)
+    ranker = Ranker()
+    candidates = [_random_profile(rng) for _ in range(300)]
+    target, negative = _random_profile(rng), _random_profile(rng, 0.3)
+
+    expected = [ranker.score_candidate(target, c, negative_target=negative) for c in candidates]
+    scores = ranker.score_collection(target, candidates, negative_target=negative)
+    assert np.allclose(scores, expected, atol=1e-5)
+
+def test_soft_target_keeps_both_modes():
+    agg = AggregationState()
+    agg.add_positive(_hair("red", 0.9))
+    agg.add_positive(_hair("black", 0.8))
+    agg.add_negative(_hair("blonde", 0.9))
+
+    candidates = ProfileMatrix.from_profiles([_hair("blonde"), _hair("black"), _hair("grey"), _hair("red")])
+    scores = Ranker().score_collection(SoftTarget.from_state(agg), candidates)
+
+    # The hard target keeps only "red"; the soft one ranks both modes above grey and the rejected blonde
+    assert sorted(top_k(scores, 2)) == [1, 3]
+    assert scores[0] == 0.0
@@ -0,0 +1,89 @@
+import asyncio
+from uuid import uuid4
+import numpy as np
+import pytest
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from mvp.core.distance_matrices import MatrixRegistry
+from mvp.schema.attributes import Glasses
+from mvp.schema.models import PhotoProfile
+from mvp.search.ranker import Ranker
+from mvp.search.weights import compile_weights, validate_weights
+from mvp.storage.async_store import find_weight_profile
+from mvp.storage.database import create_async_sqlite_engine
+from mvp.storage.models import WeightProfile
+
+def _profile(gender: str, hair: str, glasses: str = "none") -> PhotoProfile:
+    return PhotoProfile(
+        basic={"gender": {"value": gender, "confidence": 0.9}},
+        hair={"color": {"value": hair, "confidence": 0.8}},
+        extra={"glasses": {"value": glasses, "confidence": 0.7}},
+    )
+
+def test_resolved_weights_are_merged_once():
+    assert Ranker.resolve_weights() is Ranker.DEFAULT_WEIGHTS
+    merged = Ranker.resolve_weights({"hair.color": 9.0})
+    assert merged["hair.color"] == 9.0 and merged["basic.gender"] == 10.0
+    assert Ranker.resolve_weights({"hair.color": 9.0}) is merged
+    assert Ranker.DEFAULT_WEIGHTS["hair.color"] == 2.5
+
+    with pytest.raises(ValueError):
+        validate_weights({"hair.colour": 1.0})
+    with pytest.raises(ValueError):
+        validate_weights({"hair.color": -1.0})
+    for bad in ("2.0", float("nan"), float("inf"), True):
+        with pytest.raises(ValueError, match="finite numbers"):
+            validate_weights({"hair.color": bad})
+
+@pytest.fixture
+def restore_matrices():
+    """Undo register() calls: the registry is process-global."""
+    matrices, compiled = dict(MatrixRegistry._matrices), dict(MatrixRegistry._compiled)
+    yield
+    MatrixRegistry._matrices.clear()
+    MatrixRegistry._matrices.update(matrices)
+    MatrixRegistry._compiled.clear()
+    MatrixRegistry._compiled.update(compiled)
+    MatrixRegistry.generation += 1  # Tables compiled against the test's matrix must not be reused
+
+def test_weighted_tables_match_score_candidate(restore_matrices):
+    ranker = Ranker()
+    target = _profile("female", "red", "reading")
+    candidates = [_profile("female", "red"), _profile("female", "blonde", "reading"), _profile("male", "red", "reading")]
+    weights = {"hair.color": 0.1, "extra.glasses": 8.0}
+
+    scores = ranker.score_collection(target, candidates, weights)
+    expected = [ranker.score_candidate(target, c, weights) for c in candidates]
+    assert np.allclose(scores, expected, atol=1e-6)
+    # Glasses now matter more than hair color
+    assert scores[1] > scores[0]
+
+    resolved = Ranker.resolve_weights(weights)
+    tables = compile_weights(resolved)
+    assert compile_weights(dict(resolved)) is tables
+    MatrixRegistry.register(Glasses, {})  # Re-registering a matrix invalidates compiled tables
+    assert compile_weights(resolved) is not tables
+
+def test_find_weight_profile_precedence(db_engine, async_db_url):
+    user_id = uuid4()
+    explicit = WeightProfile(user_id=user_id, name="explicit", weights={"hair.color": 1.0})
+    bound = WeightProfile(user_id=user_id, name="session", session_id="s1", weights={"hair.color": 2.0})
+    default = WeightProfile(user_id=user_id, name="default", is_default=True, weights={"hair.color": 3.0})
+    other_user = WeightProfile(user_id=uuid4(), name="foreign")
+    with Session(db_engine) as session:
+        session.add_all([explicit, bound, default, other_user])
+        session.commit()
+        ids = explicit.id, other_user.id
+
+    async def scenario():
+        async_engine = create_async_sqlite_engine(async_db_url)
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            assert (await find_weight_profile(session, user_id, ids[0], "s1")).name == "explicit"
+            assert await find_weight_profile(session, user_id, ids[1]) is None
+            assert (await find_weight_profile(session, user_id, session_id="s1")).name == "session"
+            assert (await find_weight_profile(session, user_id, session_id="s2")).name == "default"
+            assert await find_weight_profile(session, uuid4()) is None
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
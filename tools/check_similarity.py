@@ -20,7 +20,7 @@ async def check_files(file1_path, file2_path):
     emb1 = embedder.encode_image(file1_path)
     emb2 = embedder.encode_image(file2_path)
     
-    if not emb1 or not emb2:
+    if emb1 is None or emb2 is None:
         print("Error: Could not generate embeddings.")
         return
 
@@ -18,7 +18,7 @@ def add_to_blacklist(image_path):
     print(f"Generating embedding for {image_path}...")
     embedding = embedder.encode_image(image_path)
     
-    if not embedding:
+    if embedding is None:
         print("Failed to generate embedding.")
         return
 
@@ -31,7 +31,7 @@ def add_to_blacklist(image_path):
             except json.JSONDecodeError:
                 pass
     
-    blacklist.append(embedding)
+    blacklist.append(embedding.tolist())
     
     with open(BLACKLIST_FILE, "w") as f:
         json.dump(blacklist, f)